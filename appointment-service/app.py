@@ -1,37 +1,40 @@
-import time
 from flask import Flask
-from sqlalchemy.exc import OperationalError
 from config import Config
-from bd_struc_flask import db
-from routes.appointments import appointments_bp
-from routes.events import events_bp
+from clinic_core.bd import initializare_bd, asteptare_bd
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, rute=True, profil_bd='web'):
+    """
+    worker-ul, reminder-ul, sweeper-ul si relay-ul folosesc doar BD-ul, asa ca le creez aplicatia
+    cu rute=False: nu se mai importa rutele si auth-ul si nu mai pornesc firele pentru JWKS / identitati
+    profil_bd alege pool-ul de conexiuni (web / worker / scheduler, vezi clinic_core/bd.py)
+    """
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.json.sort_keys = False
     app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
     
-    db.init_app(app)
-    app.register_blueprint(appointments_bp)
-    app.register_blueprint(events_bp)
+    initializare_bd(app, 'appointment-service', profil_bd)
 
-    with app.app_context():
-        max_retries = 10
-        for attempt in range(max_retries):
-            try:
-                db.engine.connect()
-                print("S-a realizat conexiunea la BD")
-                break
+    if rute:
+        from clinic_core.auth import initializare_chei, initializare_identitati
+        from clinic_core.instrumentare import initializare_instrumentare
+        from routes.appointments import appointments_bp
+        from routes.events import events_bp
 
-            except OperationalError:
-                if attempt == max_retries - 1:
-                    exit(1)
-                print(f"Eroare BD nu e up inca")
-                time.sleep(3)
+        app.register_blueprint(appointments_bp)
+        app.register_blueprint(events_bp)
+
+        # cheile Keycloak (JWKS) din copia locala + firul care le reimprospateaza, inainte de primele cereri
+        initializare_chei(app.config)
+        # ascultatorul pentru modificarile userilor (invalideaza cache-ul de identitati)
+        initializare_identitati(app.config)
+        # durata si nr de interogari pe cerere (cererile lente apar in log)
+        initializare_instrumentare(app)
+
+    asteptare_bd(app, 'appointment-service')
 
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+from datetime import timedelta
+from sqlalchemy import select as sql_select, delete, insert, func, text
+from clinic_core.models import db, Appointment, AppointmentEvent, EventType, User, UserRole, Doctor, ReminderSchedule, OutboxMessage
+from utils.remindere import acum_romania
+
+# scriptul insereaza programari de test, sterge randuri din outbox si trimite toate reminderele scadente,
+# deci ruleaza doar daca i se spune explicit ca DATABASE_URL e un BD de test
+if os.getenv('BENCHMARK_BD_TEST') != '1':
+    print("benchmark_reminder.py modifica BD-ul (programari, outbox, remindere), se ruleaza doar pe un BD de test "
+          "cu BENCHMARK_BD_TEST=1")
+    sys.exit(1)
+
+from reminder import app, trimitere_remindere, mesaj_reminder
+
+def benchmark(nr_programari):
+    """
+    Durata unui ciclu pentru nr_programari remindere scadente, comparata cu varianta veche (pentru fiecare
+    programare o interogare dupa REMINDER_DUE si un commit cu evenimentul si mesajul ei)
+    Se ruleaza pe un BD de test, cu outbox_relay.py si reminder.py oprite; datele de test se sterg la final
+    """
+    marcaj = 'benchmark-reminder'
+
+    with app.app_context():
+        doctor = Doctor.query.order_by(Doctor.id).first()
+        pacient = User.query.filter_by(role=UserRole.PATIENT).order_by(User.id).first()
+        if not doctor or not pacient:
+            raise RuntimeError("Benchmark-ul are nevoie de cel putin un doctor si un pacient in BD")
+
+        acum = acum_romania()
+        # trimitere_remindere ia toate reminderele scadente, nu doar pe cele de test
+        if db.session.query(ReminderSchedule.id).filter(ReminderSchedule.due_at <= acum).first():
+            raise RuntimeError("In BD sunt deja remindere scadente, benchmark-ul le-ar trimite si pe ele")
+
+        ultimul_outbox = db.session.query(func.coalesce(func.max(OutboxMessage.id), 0)).scalar()
+
+        # programari de cate un minut, peste un an, ca sa nu se suprapuna cu cele reale ale doctorului
+        db.session.execute(text("""
+            INSERT INTO appointments (patient_id, doctor_id, start_time, end_time, status, notes, created_at, updated_at)
+            SELECT :pacient, :doctor, :inceput + i * interval '1 minute', :inceput + (i + 1) * interval '1 minute',
+                'CONFIRMED', :marcaj, now(), now()
+            FROM generate_series(0, :nr - 1) i"""),
+            {'pacient': pacient.id, 'doctor': doctor.id, 'inceput': acum + timedelta(days=365),
+             'marcaj': marcaj, 'nr': nr_programari})
+        ids = db.session.execute(sql_select(Appointment.id).where(Appointment.notes == marcaj)).scalars().all()
+
+        def pregatire():
+            # sterg ce a lasat rularea anterioara si programez din nou toate reminderele, scadente acum
+            db.session.execute(delete(AppointmentEvent).where(AppointmentEvent.appointment_id.in_(ids)))
+            db.session.execute(delete(OutboxMessage).where(OutboxMessage.id > ultimul_outbox))
+            db.session.execute(insert(ReminderSchedule), [{'appointment_id': id, 'due_at': acum} for id in ids])
+            db.session.commit()
+
+        def varianta_veche():
+            db.session.execute(delete(ReminderSchedule).where(ReminderSchedule.appointment_id.in_(ids)))
+            db.session.commit()
+            for prog, user in db.session.query(Appointment, User).join(User, Appointment.patient_id == User.id).filter(
+                    Appointment.id.in_(ids)).all():
+                if not AppointmentEvent.query.filter_by(appointment_id=prog.id, event_type=EventType.REMINDER_DUE).first():
+                    db.session.add(AppointmentEvent(appointment_id=prog.id, event_type=EventType.REMINDER_DUE,
+                        payload={'info': 'Notificare de  reminder trimisa'}, is_processed=True))
+                    rand = SimpleNamespace(id=prog.id, patient_id=prog.patient_id, doctor_id=prog.doctor_id,
+                        cabinet_id=prog.cabinet_id, start_time=prog.start_time, end_time=prog.end_time,
+                        full_name=user.full_name, email=user.email, doctor_name=None, specialization=None,
+                        cabinet=None, location=None)
+                    db.session.add(OutboxMessage(exchange='', routing_key='notifications_queue', payload=mesaj_reminder(rand)))
+                    db.session.commit()
+
+        try:
+            pregatire()
+            inceput = time.perf_counter()
+            varianta_veche()
+            veche = time.perf_counter() - inceput
+
+            pregatire()
+            inceput = time.perf_counter()
+            trimise, _ = trimitere_remindere()
+            noua = time.perf_counter() - inceput
+        finally:
+            db.session.rollback()
+            db.session.execute(delete(ReminderSchedule).where(ReminderSchedule.appointment_id.in_(ids)))
+            db.session.execute(delete(AppointmentEvent).where(AppointmentEvent.appointment_id.in_(ids)))
+            db.session.execute(delete(OutboxMessage).where(OutboxMessage.id > ultimul_outbox))
+            db.session.execute(delete(Appointment).where(Appointment.id.in_(ids)))
+            db.session.commit()
+
+        lot = app.config['REMINDER_BATCH_SIZE']
+        print(f"{nr_programari} remindere scadente: varianta veche {veche:.2f} s, "
+              f"loturi de {lot} {noua:.2f} s ({trimise} trimise, {noua / max(trimise, 1) * 1000:.3f} ms / reminder)")
+
+if __name__ == '__main__':
+    """
+    BENCHMARK_BD_TEST=1 python benchmark_reminder.py 10000
+    """
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+from datetime import timedelta
+import pika
+from sqlalchemy import delete, func
+from clinic_core.models import db, Appointment, AppointmentEvent, User, UserRole, Doctor, OutboxMessage
+from clinic_core.publisher import get_publisher
+from utils.remindere import acum_romania
+
+# scriptul porneste worker-e proprii pe appointments_queue, insereaza programari de test si sterge randuri din outbox,
+# deci ruleaza doar daca i se spune explicit ca DATABASE_URL e un BD de test
+if os.getenv('BENCHMARK_BD_TEST') != '1':
+    print("benchmark_worker.py modifica BD-ul (programari, outbox) si consuma appointments_queue, se ruleaza doar "
+          "pe un BD de test cu BENCHMARK_BD_TEST=1")
+    sys.exit(1)
+
+from app import create_app
+
+app = create_app(rute=False, profil_bd='worker')
+
+REPLICI = (1, 2, 3)
+
+def stare_coada(host, coada):
+    # (mesaje in coada, consumatori conectati), fara sa declar coada cu alte setari
+    connection = pika.BlockingConnection(pika.ConnectionParameters(host=host))
+    try:
+        metoda = connection.channel().queue_declare(queue=coada, durable=True, passive=True).method
+        return metoda.message_count, metoda.consumer_count
+    finally:
+        connection.close()
+
+def benchmark(nr_cereri, nr_doctori):
+    """
+    Cereri pe secunda procesate de 1 / 2 / 3 replici ale worker-ului (procese worker.py separate, ca replicile
+    din swarm, cu WORKER_MODE si setarile de lot din mediu) cand appointments_queue primeste deodata nr_cereri
+    cereri, pe sloturi diferite, impartite pe nr_doctori doctori
+    Se ruleaza pe un BD de test, cu appointment-worker si outbox_relay.py oprite; datele de test se sterg la final
+    """
+    marcaj = 'benchmark-worker'
+    host = app.config['RABBITMQ_HOST']
+    coada = app.config['RABBITMQ_QUEUE']
+
+    with app.app_context():
+        doctori = db.session.query(Doctor.id).order_by(Doctor.id).limit(nr_doctori).all()
+        pacient = User.query.filter_by(role=UserRole.PATIENT).order_by(User.id).first()
+        if len(doctori) < nr_doctori or not pacient:
+            raise RuntimeError(f"Benchmark-ul are nevoie de cel putin {nr_doctori} doctori si un pacient in BD")
+        doctori = [doctor_id for doctor_id, in doctori]
+
+        mesaje, _ = stare_coada(host, coada)
+        if mesaje:
+            raise RuntimeError(f"In {coada} sunt deja {mesaje} mesaje, worker-ele benchmark-ului le-ar procesa si pe ele")
+
+        ultimul_outbox = db.session.query(func.coalesce(func.max(OutboxMessage.id), 0)).scalar()
+
+        # sloturi de 5 minute peste un an, fiecare cerere pe alt slot, ca sa nu fie respinse
+        inceput = acum_romania().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=365)
+        sfarsit = inceput + timedelta(minutes=5 * (nr_cereri // nr_doctori + 1))
+        cereri = []
+        for i in range(nr_cereri):
+            start_time = inceput + timedelta(minutes=5 * (i // nr_doctori))
+            cereri.append((coada, {
+                'patient_id': pacient.id, 'patient_name': pacient.full_name, 'patient_email': pacient.email,
+                'doctor_id': doctori[i % nr_doctori], 'cabinet_id': None, 'notes': marcaj,
+                'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'end_time': (start_time + timedelta(minutes=5)).strftime('%Y-%m-%d %H:%M:%S')}, ''))
+
+        programari_test = (Appointment.patient_id == pacient.id, Appointment.doctor_id.in_(doctori),
+                           Appointment.start_time >= inceput, Appointment.start_time < sfarsit)
+
+        def curatare():
+            ids = db.session.query(Appointment.id).filter(*programari_test)
+            db.session.execute(delete(AppointmentEvent).where(AppointmentEvent.appointment_id.in_(ids.scalar_subquery())))
+            db.session.execute(delete(OutboxMessage).where(OutboxMessage.id > ultimul_outbox))
+            db.session.execute(delete(Appointment).where(*programari_test))
+            db.session.commit()
+
+        try:
+            for replici in REPLICI:
+                curatare()
+                worker_e = [subprocess.Popen([sys.executable, 'worker.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                             stdout=subprocess.DEVNULL) for _ in range(replici)]
+
+                def verificare_worker_e():
+                    if any(worker.poll() is not None for worker in worker_e):
+                        raise RuntimeError("Un worker s-a oprit in timpul benchmark-ului")
+
+                try:
+                    # astept sa se conecteze toate worker-ele, ca pornirea lor sa nu intre in masuratoare
+                    while stare_coada(host, coada)[1] < replici:
+                        verificare_worker_e()
+                        time.sleep(0.5)
+
+                    # toate cererile intra in coada deodata (un singur commit pe canalul tranzactional)
+                    get_publisher(host).publica_lot(cereri)
+                    start = time.perf_counter()
+                    procesate = 0
+                    while procesate < nr_cereri:
+                        time.sleep(0.1)
+                        verificare_worker_e()
+                        procesate = db.session.query(func.count(Appointment.id)).filter(*programari_test).scalar()
+                        db.session.rollback()
+                    durata = time.perf_counter() - start
+                finally:
+                    for worker in worker_e:
+                        worker.send_signal(signal.SIGINT)
+                    for worker in worker_e:
+                        worker.wait()
+
+                print(f"{replici} replici ({app.config['WORKER_MODE']}): {nr_cereri} cereri pe {nr_doctori} doctori "
+                      f"in {durata:.2f} s ({nr_cereri / durata:.0f} cereri/s)")
+        finally:
+            db.session.rollback()
+            curatare()
+
+if __name__ == '__main__':
+    """
+    BENCHMARK_BD_TEST=1 python benchmark_worker.py 2000 20
+    (nr de cereri pentru fiecare nr de replici, nr de doctori pe care se impart)
+    """
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
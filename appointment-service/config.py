@@ -4,14 +4,73 @@ class Config:
     # Baza de date
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'postgresql://scd:scd@db:5432/clinica')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # cererile web mai lente de atat (ms) apar in log cu durata si nr de interogari SQL (0 = oprit)
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 1000))
+
+    # pool-ul de conexiuni la BD (clinic_core/bd.py): fiecare tip de proces are un profil (web / worker /
+    # scheduler), variabilele de mai jos il suprascriu cand sunt setate; dimensionarea e explicata in README
+    DB_POOL_SIZE = os.getenv('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = os.getenv('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT')
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE')
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING')
+    DB_STATEMENT_TIMEOUT_MS = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    DB_APPLICATION_NAME = os.getenv('DB_APPLICATION_NAME')
+    # 1 cand conexiunile trec prin PgBouncer in modul transaction
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0')
+    # cat asteapta (secunde) la pornire ca jobul de migrare sa aduca schema la revizia ceruta
+    DB_READY_TIMEOUT = int(os.getenv('DB_READY_TIMEOUT', 60))
 
     # Keycloak
     KEYCLOAK_URL = os.getenv('KEYCLOAK_URL', 'http://keycloak:8080')
     KEYCLOAK_REALM = os.getenv('KEYCLOAK_REALM', 'medical-clinica')
+    # cheile de semnare din JWKS: reimprospatare in fundal (secunde), pauza minima intre doua cereri
+    # pentru un kid necunoscut si copia locala folosita la pornire
+    KEYCLOAK_JWKS_REFRESH = int(os.getenv('KEYCLOAK_JWKS_REFRESH', 300))
+    KEYCLOAK_JWKS_MIN_REFRESH = int(os.getenv('KEYCLOAK_JWKS_MIN_REFRESH', 30))
+    KEYCLOAK_JWKS_SNAPSHOT = os.getenv('KEYCLOAK_JWKS_SNAPSHOT', '/tmp/keycloak_jwks.json')
+
+    # cache-ul de identitati (user_id, rol, doctor_id) din clinic_core/auth.py: TTL in secunde (0 = oprit), nr maxim
+    # de intrari si exchange-ul fanout pe care user-service anunta modificarile userilor
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 60))
+    IDENTITY_CACHE_MAX = int(os.getenv('IDENTITY_CACHE_MAX', 10000))
+    USER_EVENTS_EXCHANGE = os.getenv('USER_EVENTS_EXCHANGE', 'user_events')
 
     # RabbitMQ
     RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
     RABBITMQ_QUEUE = 'appointments_queue'
+    # cate mesaje primeste un worker de la RabbitMQ inainte sa le confirme
+    WORKER_PREFETCH = int(os.getenv('WORKER_PREFETCH', 10))
+    # modul worker-ului: 'single' (cate un mesaj pe rand) sau 'batch' (loturi, vezi worker.procesare_lot)
+    WORKER_MODE = os.getenv('WORKER_MODE', 'single')
+    # in modul batch: cate mesaje intra maxim intr-un lot si cat astept (secunde) sa se umple
+    WORKER_BATCH_SIZE = int(os.getenv('WORKER_BATCH_SIZE', 50))
+    WORKER_BATCH_MAX_WAIT = float(os.getenv('WORKER_BATCH_MAX_WAIT', 0.5))
+
+    # exchange fanout pe care anunt doctor-service ca s-au schimbat sloturile libere ale unui doctor
+    AVAILABILITY_EXCHANGE = os.getenv('AVAILABILITY_EXCHANGE', 'availability_events')
+
+    # relay-ul care publica mesajele din outbox (outbox_relay.py)
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1))
+    # dupa atatea publicari esuate ale aceluiasi mesaj (nu si cand brokerul e oprit) mesajul e marcat failed_at
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+
+    # paginare GET /appointments (limit maxim pe pagina) si lotul pentru modul NDJSON
+    APPOINTMENTS_MAX_LIMIT = int(os.getenv('APPOINTMENTS_MAX_LIMIT', 500))
+    APPOINTMENTS_STREAM_BATCH = int(os.getenv('APPOINTMENTS_STREAM_BATCH', 200))
+
+    # reminderele (reminder.py): se programeaza la confirmare cu REMINDER_LEAD_MINUTES inainte de start, se trimit
+    # doar daca mai sunt cel putin REMINDER_MIN_LEAD_MINUTES pana la start; scheduler-ul ia cate REMINDER_BATCH_SIZE
+    # remindere scadente odata si doarme maxim REMINDER_MAX_SLEEP secunde intre verificari
+    REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 60))
+    REMINDER_MIN_LEAD_MINUTES = int(os.getenv('REMINDER_MIN_LEAD_MINUTES', 30))
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 100))
+    REMINDER_MAX_SLEEP = float(os.getenv('REMINDER_MAX_SLEEP', 60))
+
+    # sweeper-ul care marcheaza programarile terminate ca COMPLETED (sweeper.py)
+    SWEEP_INTERVAL_SECONDS = int(os.getenv('SWEEP_INTERVAL_SECONDS', 60))
+    SWEEP_BATCH_SIZE = int(os.getenv('SWEEP_BATCH_SIZE', 500))
 
     JWT_ALGORITHM = 'RS256'
 
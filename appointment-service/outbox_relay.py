@@ -0,0 +1,105 @@
+import time
+import pika
+from datetime import datetime
+from app import create_app
+from clinic_core.models import db, OutboxMessage
+from clinic_core.publisher import get_publisher
+
+app = create_app(rute=False, profil_bd='scheduler')
+
+def publicare_pe_rand(publisher, mesaje, acum):
+    """
+    Dupa un lot refuzat de broker, public mesajele pe rand ca sa gasesc mesajul (mesajele) care nu poate fi
+    publicat: celelalte se marcheaza publicate, el primeste o incercare in plus, iar dupa OUTBOX_MAX_ATTEMPTS
+    incercari primeste failed_at si relay-ul nu il mai ia (ramane in outbox pentru verificare)
+    Daca intre timp a cazut brokerul ma opresc, restul mesajelor raman pentru urmatoarea rulare
+    Intoarce cate mesaje a publicat
+    """
+    publicate = 0
+    for mesaj in mesaje:
+        try:
+            publisher.publica(mesaj.routing_key, mesaj.payload, exchange=mesaj.exchange)
+        except pika.exceptions.AMQPConnectionError as e:
+            print(f"Eroare publicare outbox {mesaj.id}, brokerul nu e disponibil: {e}")
+            break
+        except Exception as e:
+            mesaj.attempts += 1
+            if mesaj.attempts >= app.config['OUTBOX_MAX_ATTEMPTS']:
+                mesaj.failed_at = acum
+                print(f"Mesajul din outbox {mesaj.id} ({mesaj.exchange or '-'} / {mesaj.routing_key}) nu a putut fi publicat "
+                      f"dupa {mesaj.attempts} incercari, marcat failed_at si scos din relay: {e}")
+            else:
+                print(f"Eroare publicare outbox {mesaj.id} (incercarea {mesaj.attempts}): {e}")
+            continue
+
+        mesaj.published_at = acum
+        publicate += 1
+    return publicate
+
+def golire_outbox():
+    """
+    Publica in RabbitMQ mesajele din outbox care nu au fost inca publicate, in loturi de OUTBOX_BATCH_SIZE
+    Randurile lotului sunt blocate cu FOR UPDATE SKIP LOCKED, asa ca pot rula mai multe relay-uri
+    in paralel fara sa publice acelasi mesaj de doua ori. Lotul se publica cu publica_lot (o singura
+    confirmare de la broker pentru tot lotul) si e marcat publicat doar dupa ce brokerul l-a confirmat,
+    deci livrarea e at-least-once (daca relay-ul cade intre publicare si commit, lotul se publica din nou
+    la urmatoarea rulare). Un lot refuzat de broker se publica pe rand (publicare_pe_rand), ca un mesaj care
+    nu poate fi publicat sa nu blocheze la nesfarsit lotul in care se afla
+    Intoarce cate mesaje a publicat
+    """
+    with app.app_context():
+        publisher = get_publisher(app.config['RABBITMQ_HOST'])
+        lot = app.config['OUTBOX_BATCH_SIZE']
+        total = 0
+
+        while True:
+            mesaje = OutboxMessage.query.filter(OutboxMessage.published_at.is_(None),
+                OutboxMessage.failed_at.is_(None)).order_by(
+                OutboxMessage.id).limit(lot).with_for_update(skip_locked=True).all()
+
+            if not mesaje:
+                break
+
+            try:
+                # tot lotul, in ordine, cu o singura confirmare de la broker
+                publisher.publica_lot([(mesaj.routing_key, mesaj.payload, mesaj.exchange) for mesaj in mesaje])
+            except pika.exceptions.AMQPConnectionError as e:
+                # brokerul nu e disponibil, nu s-a pastrat nimic din lot, reincerc la urmatoarea rulare
+                # (nu se numara ca incercare a mesajelor, altfel o pana mai lunga le-ar marca pe toate esuate)
+                print(f"Eroare publicare lot outbox {mesaje[0].id}-{mesaje[-1].id}: {e}")
+                db.session.rollback()
+                break
+            except Exception as e:
+                # brokerul a refuzat lotul (de ex. un mesaj pe un exchange declarat cu alt tip)
+                print(f"Eroare publicare lot outbox {mesaje[0].id}-{mesaje[-1].id}, public mesajele pe rand: {e}")
+                total += publicare_pe_rand(publisher, mesaje, datetime.utcnow())
+                db.session.commit()
+                # mesajele ramase nepublicate s-ar lua din nou imediat, le reincerc la urmatoarea rulare
+                break
+
+            acum = datetime.utcnow()
+            for mesaj in mesaje:
+                mesaj.published_at = acum
+
+            db.session.commit()
+            publicate = len(mesaje)
+            total += publicate
+
+            if publicate < lot:
+                break
+
+        return total
+
+if __name__ == '__main__':
+    """
+    Golesc outbox-ul la fiecare OUTBOX_POLL_INTERVAL secunde
+    """
+    while True:
+        try:
+            publicate = golire_outbox()
+            if publicate:
+                print(f"Mesaje outbox publicate: {publicate}")
+        except Exception as e:
+            print(f"Eroare relay outbox {e}")
+
+        time.sleep(app.config['OUTBOX_POLL_INTERVAL'])
@@ -1,95 +1,179 @@
 import time
-import pika
-import json
-import os
-from datetime import datetime, timedelta,timezone
+import select
+from datetime import timedelta
+from sqlalchemy import select as sql_select, delete, insert, func, and_
+from sqlalchemy.orm import aliased
 from app import create_app
-from bd_struc_flask import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, User
+from clinic_core.models import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, User, Doctor, Specialization, Cabinet, ReminderSchedule
+from clinic_core.notificari import mesaj_notificare
+from utils.outbox import adauga_lot_in_outbox
+from utils.remindere import acum_romania
 
-app = create_app()
+app = create_app(rute=False, profil_bd='scheduler')
 
-def producator_reminder_mail_queue(data):
+# canalul pe care triggerul din migrarea 0003 anunta reminderele noi / mutate
+CANAL_REMINDERE = 'reminder_schedule'
+
+def mesaj_reminder(rand):
     """
-    Trimit mesajul in coada pentru notificari
+    Mesajul pentru notification-service, din randul intors de revendicare_remindere
     """
-    connection = None
-    try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host=os.getenv('RABBITMQ_HOST', 'rabbitmq')))
-        channel = connection.channel()
-        channel.queue_declare(queue="notifications_queue", durable=True)
-        channel.basic_publish(exchange='', routing_key="notifications_queue",
-            body=json.dumps(data),properties=pika.BasicProperties(delivery_mode=2)
-        )
+    return mesaj_notificare(
+        user_id=rand.patient_id,
+        appointment_id=rand.id,
+        patient_name=rand.full_name,
+        patient_email=rand.email,
+        status='REMINDER',
+        message=f"Reminder aveti o programare azi la ora {rand.start_time.strftime('%Y-%m-%d %H:%M')}",
+        start_time=rand.start_time,
+        end_time=rand.end_time,
+        doctor_id=rand.doctor_id,
+        doctor_name=rand.doctor_name,
+        specialization=rand.specialization,
+        cabinet_id=rand.cabinet_id,
+        cabinet=rand.cabinet,
+        location=rand.location)
+
+def revendicare_remindere(acum, lot):
+    """
+    O singura interogare pentru tot lotul: sterge (FOR UPDATE SKIP LOCKED) primele `lot` remindere scadente
+    si intoarce pentru fiecare programarea, pacientul, doctorul si cabinetul (tot ce intra in mesajul de
+    notificare) si de_trimis - programarea e inca CONFIRMED, incepe in cel putin REMINDER_MIN_LEAD_MINUTES
+    si nu are deja un eveniment REMINDER_DUE (anti-join)
+    """
+    limita_start = acum + timedelta(minutes=app.config['REMINDER_MIN_LEAD_MINUTES'])
+
+    scadente = delete(ReminderSchedule).where(ReminderSchedule.id.in_(
+        sql_select(ReminderSchedule.id).where(ReminderSchedule.due_at <= acum).order_by(ReminderSchedule.due_at)
+        .limit(lot).with_for_update(skip_locked=True)
+    )).returning(ReminderSchedule.appointment_id).cte('scadente')
+
+    trimis = sql_select(AppointmentEvent.id).where(AppointmentEvent.appointment_id == Appointment.id,
+        AppointmentEvent.event_type == EventType.REMINDER_DUE).exists()
+
+    de_trimis = and_(Appointment.status == AppointmentStatus.CONFIRMED,
+        Appointment.start_time >= limita_start, ~trimis).label('de_trimis')
+
+    medic = aliased(User)
+
+    return db.session.execute(
+        sql_select(Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.cabinet_id,
+            Appointment.status, Appointment.start_time, Appointment.end_time, User.full_name, User.email,
+            medic.full_name.label('doctor_name'), Specialization.name.label('specialization'),
+            Cabinet.name.label('cabinet'), Cabinet.location.label('location'), de_trimis)
+        .join(scadente, scadente.c.appointment_id == Appointment.id)
+        .join(User, Appointment.patient_id == User.id)
+        .outerjoin(Doctor, Appointment.doctor_id == Doctor.id)
+        .outerjoin(medic, Doctor.user_id == medic.id)
+        .outerjoin(Specialization, Doctor.specialization_id == Specialization.id)
+        .outerjoin(Cabinet, Appointment.cabinet_id == Cabinet.id)
+    ).all()
+
+def trimitere_remindere():
+    """
+    Trimite reminderele scadente (due_at <= acum) din reminder_schedule, in loturi de REMINDER_BATCH_SIZE
+    Fiecare lot e o tranzactie: revendicarea (o interogare, vezi revendicare_remindere), un INSERT cu toate
+    evenimentele REMINDER_DUE si un INSERT cu toate mesajele din outbox (le publica outbox_relay.py, tot
+    pe loturi). Cu SKIP LOCKED mai multe replici ale reminder-ului nu iau acelasi reminder, iar pentru ca
+    stergerea randurilor si evenimentele se comit impreuna reminderul se trimite o singura data, si dupa un restart
+    Intoarce cate remindere a trimis si due_at-ul urmatorului reminder (None daca nu mai e niciunul)
+    """
+    with app.app_context():
+        lot = app.config['REMINDER_BATCH_SIZE']
+        total = 0
 
-    except Exception as e:
-        print(f"Eroare reminder producator {e}")
-    finally:
-        if connection:
-            connection.close()
+        while True:
+            randuri = revendicare_remindere(acum_romania(), lot)
+
+            if not randuri:
+                db.session.rollback()
+                break
+
+            de_trimis = [rand for rand in randuri if rand.de_trimis]
+            for rand in randuri:
+                if not rand.de_trimis:
+                    print(f"Reminder sarit pentru id{rand.id} ({rand.status.value}, start {rand.start_time})")
+
+            if de_trimis:
+                # evenimentele ca sa se stie ca am trimis deja reminderul pentru aceste programari
+                db.session.execute(insert(AppointmentEvent), [
+                    {'appointment_id': rand.id, 'event_type': EventType.REMINDER_DUE,
+                     'payload': {'info': 'Notificare de  reminder trimisa'}, 'is_processed': True}
+                    for rand in de_trimis])
+                adauga_lot_in_outbox('notifications_queue', [mesaj_reminder(rand) for rand in de_trimis])
 
-def verificare_reminder():
+            db.session.commit()
+            total += len(de_trimis)
+
+            if len(randuri) < lot:
+                break
+
+        urmatorul = db.session.query(func.min(ReminderSchedule.due_at)).scalar()
+        db.session.rollback()
+        return total, urmatorul
+
+def conectare_ascultator():
     """
-    Verifica programarile care incep intr-o 1 ora si 30 de min (interval)
+    Conexiune separata de pool (ramane deschisa cat ruleaza reminder-ul) cu LISTEN pe canalul
+    reminder_schedule, ca o confirmare care programeaza un reminder mai devreme sa trezeasca scheduler-ul
+    Intoarce None daca BD-ul nu suporta LISTEN (atunci se doarme doar pana la urmatorul due_at)
     """
     with app.app_context():
-        
-        romania_timp = timezone(timedelta(hours=2))
-        now = datetime.utcnow().replace(tzinfo=timezone.utc)
-        now_romania = now.astimezone(romania_timp).replace(tzinfo=None)
-
-        start_reminder = now_romania + timedelta(minutes=30)
-        end_reminder = now_romania + timedelta(minutes=60)
-
-        # selectez programarile confirmate si care se incadreaza in ora de reminder
-        programari = db.session.query(Appointment, User).join(User, Appointment.patient_id == User.id).filter(
-            Appointment.status == AppointmentStatus.CONFIRMED,
-            Appointment.start_time >= start_reminder,
-            Appointment.start_time <= end_reminder).all()
-
-
-        for prog, user in programari:
-            # verific daca a mai fost trimisa o notificare de tip reminder pentru aceasta programare
-            trimisa = AppointmentEvent.query.filter_by(appointment_id=prog.id, event_type=EventType.REMINDER_DUE).first()
-
-            print(f"notificare trimisa pentru id{prog.id}: {trimisa is not None}")
-
-            if not trimisa:
-
-                # fac eveniment ca s-a stiu ca am trimis deja reminderul pentru aceasta programare
-                eveniment = AppointmentEvent(appointment_id=prog.id, event_type=EventType.REMINDER_DUE,
-                    payload={'info': 'Notificare de  reminder trimisa'}, is_processed=True)
-                
-                db.session.add(eveniment)
-                db.session.commit()
-
-                mesaj = {
-                    'user_id': prog.patient_id,
-                    'appointment_id': prog.id,
-                    'patient_name': user.full_name,
-                    'patient_email': user.email,
-                    'doctor_id': prog.doctor_id,
-                    'start_time': prog.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'end_time': prog.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'status': 'REMINDER',
-                    'type': 'EMAIL',
-                    'message': f"Reminder aveti o programare azi la ora {prog.start_time.strftime('%Y-%m-%d %H:%M')}"
-               }
-                producator_reminder_mail_queue(mesaj)
-
-            else:
-                print(f"Email deja trimis pentru id{prog.id}")
-                pass
+        if db.engine.dialect.name != 'postgresql':
+            return None
+
+        cargs, cparams = db.engine.dialect.create_connect_args(db.engine.url)
+        cparams['application_name'] = 'appointment-service:reminder-listen'
+        conn = db.engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL_REMINDERE}")
+        return conn
+
+def asteptare(ascultator, secunde):
+    """
+    Doarme pana trec secundele date sau pana vine un NOTIFY pe canalul reminderelor
+    Intoarce ascultatorul, sau None daca conexiunea lui a cazut (se redeschide la urmatoarea tura)
+    """
+    if ascultator is None:
+        time.sleep(secunde)
+        return None
+
+    try:
+        if select.select([ascultator], [], [], secunde)[0]:
+            ascultator.poll()
+            ascultator.notifies.clear()
+        return ascultator
+    except Exception as e:
+        print(f"Eroare ascultator remindere {e}")
+        try:
+            ascultator.close()
+        except Exception:
+            pass
+        return None
 
 if __name__ == '__main__':
     """
-    Rulez un worker-ul pentru verifica la fiecare 60 de secunde daca sunt programari
+    Trimit reminderele scadente, apoi dorm pana la urmatorul due_at (maxim REMINDER_MAX_SLEEP secunde)
+    sau pana cand o ruta programeaza un reminder nou
     """
-    time.sleep(10)
+    ascultator = None
 
     while True:
+        if ascultator is None:
+            try:
+                ascultator = conectare_ascultator()
+            except Exception as e:
+                print(f"Eroare conectare ascultator remindere {e}")
+
+        pauza = app.config['REMINDER_MAX_SLEEP']
         try:
-            verificare_reminder()
+            trimise, urmatorul = trimitere_remindere()
+            if trimise:
+                print(f"Remindere trimise: {trimise}")
+            if urmatorul is not None:
+                pauza = min(pauza, max((urmatorul - acum_romania()).total_seconds(), 0.1))
         except Exception as e:
-            print(f"Eroare verificare reminder {e}")
+            print(f"Eroare trimitere remindere {e}")
 
-        time.sleep(60)
\ No newline at end of file
+        ascultator = asteptare(ascultator, pauza)
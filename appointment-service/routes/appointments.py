@@ -1,9 +1,16 @@
-import pika
-import json
+import base64
 from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
-from bd_struc_flask import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, User, Doctor, Schedule, Cabinet
-from utils.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from clinic_core.models import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, User, Doctor, Schedule, Cabinet
+from clinic_core.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token, get_identitate
+from clinic_core.publisher import get_publisher
+from utils.outbox import adauga_in_outbox, invalidare_disponibilitate
+from utils.notificari import notificare_din_bd
+from utils.remindere import programare_reminder
+from utils.suprapuneri import este_suprapunere
 
 appointments_bp = Blueprint('appointments', __name__, url_prefix='/appointments')
 
@@ -11,55 +18,88 @@ appointments_bp = Blueprint('appointments', __name__, url_prefix='/appointments'
 
 def producator_mail_queue(data):
     """
-    Producatorul pentru emailuri
+    Producatorul pentru emailuri: mesajul se scrie in outbox in aceeasi tranzactie cu
+    modificarea programarii (trebuie apelat inainte de commit), iar outbox_relay.py il
+    publica in notifications_queue, asa ca cererea HTTP nu mai asteapta dupa RabbitMQ
     """
-    try:
-        connection = pika.BlockingConnection(
-            pika.ConnectionParameters(host=current_app.config['RABBITMQ_HOST'])
-        )
-        channel = connection.channel()
-        channel.queue_declare(queue='notifications_queue', durable=True)
-        channel.basic_publish(exchange='', routing_key='notifications_queue',
-            body=json.dumps(data), properties=pika.BasicProperties(delivery_mode=2))
-        connection.close()
-        return True
-
-    except Exception as e:
-        print(f"Eroare producator mail: {e}")
-        return False
+    adauga_in_outbox('notifications_queue', data)
 
 def producator_app_queue(message_dict):
     """
     Producatorul de programari pentru coada
     """
     try:
-        connection = pika.BlockingConnection(
-            pika.ConnectionParameters(host=current_app.config['RABBITMQ_HOST'])
-        )
-        channel = connection.channel()
-        channel.queue_declare(queue=current_app.config['RABBITMQ_QUEUE'], durable=True)
-        
         # schimbul se face fara nume si mesajele sunt redirectionate pe coada appointments_queue
         # mesajele o sa fie persistente ca sa nu le pierd, si la fel si coada
-        channel.basic_publish( exchange='', routing_key=current_app.config['RABBITMQ_QUEUE'],
-            body=json.dumps(message_dict), properties=pika.BasicProperties(delivery_mode=2)) 
-        connection.close()
+        get_publisher(current_app.config['RABBITMQ_HOST']).publica(current_app.config['RABBITMQ_QUEUE'], message_dict)
         return True
 
     except Exception as e:
         print(f"Eroare producator {e}")
         return False
 
-def programari_finalizate():
+def status_efectiv(appointment: Appointment, now):
     """
-    Functie care schimba starea programarilor care s-au finalizat in COMPLETED
+    Starea programarii asa cum o vede utilizatorul: o programare CONFIRMED care s-a terminat
+    e deja COMPLETED, chiar daca sweeper.py nu a apucat inca sa o marcheze in BD
     """
-    now = datetime.utcnow()
-    Appointment.query.filter(
-        Appointment.status == AppointmentStatus.CONFIRMED,
-        Appointment.end_time < now
-    ).update({Appointment.status: AppointmentStatus.COMPLETED})
-    db.session.commit()
+    if appointment.status == AppointmentStatus.CONFIRMED and appointment.end_time < now:
+        return AppointmentStatus.COMPLETED
+    return appointment.status
+
+def filtru_status(status, now):
+    """
+    Conditia SQL pentru starea efectiva (vezi status_efectiv), ca filtrele sa nu depinda
+    de momentul in care a rulat sweeper-ul
+    """
+    if status == AppointmentStatus.COMPLETED:
+        return or_(Appointment.status == AppointmentStatus.COMPLETED,
+            and_(Appointment.status == AppointmentStatus.CONFIRMED, Appointment.end_time < now))
+
+    if status == AppointmentStatus.CONFIRMED:
+        return and_(Appointment.status == AppointmentStatus.CONFIRMED, Appointment.end_time >= now)
+
+    return Appointment.status == status
+
+def codare_cursor(appointment: Appointment):
+    """
+    Cursorul pentru paginare e pozitia ultimei programari trimise (start_time, id),
+    codat base64 ca sa fie opac pentru client
+    """
+    valoare = f"{appointment.start_time.isoformat()}|{appointment.id}"
+    return base64.urlsafe_b64encode(valoare.encode()).decode()
+
+def decodare_cursor(cursor):
+    """
+    Intoarce (start_time, id) din cursor sau None daca cursorul e invalid
+    """
+    try:
+        start_str, id_str = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(start_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def stream_programari_ndjson(lista_programari):
+    """
+    Trimite programarile ca NDJSON (un obiect JSON pe linie) pe masura ce le citesc din BD
+    cu un cursor pe server (yield_per), fara sa tin tot rezultatul in memorie
+    Le serializez pe loturi ca sa pastrez numarul fix de query-uri pe lot (info_output_programari)
+    """
+    lot = current_app.config['APPOINTMENTS_STREAM_BATCH']
+
+    def generare():
+        programari = []
+        for a in lista_programari.yield_per(lot):
+            programari.append(a)
+            if len(programari) == lot:
+                for rand in info_output_programari(programari):
+                    yield current_app.json.dumps(rand) + '\n'
+                programari = []
+
+        for rand in info_output_programari(programari):
+            yield current_app.json.dumps(rand) + '\n'
+
+    return Response(stream_with_context(generare()), mimetype='application/x-ndjson')
 
 def info_output_programare(appointment: Appointment):
     """
@@ -68,7 +108,45 @@ def info_output_programare(appointment: Appointment):
     if not appointment:
         return {}
 
-    doctor = Doctor.query.filter_by(id=appointment.doctor_id).first()
+    return info_output_programari([appointment])[0]
+
+def info_output_programari(programari):
+    """
+    Afiseaza info pentru o lista de programari, acelasi format ca info_output_programare
+    Doctorii (cu user + specializare), pacientii si cabinetele se iau toti odata cu IN,
+    ca sa am un numar fix de query-uri indiferent cate programari afisez (nu cate unul pe programare)
+    """
+    if not programari:
+        return []
+
+    now = datetime.utcnow()
+    doctor_ids = {a.doctor_id for a in programari}
+    patient_ids = {a.patient_id for a in programari}
+    cabinet_ids = {a.cabinet_id for a in programari if a.cabinet_id}
+
+    # userul si specializarea doctorului vin in acelasi query prin join
+    doctori = {}
+    for d in Doctor.query.options(joinedload(Doctor.user), joinedload(Doctor.specialization)).filter(Doctor.id.in_(doctor_ids)):
+        doctori[d.id] = d
+
+    pacienti = {}
+    for u in User.query.filter(User.id.in_(patient_ids)):
+        pacienti[u.id] = u
+
+    cabinete = {}
+    if cabinet_ids:
+        for c in Cabinet.query.filter(Cabinet.id.in_(cabinet_ids)):
+            cabinete[c.id] = c
+
+    rez = []
+    for a in programari:
+        rez.append(serializare_programare(a, doctori.get(a.doctor_id), pacienti.get(a.patient_id), cabinete.get(a.cabinet_id), now))
+    return rez
+
+def serializare_programare(appointment: Appointment, doctor: Doctor, patient: User, cabinet: Cabinet, now):
+    """
+    Construieste dictionarul pentru o programare din obiectele deja incarcate (fara query-uri)
+    """
     doctor_info = {
         'id': doctor.id,
         'bio': doctor.bio,
@@ -78,7 +156,6 @@ def info_output_programare(appointment: Appointment):
         'full_name': doctor.user.full_name if doctor.user else None,
     }
 
-    patient = User.query.filter_by(id=appointment.patient_id).first()
     patient_info = {
         'id': patient.id,
         'full_name': patient.full_name,
@@ -86,10 +163,6 @@ def info_output_programare(appointment: Appointment):
         'phone': patient.phone
     }
 
-    cabinet = None
-    if appointment.cabinet_id:
-        cabinet = Cabinet.query.get(appointment.cabinet_id)
-    
     if cabinet:
         cabinet_info = {
             'name': cabinet.name,
@@ -105,7 +178,7 @@ def info_output_programare(appointment: Appointment):
         'cabinet': cabinet_info,
         'start_time': appointment.start_time.isoformat().replace('T', ' '),
         'end_time': appointment.end_time.isoformat().replace('T', ' '),
-        'status': appointment.status,
+        'status': status_efectiv(appointment, now),
         'notes': appointment.notes,
         'created_at': appointment.created_at.isoformat().replace('T', ' '),
         'updated_at': appointment.updated_at.isoformat().replace('T', ' ') if appointment.updated_at else None
@@ -120,11 +193,10 @@ def get_appointments():
     Afisare programari de catre ADMIN sau DOCTOR, se pot pune si filte
     in functie de doctor, pacient, ziua/zilele(o perioada de tipm pe care se afiseaza)
     staus
+    Paginare: ?limit=...&cursor=... (cursorul e next_cursor din raspunsul anterior),
+    iar cu ?format=ndjson programarile se trimit in flux, cate una pe linie
     """
 
-    # marcez inainte programarile care s-au terminat ca sunt COMPLETED
-    programari_finalizate()
-
     status = request.args.get('status')
     doctor_id = request.args.get('doctor_id')
     patient_id = request.args.get('patient_id')
@@ -135,7 +207,7 @@ def get_appointments():
     lista_programari = Appointment.query
 
     if status:
-        lista_programari = lista_programari.filter_by(status=status)
+        lista_programari = lista_programari.filter(filtru_status(status, datetime.utcnow()))
     if doctor_id:
         lista_programari = lista_programari.filter_by(doctor_id=doctor_id)
     if patient_id:
@@ -156,14 +228,35 @@ def get_appointments():
         except ValueError:
             pass
 
-    # ordonam descrescator ultima facuta e prima
-    programari = lista_programari.order_by(Appointment.start_time.desc()).all()
+    # paginare keyset pe (start_time, id): cursorul e pozitia ultimei programari de pe pagina anterioara
+    cursor = request.args.get('cursor')
+    if cursor:
+        pozitie = decodare_cursor(cursor)
+        if not pozitie:
+            return jsonify({'Eroare': 'Cursor invalid'}), 400
+        lista_programari = lista_programari.filter(tuple_(Appointment.start_time, Appointment.id) < pozitie)
 
-    rez = []
-    for a in programari:
-        rez.append(info_output_programare(a))
+    # ordonam descrescator ultima facuta e prima (id-ul departajeaza programarile cu acelasi start_time)
+    lista_programari = lista_programari.order_by(Appointment.start_time.desc(), Appointment.id.desc())
 
-    return jsonify(rez), 200
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), current_app.config['APPOINTMENTS_MAX_LIMIT'])
+        lista_programari = lista_programari.limit(limit)
+
+    if request.args.get('format') == 'ndjson':
+        return stream_programari_ndjson(lista_programari)
+
+    # fara limit si cursor raspunsul ramane lista simpla, ca inainte
+    if limit is None and not cursor:
+        return jsonify(info_output_programari(lista_programari.all())), 200
+
+    programari = lista_programari.all()
+    next_cursor = None
+    if limit is not None and len(programari) == limit:
+        next_cursor = codare_cursor(programari[-1])
+
+    return jsonify({'appointments': info_output_programari(programari), 'next_cursor': next_cursor}), 200
 
 @appointments_bp.route('/my', methods=['GET'])
 @require_auth
@@ -172,25 +265,20 @@ def get_my_active_appointments():
     Returneaza programarile active ale pacientului curent care se alfa in starea PENDING sau CONFIRMED
     """
 
-    # marcez inainte programarile care s-au terminat ca sunt COMPLETED
-    programari_finalizate()
-
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
 
     if not user:
         return jsonify({'Eroare': 'User inexistent'}), 404
 
-    status_activ = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+    # CONFIRMED dar terminate nu mai sunt active, chiar daca nu au fost inca marcate COMPLETED
+    now = datetime.utcnow()
+    status_activ = or_(Appointment.status == AppointmentStatus.PENDING, filtru_status(AppointmentStatus.CONFIRMED, now))
 
-    programari = Appointment.query.filter(Appointment.patient_id == user.id,
-        Appointment.status.in_(status_activ)).order_by(Appointment.start_time.asc()).all()
+    programari = Appointment.query.filter(Appointment.patient_id == user.user_id,
+        status_activ).order_by(Appointment.start_time.asc()).all()
 
-    rez = []
-    for a in programari:
-        rez.append(info_output_programare(a))
-
-    return jsonify(rez), 200
+    return jsonify(info_output_programari(programari)), 200
 
 @appointments_bp.route('/my/history', methods=['GET'])
 @require_auth
@@ -200,29 +288,23 @@ def get_my_history():
     filtru dupa status se poate pune
     """
 
-    # marcez inainte programarile care s-au terminat ca sunt COMPLETED
-    programari_finalizate()
-
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user: return jsonify({'Eroare': 'User inexistent'}), 404
 
     status_param = request.args.get('status')
 
-    lista_programari = Appointment.query.filter(Appointment.patient_id == user.id)
+    lista_programari = Appointment.query.filter(Appointment.patient_id == user.user_id)
     
+    now = datetime.utcnow()
     if status_param:
-        lista_programari = lista_programari.filter(Appointment.status == status_param)
+        lista_programari = lista_programari.filter(filtru_status(status_param, now))
     else:
         status_history = [AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED, AppointmentStatus.REJECTED]
-        lista_programari = lista_programari.filter(Appointment.status.in_(status_history))
+        lista_programari = lista_programari.filter(or_(*[filtru_status(st, now) for st in status_history]))
 
     programari = lista_programari.order_by(Appointment.start_time.desc()).all()
-    rez = []
-    for a in programari:
-        rez.append(info_output_programare(a))
-
-    return jsonify(rez), 200
+    return jsonify(info_output_programari(programari)), 200
 
 @appointments_bp.route('/<int:id>', methods=['GET'])
 @require_auth
@@ -233,8 +315,8 @@ def get_appointment_details(id):
     doctorul - doar daca e a lui
     admin - oricare
     """
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user: return jsonify({'Eroare': 'User inexistent'}), 404
 
         
@@ -246,15 +328,14 @@ def get_appointment_details(id):
         return jsonify(info_output_programare(programare)), 200
     
     elif user.role == 'PATIENT':
-        if programare.patient_id != user.id:
+        if programare.patient_id != user.user_id:
             return jsonify({'Eroare': 'Permisiuni insuficiente'}), 403
 
     elif user.role == 'DOCTOR':
-        doctor = Doctor.query.filter_by(user_id=user.id).first()
-        if not doctor or doctor.id != programare.doctor_id:
+        if not user.doctor_id or user.doctor_id != programare.doctor_id:
             # daca doctorul nu e nici pacient 
             # (daca e pacient si are rol de doctor il lasam sa si vada programarea de pacient)
-            if programare.patient_id != user.id:
+            if programare.patient_id != user.user_id:
                 return jsonify({'Eroare': 'Permisiuni insuficiente'}), 403
         return jsonify(info_output_programare(programare)), 200
 
@@ -275,8 +356,8 @@ def create_appointment_request():
         if i not in data:
             return jsonify({'Eroare': 'Date insuficiente, trebuie: doctor_id, start_time, end_time'}), 400
 
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user:
         return jsonify({'Eroare': 'User inexistent'}), 404
 
@@ -328,7 +409,7 @@ def create_appointment_request():
 
     # info mesaj pentru coada
     message = {
-        'patient_id': user.id,
+        'patient_id': user.user_id,
         'patient_name': user.full_name,
         'patient_email': user.email,
         'doctor_id': doctor_id,
@@ -353,22 +434,21 @@ def cancel_appointment(id):
     programare = Appointment.query.get(id)
     if not programare: return jsonify({'Eroare': 'Programare inexistenta'}), 404
 
-    if programare.status != AppointmentStatus.CONFIRMED and programare.status != AppointmentStatus.PENDING:
+    status_curent = status_efectiv(programare, datetime.utcnow())
+    if status_curent != AppointmentStatus.CONFIRMED and status_curent != AppointmentStatus.PENDING:
         return jsonify({'Eroare': 'Doar programarile in starea de PENDING sau CONFIRMED pot fi anulate'}), 400
 
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user: return jsonify({'Eroare': 'User inexistent'}), 404
 
     pacient = False
-    if programare.patient_id == user.id:
+    if programare.patient_id == user.user_id:
         pacient = True
 
-    doctor = Doctor.query.filter_by(id=programare.doctor_id).first()
     is_doctor = False
-    if doctor:
-        if doctor.user_id == user.id:
-            is_doctor = True
+    if user.doctor_id and user.doctor_id == programare.doctor_id:
+        is_doctor = True
     
     if not (pacient or is_doctor):
         return jsonify({'Eroare': 'Permisiuni insuficiente pentru anulare. Doar pacientul sau doctorul pot anula.'}), 403
@@ -384,27 +464,22 @@ def cancel_appointment(id):
         payload={'motiv': f"Programare anulata de {'pacient' if pacient else 'doctor'}"}
     )
     db.session.add(event)
+
+    # slotul se elibereaza, doctor-service trebuie sa-si invalideze cache-ul pentru ziua respectiva
+    invalidare_disponibilitate(programare.doctor_id, (programare.start_time, programare.end_time))
     
     try:
-        db.session.commit()
+        # reminderul programat la confirmare nu se mai trimite
+        programare_reminder(programare)
 
         # verific daca pacientul e in BD si trimit notificarea de anulare(email) sa fie procesata
-        user = User.query.get(programare.patient_id)
-        if user:
-            notificare_data = {
-                'user_id': programare.patient_id,
-                'appointment_id': programare.id,
-                'patient_name': user.full_name,
-                'patient_email': user.email,
-                'doctor_id': programare.doctor_id,
-                'start_time': programare.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'end_time': programare.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'CANCELLED',
-                'type': 'EMAIL',
-                'message': f"Programarea dumneavoastra a fost anulata de {'dumneavoastra' if pacient else 'catre doctor'}."
-            }
+        notificare_data = notificare_din_bd(programare, 'CANCELLED',
+            f"Programarea dumneavoastra a fost anulata de {'dumneavoastra' if pacient else 'catre doctor'}.")
+        if notificare_data:
             producator_mail_queue(notificare_data)
 
+        db.session.commit()
+
         return jsonify(info_output_programare(programare)), 200
     except Exception as e:
         db.session.rollback()
@@ -424,11 +499,10 @@ def confirm_appointment(id):
         return jsonify({'Eroare': 'Doar programarile PENDING pot fi confirmate'}), 400
 
     # verific daca doctorul care confirma cererea e cel care are programarea
-    external_id = request.user.get('external_id')
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (id, rol, profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if user.role == 'DOCTOR':
-        doctor = Doctor.query.filter_by(user_id=user.id).first()
-        if not doctor or doctor.id != programare.doctor_id:
+        if not user.doctor_id or user.doctor_id != programare.doctor_id:
             return jsonify({'Eroare': 'Permisiuni insuficiente. Doar doctorul INSUSI poate confirma.'}), 403
 
     programare.status = AppointmentStatus.CONFIRMED
@@ -442,26 +516,18 @@ def confirm_appointment(id):
     db.session.add(event)
 
     try:
-        db.session.commit()
-
-        # trimit notificarea de confirmare(email) sa fie procesata
-        user = User.query.get(programare.patient_id)
-        if user:
-            notificare_data = {
-                'user_id': programare.patient_id,
-                'appointment_id': programare.id,
-                'patient_name': user.full_name,
-                'patient_email': user.email,
-                'doctor_id': programare.doctor_id,
-                'cabinet_id': programare.cabinet_id,
-                'start_time': programare.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'end_time': programare.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'CONFIRMED',
-                'type': 'EMAIL',
-                'message': f"Programarea dumneavoastra a fost CONFIRMATA de catre medic."
-            }
+        # reminderul se programeaza acum, la start_time - REMINDER_LEAD_MINUTES (il trimite reminder.py)
+        programare_reminder(programare)
+
+        # trimit notificarea de confirmare(email) sa fie procesata, cu tot ce trebuie pentru PDF
+        # (doctor, specializare, cabinet), asa ca notification-service nu mai citeste BD-ul
+        notificare_data = notificare_din_bd(programare, 'CONFIRMED',
+            f"Programarea dumneavoastra a fost CONFIRMATA de catre medic.")
+        if notificare_data:
             producator_mail_queue(notificare_data)
 
+        db.session.commit()
+
         return jsonify(info_output_programare(programare)), 200
     except Exception as e:
         db.session.rollback()
@@ -489,6 +555,15 @@ def update_appointment(id):
     format = '%Y-%m-%d %H:%M:%S'
     str_rez = ''
     info_schimbate = []
+
+    # cabinet_id poate veni si ca text ("2"), il fac int (ca worker.normalizare_id) inainte sa modific programarea,
+    # altfel ar ajunge asa in mesajul de notificare, care cere int
+    if 'cabinet_id' in data:
+        try:
+            cabinet_id = int(data['cabinet_id']) if data['cabinet_id'] not in (None, '') else None
+        except (TypeError, ValueError):
+            return jsonify({'Eroare': 'cabinet_id trebuie sa fie un numar'}), 400
+
     # schimbare date
     if 'start_time' in data:
         programare.start_time = datetime.strptime(data['start_time'], format)
@@ -503,24 +578,14 @@ def update_appointment(id):
         info_schimbate.append(str(programare.end_time.isoformat().replace('T', ' ')))
 
     if 'cabinet_id' in data:
-        programare.cabinet_id = data['cabinet_id']
+        programare.cabinet_id = cabinet_id
         str_rez += " cabinet_id"
         info_schimbate.append('cabinet_id')
         info_schimbate.append(str(programare.cabinet_id))
 
         
-    # verific daca exista conflict cu NOUL SLOT
-    if 'start_time' in data or 'end_time' in data:
-        conflict = Appointment.query.filter(
-            Appointment.doctor_id == programare.doctor_id,
-            Appointment.id != int(id), # exclud programarea curenta
-            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
-            Appointment.start_time < programare.end_time,
-            Appointment.end_time > programare.start_time
-        ).first()
-
-        if conflict:
-            return jsonify({'Eroare': 'Noul slot e ocupat! Alege alta ora.'}), 400
+    # conflictul cu NOUL SLOT il verifica BD-ul la commit (constrangerea de excludere pe programarile
+    # active ale doctorului), asa nu poate aparea o alta programare intre verificare si salvare
 
     # actualizez data la care s-a facut actualizarea programarii
     programare.updated_at = datetime.utcnow()
@@ -539,30 +604,28 @@ def update_appointment(id):
         })
     db.session.add(event)
 
+    # se elibereaza slotul vechi si se ocupa cel nou
+    invalidare_disponibilitate(programare.doctor_id, (old_start, old_end), (programare.start_time, programare.end_time))
+
     try:
-        db.session.commit()
+        # daca programarea are reminder programat, se muta dupa noul start_time
+        programare_reminder(programare)
 
         # trimit notificarea de update(email) ca sa fie procesata
-        user = User.query.get(programare.patient_id)
-        if user:
-
-            schimbari_str = ", ".join(info_schimbate) if info_schimbate else "detalii"
-
-            notificare_data = {
-                'user_id': programare.patient_id,
-                'appointment_id': programare.id,
-                'patient_name': user.full_name,
-                'patient_email': user.email,
-                'doctor_id': programare.doctor_id,
-                'start_time': programare.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'end_time': programare.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'UPDATED',
-                'type': 'EMAIL',
-                'message': f'Programarea a fost modificata. Actualizari: {schimbari_str}.'
-            }
+        schimbari_str = ", ".join(info_schimbate) if info_schimbate else "detalii"
+        notificare_data = notificare_din_bd(programare, 'UPDATED',
+            f'Programarea a fost modificata. Actualizari: {schimbari_str}.')
+        if notificare_data:
             producator_mail_queue(notificare_data)
 
+        db.session.commit()
+
         return jsonify(info_output_programare(programare)), 200
+    except IntegrityError as e:
+        db.session.rollback()
+        if este_suprapunere(e):
+            return jsonify({'Eroare': 'Noul slot e ocupat! Alege alta ora.'}), 400
+        return jsonify({'Eroare': str(e)}), 500
     except Exception as e:
         db.session.rollback()
         return jsonify({'Eroare': str(e)}), 500
\ No newline at end of file
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
-from bd_struc_flask import db, AppointmentEvent
+from clinic_core.models import db, AppointmentEvent
 from datetime import datetime
-from utils.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token
+from clinic_core.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token
 
 events_bp = Blueprint('events', __name__, url_prefix='/events')
 
@@ -0,0 +1,50 @@
+import time
+from datetime import datetime
+from sqlalchemy import select
+from app import create_app
+from clinic_core.models import db, Appointment, AppointmentStatus
+
+app = create_app(rute=False, profil_bd='scheduler')
+
+def finalizare_programari():
+    """
+    Marcheaza ca COMPLETED programarile CONFIRMED care s-au terminat, in loturi de SWEEP_BATCH_SIZE
+    Fiecare lot e o tranzactie separata ca sa nu tin blocate multe randuri odata, iar cu
+    SKIP LOCKED sar peste randurile pe care le modifica chiar acum rutele (anulare, confirmare)
+    Intoarce cate programari a marcat
+    """
+    with app.app_context():
+        lot = app.config['SWEEP_BATCH_SIZE']
+        total = 0
+
+        while True:
+            now = datetime.utcnow()
+            ids_lot = select(Appointment.id).where(
+                Appointment.status == AppointmentStatus.CONFIRMED,
+                Appointment.end_time < now
+            ).order_by(Appointment.end_time).limit(lot).with_for_update(skip_locked=True)
+
+            marcate = Appointment.query.filter(Appointment.id.in_(ids_lot)).update(
+                {Appointment.status: AppointmentStatus.COMPLETED}, synchronize_session=False)
+            db.session.commit()
+
+            total += marcate
+            if marcate < lot:
+                break
+
+        return total
+
+if __name__ == '__main__':
+    """
+    Rulez sweeper-ul la fiecare SWEEP_INTERVAL_SECONDS, in locul rutelor de citire care faceau
+    UPDATE-ul la fiecare GET
+    """
+    while True:
+        try:
+            marcate = finalizare_programari()
+            if marcate:
+                print(f"Programari marcate COMPLETED: {marcate}")
+        except Exception as e:
+            print(f"Eroare sweeper programari finalizate {e}")
+
+        time.sleep(app.config['SWEEP_INTERVAL_SECONDS'])
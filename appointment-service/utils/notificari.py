@@ -0,0 +1,77 @@
+from collections import namedtuple
+from sqlalchemy.orm import aliased
+from clinic_core.models import db, User, Doctor, Specialization, Cabinet
+from clinic_core.notificari import mesaj_notificare
+
+# ce apare despre doctor / cabinet in email si in PDF-ul de confirmare
+DateDoctor = namedtuple('DateDoctor', ['nume', 'specializare', 'cabinet_id'])
+DateCabinet = namedtuple('DateCabinet', ['nume', 'locatie'])
+
+def date_doctori(doctor_ids):
+    """
+    doctor_id -> DateDoctor pentru toti doctorii dati, cu o singura interogare (user + specializare)
+    """
+    doctor_ids = {id for id in doctor_ids if id is not None}
+    if not doctor_ids:
+        return {}
+
+    return {id: DateDoctor(nume, specializare, cabinet_id) for id, nume, specializare, cabinet_id in
+        db.session.query(Doctor.id, User.full_name, Specialization.name, Doctor.cabinet_id)
+        .join(User, Doctor.user_id == User.id)
+        .outerjoin(Specialization, Doctor.specialization_id == Specialization.id)
+        .filter(Doctor.id.in_(doctor_ids))}
+
+def date_cabinete(cabinet_ids):
+    """
+    cabinet_id -> DateCabinet pentru toate cabinetele date, cu o singura interogare
+    """
+    cabinet_ids = {id for id in cabinet_ids if id is not None}
+    if not cabinet_ids:
+        return {}
+
+    return {id: DateCabinet(nume, locatie) for id, nume, locatie in
+        db.session.query(Cabinet.id, Cabinet.name, Cabinet.location).filter(Cabinet.id.in_(cabinet_ids))}
+
+def notificare_programare(programare, status, message, patient_name, patient_email, doctor, cabinet):
+    """
+    Mesajul pentru notification-service despre programare, cu datele doctorului (DateDoctor) si ale
+    cabinetului (DateCabinet) deja incarcate, asa ca notification-service nu mai citeste nimic din BD
+    """
+    return mesaj_notificare(
+        user_id=programare.patient_id,
+        appointment_id=programare.id,
+        patient_name=patient_name,
+        patient_email=patient_email,
+        status=status,
+        message=message,
+        start_time=programare.start_time,
+        end_time=programare.end_time,
+        doctor_id=programare.doctor_id,
+        doctor_name=doctor.nume if doctor else None,
+        specialization=doctor.specializare if doctor else None,
+        cabinet_id=programare.cabinet_id,
+        cabinet=cabinet.nume if cabinet else None,
+        location=cabinet.locatie if cabinet else None)
+
+def notificare_din_bd(programare, status, message):
+    """
+    Ca notificare_programare, pentru rutele care au doar programarea: pacientul, doctorul (cu specializarea)
+    si cabinetul se iau cu o singura interogare. None daca pacientul nu (mai) exista
+    """
+    medic = aliased(User)
+    rand = db.session.query(User.full_name, User.email, medic.full_name, Specialization.name, Cabinet.name,
+            Cabinet.location) \
+        .select_from(User) \
+        .outerjoin(Doctor, Doctor.id == programare.doctor_id) \
+        .outerjoin(medic, Doctor.user_id == medic.id) \
+        .outerjoin(Specialization, Doctor.specialization_id == Specialization.id) \
+        .outerjoin(Cabinet, Cabinet.id == programare.cabinet_id) \
+        .filter(User.id == programare.patient_id).first()
+
+    if not rand:
+        return None
+
+    nume_pacient, email_pacient, nume_doctor, specializare, nume_cabinet, locatie = rand
+    cabinet = DateCabinet(nume_cabinet, locatie) if nume_cabinet is not None else None
+    return notificare_programare(programare, status, message, nume_pacient, email_pacient,
+        DateDoctor(nume_doctor, specializare, None), cabinet)
@@ -0,0 +1,39 @@
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import insert
+from clinic_core.models import db, OutboxMessage
+
+def adauga_in_outbox(coada, data, exchange=''):
+    """
+    Adauga mesajul in outbox in sesiunea curenta, fara sa faca commit
+    Mesajul ajunge in RabbitMQ doar daca tranzactia apelantului se comite,
+    publicarea efectiva o face outbox_relay.py
+    Cu exchange dat mesajul se publica pe exchange-ul fanout, nu direct in coada
+    """
+    db.session.add(OutboxMessage(exchange=exchange, routing_key=coada, payload=data))
+
+def adauga_lot_in_outbox(coada, mesaje, exchange=''):
+    """
+    Ca adauga_in_outbox, pentru mai multe mesaje odata: un singur INSERT cu toate randurile
+    (fara commit, se publica doar daca tranzactia apelantului se comite)
+    """
+    if mesaje:
+        db.session.execute(insert(OutboxMessage),
+            [{'exchange': exchange, 'routing_key': coada, 'payload': data} for data in mesaje])
+
+def invalidare_disponibilitate(doctor_id, *intervale):
+    """
+    Anunta doctor-service ca s-au schimbat sloturile libere ale doctorului in zilele atinse de
+    intervalele (start_time, end_time) date, ca sa-si invalideze cache-ul de disponibilitate
+    Mesajul trece tot prin outbox (se publica doar daca tranzactia se comite) pe exchange-ul
+    fanout AVAILABILITY_EXCHANGE, asa ca il primeste fiecare replica doctor-service
+    """
+    zile = set()
+    for start_time, end_time in intervale:
+        zi = start_time.date()
+        while zi <= end_time.date():
+            zile.add(zi.isoformat())
+            zi += timedelta(days=1)
+
+    adauga_in_outbox('', {'doctor_id': doctor_id, 'dates': sorted(zile)},
+                     exchange=current_app.config['AVAILABILITY_EXCHANGE'])
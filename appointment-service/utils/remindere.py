@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert
+from clinic_core.models import db, ReminderSchedule, AppointmentStatus
+
+def acum_romania():
+    """
+    Ora curenta in Romania, fara fus orar, ca start_time-ul programarilor
+    """
+    romania_timp = timezone(timedelta(hours=2))
+    return datetime.now(timezone.utc).astimezone(romania_timp).replace(tzinfo=None)
+
+def programare_reminder(programare):
+    """
+    Tine reminder_schedule in acord cu programarea, in sesiunea curenta (fara commit):
+    programare CONFIRMED -> randul ei are due_at = start_time - REMINDER_LEAD_MINUTES (pus sau mutat),
+    orice alta stare -> randul se sterge, asa ca reminder.py nu mai trimite nimic
+    Se apeleaza in tranzactia care confirma / anuleaza / modifica programarea
+    """
+    if programare.status != AppointmentStatus.CONFIRMED:
+        ReminderSchedule.query.filter_by(appointment_id=programare.id).delete(synchronize_session=False)
+        return
+
+    due_at = programare.start_time - timedelta(minutes=current_app.config['REMINDER_LEAD_MINUTES'])
+    db.session.execute(insert(ReminderSchedule).values(appointment_id=programare.id, due_at=due_at)
+        .on_conflict_do_update(index_elements=['appointment_id'], set_={'due_at': due_at}))
@@ -0,0 +1,14 @@
+# numele constrangerii de excludere de pe appointments (vezi clinic_core/migrations/versions/0001_schema_initiala.py)
+CONSTRANGERE_SUPRAPUNERE = 'appointments_fara_suprapunere'
+
+def este_suprapunere(eroare):
+    """
+    Verifica daca IntegrityError-ul vine de la constrangerea care interzice programarile
+    active suprapuse la acelasi doctor (exclusion_violation, cod Postgres 23P01)
+    """
+    orig = getattr(eroare, 'orig', None)
+    if getattr(orig, 'pgcode', None) != '23P01':
+        return False
+
+    diag = getattr(orig, 'diag', None)
+    return getattr(diag, 'constraint_name', CONSTRANGERE_SUPRAPUNERE) == CONSTRANGERE_SUPRAPUNERE
@@ -2,28 +2,91 @@ import pika
 import json
 import time
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from app import create_app
-from bd_struc_flask import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, Doctor, Schedule
+from clinic_core.models import db, Appointment, AppointmentEvent, EventType, AppointmentStatus, Schedule
+from utils.outbox import adauga_in_outbox, invalidare_disponibilitate
+from utils.notificari import date_doctori, date_cabinete, notificare_programare
+from utils.suprapuneri import este_suprapunere
 
-app = create_app()
+app = create_app(rute=False, profil_bd='worker')
 
 
 def producator_mail_queue(data):
     """
     Am nevoie si aici de producatorul pentru emailuri ca sa trimit 
     emailurile atunci cand pacientul face o programare noua(inregistreaza o programarea -> PENDING)
+    Mesajul intra in outbox in aceeasi tranzactie cu programarea (apelat inainte de commit),
+    il publica outbox_relay.py
     """
-    try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host=app.config['RABBITMQ_HOST']))
-        channel = connection.channel()
-        channel.queue_declare(queue='notifications_queue', durable=True)
-        
-        channel.basic_publish( exchange='', routing_key='notifications_queue',
-            body=json.dumps(data), properties=pika.BasicProperties(delivery_mode=2))
-        connection.close()
+    adauga_in_outbox('notifications_queue', data)
+
+FORMAT_DATA = '%Y-%m-%d %H:%M:%S'
+
+def normalizare_id(data):
+    """
+    doctor_id / cabinet_id vin din JSON-ul trimis de client si pot fi si text ("3"), le fac int
+    ca sa se potriveasca cu cheile din date_doctori / date_cabinete si cu formatul notificarilor
+    """
+    data['doctor_id'] = int(data['doctor_id'])
+    if data.get('cabinet_id'):
+        data['cabinet_id'] = int(data['cabinet_id'])
+
+def creare_programare(data, start_time, end_time, cabinet_id):
+    """
+    Construiesc cererea pt slotul cerut de pacient (PENDING)
+    """
+    return Appointment(
+        patient_id=data['patient_id'],
+        doctor_id=data['doctor_id'],
+        cabinet_id=cabinet_id,
+        start_time=start_time,
+        end_time=end_time,
+        status=AppointmentStatus.PENDING,
+        notes=data.get('notes'))
+
+def creare_respingere(data, start_time, end_time):
+    """
+    Construiesc refuzul pentru o cerere care se suprapune cu alta programare (REJECTED)
+    """
+    return Appointment(
+        patient_id=data['patient_id'],
+        doctor_id=data['doctor_id'],
+        cabinet_id=None, 
+        start_time=start_time,
+        end_time=end_time,
+        status=AppointmentStatus.REJECTED,
+        notes="REJECTED: Intervalul orar selectat e deja ocupat."
+    )
 
-    except Exception as e:
-        print(f"Eroare producator mail: {e}")
+def notificare_acceptare(cerere_noua, data, doctori, cabinete):
+    """
+    Creez evenimentul CREATED si notificarea PENDING pentru o programare deja salvata (are id)
+    doctori / cabinete sunt datele de afisare deja incarcate (date_doctori / date_cabinete)
+    """
+    # creez eveniment pentru programare creata
+    event = AppointmentEvent(appointment_id=cerere_noua.id,
+        event_type=EventType.CREATED,
+        payload={'info': 'S-a creat o noua programare!'}
+    )
+    db.session.add(event)
+
+    # trimit cerere de procesare email catre workerul de notificari
+    notificare = notificare_programare(cerere_noua, 'PENDING',
+        'Cererea dvs. a fost inregistrata si asteapta sa fie confirmata de catre medic. Odata ce medicul va confirma, veti primi o alta notificare prin email.',
+        data.get('patient_name', 'Pacient'), data.get('patient_email', 'unknown@test.com'),
+        doctori.get(cerere_noua.doctor_id), cabinete.get(cerere_noua.cabinet_id))
+    producator_mail_queue(notificare)
+
+def notificare_respingere(cerere_respinsa, data, doctori):
+    """
+    Notificarea de refuz catre pacient pentru un refuz deja salvat (are id, nu are cabinet)
+    """
+    notificare = notificare_programare(cerere_respinsa, 'REJECTED',
+        'Cererea dvs. a fost refuzata, slotul este deja ocupat',
+        data.get('patient_name', 'Pacient'), data.get('patient_email', 'unknown@test.com'),
+        doctori.get(cerere_respinsa.doctor_id), None)
+    producator_mail_queue(notificare)
 
 def procesare_cerere(ch, method, properties, body):
     """
@@ -33,6 +96,7 @@ def procesare_cerere(ch, method, properties, body):
     datele sunt trimise bine, ca sa nu mai verific si aici si sa trimit cereri degeaba
     Aici mai ramane sa verific daca exista suprapuneri cu alte programari deja existente,
     adica conflict si pe urma salvez in bd daca e ok, daca nu le resping
+    Suprapunerea o detecteaza BD-ul la inserare (constrangerea appointments_fara_suprapunere)
     """
     # accesez bd
     with app.app_context():
@@ -40,95 +104,52 @@ def procesare_cerere(ch, method, properties, body):
 
         print(f"Procesez cerere pentru doctorul {data['doctor_id']} la ora {data['start_time']}")
         try:
-            format = '%Y-%m-%d %H:%M:%S'
-            start_time = datetime.strptime(data['start_time'], format)
-            end_time = datetime.strptime(data['end_time'], format)
+            start_time = datetime.strptime(data['start_time'], FORMAT_DATA)
+            end_time = datetime.strptime(data['end_time'], FORMAT_DATA)
+            normalizare_id(data)
             doctor_id = data['doctor_id']
 
-            # verific daca exista alta programare pe slotul acela care e confirmata sau in pending
-            suprapunere = Appointment.query.filter(
-                Appointment.doctor_id == doctor_id,
-                Appointment.status != AppointmentStatus.CANCELLED,
-                Appointment.status != AppointmentStatus.REJECTED,
-                Appointment.start_time < end_time,
-                Appointment.end_time > start_time).first()
+            # salvez cererea pt slotul cerut de pacient in BD (PENDING)
+            # daca nu s-a mentionat cabinetul, il iau din profilul doctorului
+            # (numele si specializarea doctorului vin in aceeasi interogare, pentru notificare)
+            doctori = date_doctori([doctor_id])
+            cabinet_id = data.get('cabinet_id')
+            if not cabinet_id:
+                cabinet_id = doctori[doctor_id].cabinet_id if doctor_id in doctori else None
+
+            # nu mai verific inainte daca slotul e liber: inserez direct, iar daca se suprapune cu alta
+            # programare PENDING/CONFIRMED a doctorului, BD-ul o refuza prin constrangerea de excludere
+            # (asa pot rula mai multe worker-e in paralel fara race conditions)
+            try:
+                with db.session.begin_nested():
+                    cerere_noua = creare_programare(data, start_time, end_time, cabinet_id)
+                    db.session.add(cerere_noua)
 
-            # conflict se suprapun cererile
-            if suprapunere:
+            except IntegrityError as e:
+                if not este_suprapunere(e):
+                    raise
+
+                # conflict se suprapun cererile
                 print(f"CONFLICT: Interval ocupat.Cererea e REJECTED.")
 
                 # salvez refuzul in BD
-                cerere_respinsa = Appointment(
-                    patient_id=data['patient_id'],
-                    doctor_id=doctor_id,
-                    cabinet_id=None, 
-                    start_time=start_time,
-                    end_time=end_time,
-                    status=AppointmentStatus.REJECTED,
-                    notes="REJECTED: Intervalul orar selectat e deja ocupat."
-                )
+                cerere_respinsa = creare_respingere(data, start_time, end_time)
                 db.session.add(cerere_respinsa)
-                db.session.commit()
+                db.session.flush()
 
                 #se trimit notificare de refuz catre pacient
-                notificare = {
-                    'user_id': cerere_respinsa.patient_id,
-                    'appointment_id': cerere_respinsa.id,
-                    'patient_name': data.get('patient_name', 'Pacient'),
-                    'patient_email': data.get('patient_email', 'unknown@test.com'),
-                    'status': 'REJECTED',
-                    'type': 'EMAIL',
-                    'message': 'Cererea dvs. a fost refuzata, slotul este deja ocupat'
-                }
-                producator_mail_queue(notificare)
+                notificare_respingere(cerere_respinsa, data, doctori)
+                db.session.commit()
 
                 # a procesat mesajul si il sterge din coada, altfel vor fi relivrate aletoriu din nou
                 ch.basic_ack(delivery_tag=method.delivery_tag)
                 return
 
-            # salvez prima cerere pt slotul cerut de pacient in BD (PENDING)
-            # daca nu s-a mentionat cabinetul, il iau din profilul doctorului
-            cabinet_id = data.get('cabinet_id')
-            if not cabinet_id:
-                doctor = Doctor.query.get(doctor_id)
-                if doctor:
-                    cabinet_id = doctor.cabinet_id
-                else:
-                    cabinet_id = None
-
-            cerere_noua = Appointment(
-                patient_id=data['patient_id'],
-                doctor_id=doctor_id,
-                cabinet_id=cabinet_id,
-                start_time=start_time,
-                end_time=end_time,
-                status=AppointmentStatus.PENDING,
-                notes=data.get('notes'))
-
-            db.session.add(cerere_noua)
-            db.session.flush()
-            
-            # creez eveniment pentru programare creata
-            event = AppointmentEvent(appointment_id=cerere_noua.id,
-                event_type=EventType.CREATED,
-                payload={'info': 'S-a creat o noua programare!'}
-            )
-            db.session.add(event)
+            notificare_acceptare(cerere_noua, data, doctori, date_cabinete([cabinet_id]))
+            invalidare_disponibilitate(doctor_id, (start_time, end_time))
             db.session.commit()
             print(f"Programare creata cu succes (ID - {cerere_noua.id})")
 
-            # trimit cerere de procesare email catre workerul de notificari
-            notificare = {
-                    'user_id': cerere_noua.patient_id,
-                    'appointment_id': cerere_noua.id,
-                    'patient_name': data.get('patient_name', 'Pacient'),
-                    'patient_email': data.get('patient_email', 'unknown@test.com'),
-                    'status': 'PENDING',
-                    'type': 'EMAIL',
-                    'message': 'Cererea dvs. a fost inregistrata si asteapta sa fie confirmata de catre medic. Odata ce medicul va confirma, veti primi o alta notificare prin email.'
-                }
-            producator_mail_queue(notificare)
-
         except Exception as e:
             print(f"Eroare: la procesarea mesajului {e}")
             db.session.rollback()
@@ -136,12 +157,130 @@ def procesare_cerere(ch, method, properties, body):
         # confirmam procesarea cererii si stergem mesajul din coada
         ch.basic_ack(delivery_tag=method.delivery_tag)
 
+def procesare_lot(ch, mesaje):
+    """
+    Modul batch: procesez dintr-o data un lot de mesaje (method, body) luate din coada
+    Cererile se grupeaza pe doctor si zi, pentru fiecare grup iau o singura data din BD intervalele
+    deja ocupate (PENDING/CONFIRMED), iar conflictele dintre cererile din lot le rezolv in memorie
+    in ordinea sosirii (prima cerere pe un slot castiga, restul sunt REJECTED)
+    Toate programarile, evenimentele si notificarile (outbox) se salveaza intr-o singura tranzactie
+    si lotul se confirma in RabbitMQ cu un singur ack (multiple=True)
+    Daca tranzactia pica (de ex. alt worker a ocupat intre timp un slot si constrangerea de excludere
+    refuza inserarea), reiau mesajele din lot pe rand cu procesare_cerere
+    """
+    lot_salvat = False
+    with app.app_context():
+        cereri = []
+        for method, body in mesaje:
+            try:
+                data = json.loads(body)
+                start_time = datetime.strptime(data['start_time'], FORMAT_DATA)
+                end_time = datetime.strptime(data['end_time'], FORMAT_DATA)
+                normalizare_id(data)
+                cereri.append((data, start_time, end_time))
+            except Exception as e:
+                print(f"Eroare: mesaj invalid in lot {e}")
+
+        try:
+            # cabinetul din profilul doctorului si datele doctorului pentru notificari,
+            # o singura interogare pentru toti doctorii din lot
+            doctori = date_doctori(data['doctor_id'] for data, _, _ in cereri)
+
+            # grupez cererile pe doctor si zi, in fiecare grup raman in ordinea sosirii
+            grupuri = {}
+            for index, (data, start_time, _) in enumerate(cereri):
+                grupuri.setdefault((data['doctor_id'], start_time.date()), []).append(index)
+
+            acceptate = [False] * len(cereri)
+            for (doctor_id, _), indecsi in grupuri.items():
+                inceput = min(cereri[i][1] for i in indecsi)
+                sfarsit = max(cereri[i][2] for i in indecsi)
+
+                # intervalele deja ocupate ale doctorului in ziua respectiva
+                ocupate = db.session.query(Appointment.start_time, Appointment.end_time).filter(
+                    Appointment.doctor_id == doctor_id,
+                    Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
+                    Appointment.start_time < sfarsit,
+                    Appointment.end_time > inceput).all()
+                ocupate = [tuple(interval) for interval in ocupate]
+
+                for i in indecsi:
+                    _, start_time, end_time = cereri[i]
+                    if not any(start < end_time and start_time < end for start, end in ocupate):
+                        acceptate[i] = True
+                        ocupate.append((start_time, end_time))
+
+            programari = []
+            for (data, start_time, end_time), acceptata in zip(cereri, acceptate):
+                if acceptata:
+                    doctor = doctori.get(data['doctor_id'])
+                    cabinet_id = data.get('cabinet_id') or (doctor.cabinet_id if doctor else None)
+                    programari.append(creare_programare(data, start_time, end_time, cabinet_id))
+                else:
+                    programari.append(creare_respingere(data, start_time, end_time))
+            db.session.add_all(programari)
+            db.session.flush()
+
+            # cabinetele programarilor acceptate, tot o singura interogare pentru tot lotul
+            cabinete = date_cabinete(programare.cabinet_id for programare in programari)
+
+            ocupate_doctori = {}
+            for programare, (data, start_time, end_time), acceptata in zip(programari, cereri, acceptate):
+                if acceptata:
+                    notificare_acceptare(programare, data, doctori, cabinete)
+                    ocupate_doctori.setdefault(data['doctor_id'], []).append((start_time, end_time))
+                else:
+                    notificare_respingere(programare, data, doctori)
+
+            # un singur mesaj de invalidare a disponibilitatii pe doctor pentru tot lotul
+            for doctor_id, intervale in ocupate_doctori.items():
+                invalidare_disponibilitate(doctor_id, *intervale)
+            db.session.commit()
+            lot_salvat = True
+
+            print(f"Lot procesat: {sum(acceptate)} programari create, {len(cereri) - sum(acceptate)} REJECTED")
+
+        except Exception as e:
+            print(f"Eroare: la procesarea lotului {e}, reiau mesajele pe rand")
+            db.session.rollback()
+
+    if lot_salvat:
+        # confirm toate mesajele din lot dintr-o data
+        ch.basic_ack(delivery_tag=mesaje[-1][0].delivery_tag, multiple=True)
+        return
+
+    for method, body in mesaje:
+        procesare_cerere(ch, method, None, body)
+
+def consumare_loturi(channel):
+    """
+    Consum mesajele in loturi: strang pana la WORKER_BATCH_SIZE mesaje, dar nu astept mai mult
+    de WORKER_BATCH_MAX_WAIT secunde de la primul mesaj din lot (sau cat coada e goala)
+    """
+    marime_lot = app.config['WORKER_BATCH_SIZE']
+    asteptare = app.config['WORKER_BATCH_MAX_WAIT']
+
+    lot = []
+    inceput_lot = None
+    for method, properties, body in channel.consume(app.config['RABBITMQ_QUEUE'], inactivity_timeout=asteptare):
+        if method is not None:
+            if not lot:
+                inceput_lot = time.monotonic()
+            lot.append((method, body))
+
+        if lot and (method is None or len(lot) >= marime_lot or time.monotonic() - inceput_lot >= asteptare):
+            procesare_lot(channel, lot)
+            lot = []
+
 def start_worker():
     """
     Se porneste consumatorul ii dau localhost-ul ca sa poata comunica cu producatorul
     Declar o coada persistenta in bd lui RabbitMQ si astept mesajele de la producator
     ca sa fie procesate, cate unu pe rand, pt asta se activeaza bucla infinita care asteapta
     si apeleaza functia de procesare pt fiecare mesaj cand il primeste
+    Pot rula mai multe worker-e pe aceeasi coada, conflictele pe acelasi doctor le rezolva
+    constrangerea de excludere din BD la inserare
+    Cu WORKER_MODE=batch mesajele se iau si se salveaza in loturi (procesare_lot)
     """
     connection = None
     while not connection:
@@ -155,7 +294,14 @@ def start_worker():
     channel = connection.channel()
     channel.queue_declare(queue=app.config['RABBITMQ_QUEUE'], durable=True)
 
-    channel.basic_qos(prefetch_count=1)
+    if app.config['WORKER_MODE'] == 'batch':
+        # prefetch-ul trebuie sa acopere un lot intreg, altfel lotul nu se umple niciodata
+        channel.basic_qos(prefetch_count=app.config['WORKER_BATCH_SIZE'])
+        print('Consumator activ (mod batch), se astapta mesajele')
+        consumare_loturi(channel)
+        return
+
+    channel.basic_qos(prefetch_count=app.config['WORKER_PREFETCH'])
     channel.basic_consume(queue=app.config['RABBITMQ_QUEUE'], on_message_callback=procesare_cerere)
     
     print('Consumator activ, se astapta mesajele')
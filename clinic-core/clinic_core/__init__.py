@@ -0,0 +1,55 @@
+"""
+Codul comun al celor patru servicii (user, doctor, appointment, notification):
+    clinic_core.models       - modelele SQLAlchemy si instanta db
+    clinic_core.bd           - setarile engine-ului si asteptarea BD-ului la pornire
+    clinic_core.auth         - verificarea tokenurilor Keycloak, require_auth / require_role, identitatea userului
+    clinic_core.publisher    - producatorul RabbitMQ cu o conexiune pe proces
+    clinic_core.instrumentare - durata si nr de interogari SQL pe cerere
+    clinic_core.notificari   - formatul (versionat) al mesajelor din notifications_queue si validarea lor
+
+Modulele se importa doar cand sunt folosite: `from clinic_core import db` incarca doar modelele,
+asa ca worker-ii si reminder-ul nu aduc dupa ei partea de auth (JWT, JWKS, decoratori de rute)
+"""
+import importlib
+
+# numele exportate direct din pachet -> modulul in care sunt definite
+exporturi = {
+    'db': 'models',
+    'UserRole': 'models',
+    'AppointmentStatus': 'models',
+    'EventType': 'models',
+    'NotificationType': 'models',
+    'NotificationStatus': 'models',
+    'User': 'models',
+    'Specialization': 'models',
+    'Cabinet': 'models',
+    'Doctor': 'models',
+    'Schedule': 'models',
+    'Appointment': 'models',
+    'AppointmentEvent': 'models',
+    'Notification': 'models',
+    'OutboxMessage': 'models',
+    'ReminderSchedule': 'models',
+    'initializare_bd': 'bd',
+    'asteptare_bd': 'bd',
+    'require_auth': 'auth',
+    'require_role': 'auth',
+    'get_identitate': 'auth',
+    'producator_modificare_user': 'auth',
+    'get_publisher': 'publisher',
+    'initializare_instrumentare': 'instrumentare',
+    'mesaj_notificare': 'notificari',
+    'validare_notificare': 'notificari',
+    'NotificareInvalida': 'notificari',
+}
+
+__all__ = list(exporturi)
+
+def __getattr__(nume):
+    if nume not in exporturi:
+        raise AttributeError(f"module 'clinic_core' has no attribute '{nume}'")
+
+    valoare = getattr(importlib.import_module(f"clinic_core.{exporturi[nume]}"), nume)
+    # dupa primul acces numele ramane in modul si nu mai trece prin __getattr__
+    globals()[nume] = valoare
+    return valoare
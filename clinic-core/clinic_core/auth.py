@@ -0,0 +1,517 @@
+from functools import wraps
+from collections import OrderedDict, namedtuple
+from flask import request, jsonify, current_app, g
+from jwt.algorithms import RSAAlgorithm
+import os
+import jwt
+import json
+import time
+import random
+import hashlib
+import threading
+import requests
+import pika
+from clinic_core.publisher import get_publisher
+
+# cheile de semnare ale realm-ului luate din JWKS, dupa kid (obiecte RSAPublicKey)
+# dictionarul se inlocuieste intreg la fiecare reimprospatare, deci citirea nu are nevoie de lock
+chei_publice = {}
+# lock-ul se tine doar cat se inlocuieste dictionarul, descarcarea JWKS-ului se face in afara lui
+chei_lock = threading.Lock()
+# pentru un kid necunoscut un singur fir descarca JWKS-ul din nou (single-flight), ceilalti asteapta rezultatul
+kid_lipsa_lock = threading.Lock()
+setari_chei = {}
+stare_chei = {'pid': None, 'ultima_descarcare': 0.0, 'ultima_inlocuire': 0.0}
+
+# tokenurile deja verificate: sha256(token) -> (exp, claims), pastrate pana la expirarea tokenului
+# ca aceeasi sesiune sa nu mai treaca prin verificarea RS256 la fiecare cerere
+tokenuri_verificate = OrderedDict()
+tokenuri_lock = threading.Lock()
+
+# identitatea userului din BD (rezolvata o data pe cerere si pastrata in g), plus un cache pe proces
+# external_id -> (expira_la, Identitate) invalidat prin evenimentele de modificare venite din user-service
+Identitate = namedtuple('Identitate', ['user_id', 'role', 'doctor_id', 'full_name', 'email'])
+identitati = OrderedDict()
+identitati_lock = threading.Lock()
+stare_identitati = {'pid': None, 'activ': False, 'generatie': 0}
+
+def parsare_jwks(jwks):
+    """
+    Din JWKS pastrez doar cheile RSA de semnare (Keycloak publica si o cheie RSA-OAEP pentru criptare)
+    """
+    chei = {}
+    for cheie in jwks.get('keys', []):
+        if cheie.get('kty') != 'RSA' or cheie.get('use', 'sig') != 'sig':
+            continue
+        chei[cheie.get('kid')] = RSAAlgorithm.from_jwk(json.dumps(cheie))
+    return chei
+
+def incarcare_snapshot(cale):
+    """
+    Copia locala a JWKS-ului, ca un proces nou sa poata verifica tokenuri fara sa astepte dupa Keycloak
+    """
+    try:
+        with open(cale) as f:
+            return parsare_jwks(json.load(f))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Copia locala a cheilor JWKS nu poate fi citita: {e}")
+        return {}
+
+def salvare_snapshot(cale, jwks):
+    # scriu intr-un fisier temporar si il redenumesc, ca alt proces sa nu citeasca un fisier pe jumatate
+    temporar = f"{cale}.{os.getpid()}.tmp"
+    with open(temporar, 'w') as f:
+        json.dump(jwks, f)
+    os.replace(temporar, cale)
+
+def descarcare_chei(kid_lipsa=None):
+    """
+    Descarca JWKS-ul realm-ului si inlocuieste cheile
+    Cu kid_lipsa (un kid necunoscut dintr-un token) descarca un singur fir la un moment dat, si nu mai descarc
+    daca alt fir a adus intre timp cheia sau daca am descarcat de curand (ca tokenurile cu kid inventat
+    sa nu bombardeze Keycloak). Cererile cu tokenuri al caror kid e cunoscut nu asteapta dupa descarcare
+    """
+    if kid_lipsa is None:
+        descarcare_jwks()
+        return
+
+    with kid_lipsa_lock:
+        if kid_lipsa in chei_publice:
+            return
+        if time.monotonic() - stare_chei['ultima_descarcare'] < setari_chei['interval_minim']:
+            return
+        descarcare_jwks()
+
+def descarcare_jwks():
+    global chei_publice
+
+    inceput = time.monotonic()
+    stare_chei['ultima_descarcare'] = inceput
+    raspuns = requests.get(setari_chei['jwks_url'], timeout=5)
+    raspuns.raise_for_status()
+
+    jwks = raspuns.json()
+    chei = parsare_jwks(jwks)
+    if not chei:
+        raise ValueError("JWKS-ul nu contine nicio cheie RSA de semnare")
+
+    with chei_lock:
+        # daca doua descarcari se suprapun (firul de fundal si un kid necunoscut) nu pun inapoi cheile mai vechi
+        if inceput < stare_chei['ultima_inlocuire']:
+            return
+        stare_chei['ultima_inlocuire'] = inceput
+        chei_publice = chei
+
+    try:
+        salvare_snapshot(setari_chei['snapshot'], jwks)
+    except OSError as e:
+        print(f"Nu s-a putut salva copia locala a cheilor JWKS: {e}")
+
+def reimprospatare_periodica():
+    """
+    Firul de fundal care reimprospateaza cheile, cu jitter ca procesele sa nu ceara toate deodata
+    daca Keycloak nu raspunde, raman cheile vechi si reincerc mai repede
+    """
+    while True:
+        try:
+            descarcare_chei()
+            pauza = setari_chei['interval']
+        except Exception as e:
+            print(f"Eroare la reimprospatarea cheilor JWKS de la Keycloak: {e}")
+            pauza = min(30, setari_chei['interval'])
+
+        time.sleep(pauza * random.uniform(0.8, 1.2))
+
+def initializare_chei(config):
+    """
+    O data pe proces (pid-ul se verifica pentru procesele create prin fork de gunicorn): incarc cheile
+    din copia locala si pornesc firul care le reimprospateaza, asa prima cerere nu asteapta dupa Keycloak
+    """
+    global chei_publice
+
+    # procesul e deja initializat (cazul obisnuit, la fiecare cerere), fara lock
+    if stare_chei['pid'] == os.getpid():
+        return
+
+    with chei_lock:
+        if stare_chei['pid'] == os.getpid():
+            return
+        stare_chei['pid'] = os.getpid()
+
+        keycloak_url = config.get('KEYCLOAK_URL', 'http://keycloak:8080')
+        realm = config.get('KEYCLOAK_REALM', 'master')
+        setari_chei.update({
+            'jwks_url': f"{keycloak_url}/realms/{realm}/protocol/openid-connect/certs",
+            'snapshot': config.get('KEYCLOAK_JWKS_SNAPSHOT', f"/tmp/keycloak_jwks_{realm}.json"),
+            'interval': config.get('KEYCLOAK_JWKS_REFRESH', 300),
+            'interval_minim': config.get('KEYCLOAK_JWKS_MIN_REFRESH', 30),
+        })
+        if not chei_publice:
+            chei_publice = incarcare_snapshot(setari_chei['snapshot'])
+
+    threading.Thread(target=reimprospatare_periodica, daemon=True).start()
+
+def get_keycloak_public_key(kid=None):
+    """
+    obtin cheia publica de la Keycloak pentru a verifica token-urile userilor,
+    cheia se alege dupa kid-ul din headerul tokenului (asa merge si rotirea cheilor in Keycloak)
+    daca kid-ul nu e cunoscut, cer din nou JWKS-ul (o singura cerere chiar daca vin mai multe deodata)
+    """
+    initializare_chei(current_app.config)
+
+    cheie = cautare_cheie(kid)
+    if cheie is None:
+        try:
+            descarcare_chei(kid_lipsa=kid or '')
+        except Exception as e:
+            current_app.logger.error(f"Eroare pentru a obtine cheile publice de la Keycloak: {e}")
+        cheie = cautare_cheie(kid)
+
+    return cheie
+
+def cautare_cheie(kid):
+    chei = chei_publice
+    # un token fara kid se poate verifica doar daca realm-ul are o singura cheie de semnare
+    if kid is None and len(chei) == 1:
+        return next(iter(chei.values()))
+    return chei.get(kid)
+
+
+def token_din_cache(cheie):
+    """
+    Intoarce claims-urile unui token deja verificat, daca nu a expirat intre timp
+    """
+    with tokenuri_lock:
+        intrare = tokenuri_verificate.get(cheie)
+        if intrare is None:
+            return None
+
+        exp, t_decodat = intrare
+        if exp <= time.time():
+            del tokenuri_verificate[cheie]
+            return None
+
+        tokenuri_verificate.move_to_end(cheie)
+        return t_decodat
+
+def salvare_token_in_cache(cheie, t_decodat):
+    """
+    Salveaza tokenul verificat pana la exp, cache-ul e limitat la AUTH_TOKEN_CACHE_SIZE intrari (LRU)
+    """
+    exp = t_decodat.get('exp')
+    if not exp:
+        return
+
+    with tokenuri_lock:
+        tokenuri_verificate[cheie] = (exp, t_decodat)
+        tokenuri_verificate.move_to_end(cheie)
+        while len(tokenuri_verificate) > current_app.config.get('AUTH_TOKEN_CACHE_SIZE', 1024):
+            tokenuri_verificate.popitem(last=False)
+
+def verify_token(token):
+    """
+    Verifica tokenul -> il imbina cu cheia publica obtinuta de la Keycloak
+    pt a vedea daca e valid sau nu
+    Un token verificat o data se tine minte (dupa hash) pana expira, semnatura acopera tot tokenul
+    deci acelasi token are mereu aceleasi claims
+    """
+    cheie = hashlib.sha256(token.encode()).hexdigest()
+    t_cache = token_din_cache(cheie)
+    if t_cache is not None:
+        return t_cache
+
+    try:
+        # cheia publica dupa kid-ul din header (headerul se citeste fara sa decodez tokenul)
+        kid = jwt.get_unverified_header(token).get('kid')
+        public_key = get_keycloak_public_key(kid)
+
+        # fara cheie tokenul nu poate fi verificat, deci e respins
+        if not public_key:
+            current_app.logger.error("Nu exista o cheie publica pentru verificare, tokenul e respins")
+            return None
+
+        # verific tokenul, algoritmul e cel dat in config 
+        t_decodat = jwt.decode(token, public_key, algorithms=['RS256'], audience=None, options={"verify_aud": False})
+        current_app.logger.debug("Token verificat cu semnatura RS256")
+
+        salvare_token_in_cache(cheie, t_decodat)
+        return t_decodat
+
+    except jwt.ExpiredSignatureError:
+
+        current_app.logger.error("Token expirat")
+        return None
+    
+    except jwt.InvalidTokenError as e:
+
+        current_app.logger.error(f"Token invalid: {e}")
+        return None
+
+
+def incarcare_identitate(external_id):
+    """
+    Userul si profilul de doctor (daca are) intr-o singura interogare
+    """
+    from clinic_core.models import db, User, Doctor
+
+    rand = db.session.query(User.id, User.role, Doctor.id, User.full_name, User.email).outerjoin(
+        Doctor, Doctor.user_id == User.id).filter(User.external_id == external_id).first()
+
+    if rand is None:
+        return None
+    return Identitate(*rand)
+
+def get_identitate():
+    """
+    Identitatea userului autentificat (user_id, rol, doctor_id, nume, email), rezolvata o singura data
+    pe cerere; intre cereri vine din cache-ul procesului cat timp e valida (IDENTITY_CACHE_TTL)
+    Intoarce None daca userul nu exista in BD
+    """
+    if 'identitate' in g:
+        return g.identitate
+
+    external_id = request.user.get('external_id')
+    identitate = None
+    with identitati_lock:
+        generatie = stare_identitati['generatie']
+        intrare = identitati.get(external_id)
+        if stare_identitati['activ'] and intrare is not None and intrare[0] > time.monotonic():
+            identitate = intrare[1]
+
+    if identitate is None:
+        identitate = incarcare_identitate(external_id)
+        # nu tin minte userii inexistenti, pot aparea oricand (register / sync-keycloak)
+        if identitate is not None:
+            salvare_identitate(external_id, identitate, generatie)
+
+    g.identitate = identitate
+    return identitate
+
+def salvare_identitate(external_id, identitate, generatie):
+    with identitati_lock:
+        # daca intre timp a venit o invalidare, rezultatul citit din BD poate fi vechi
+        if not stare_identitati['activ'] or generatie != stare_identitati['generatie']:
+            return
+
+        identitati[external_id] = (time.monotonic() + current_app.config.get('IDENTITY_CACHE_TTL', 60), identitate)
+        identitati.move_to_end(external_id)
+        while len(identitati) > current_app.config.get('IDENTITY_CACHE_MAX', 10000):
+            identitati.popitem(last=False)
+
+def invalidare_identitate(external_id=None, activ=None):
+    """
+    Sterge identitatea userului din cache (sau tot cache-ul daca external_id e None)
+    """
+    with identitati_lock:
+        stare_identitati['generatie'] += 1
+        if external_id is None:
+            identitati.clear()
+        else:
+            identitati.pop(external_id, None)
+        if activ is not None:
+            stare_identitati['activ'] = activ
+
+def producator_modificare_user(external_id):
+    """
+    Anunta toate serviciile (exchange fanout USER_EVENTS_EXCHANGE) ca s-a schimbat userul (rol, date, stergere,
+    profil de doctor), ca sa-l scoata din cache-ul de identitati, in procesul curent il scot imediat
+    Mesajul e cel citit de procesare_modificare_user; daca RabbitMQ nu e disponibil, celelalte servicii
+    se bazeaza pe TTL-ul cache-ului
+    """
+    invalidare_identitate(external_id)
+    try:
+        get_publisher(current_app.config['RABBITMQ_HOST']).publica('', {'external_id': external_id},
+            exchange=current_app.config['USER_EVENTS_EXCHANGE'])
+    except Exception as e:
+        current_app.logger.error(f"Eroare la publicarea modificarii userului {external_id}: {e}")
+
+def procesare_modificare_user(ch, method, properties, body):
+    try:
+        invalidare_identitate(json.loads(body)['external_id'])
+    except Exception as e:
+        print(f"Eroare la invalidarea identitatii {e}")
+        invalidare_identitate()
+
+def ascultare_modificari_useri(host, exchange):
+    """
+    Fiecare proces isi leaga o coada exclusiva la exchange-ul fanout cu modificarile userilor (rol, date,
+    stergere, profil de doctor), cat timp nu e conectat la RabbitMQ cache-ul de identitati nu se foloseste
+    """
+    while True:
+        try:
+            connection = pika.BlockingConnection(pika.ConnectionParameters(host=host, heartbeat=60))
+            channel = connection.channel()
+            channel.exchange_declare(exchange=exchange, exchange_type='fanout', durable=True)
+            coada = channel.queue_declare(queue='', exclusive=True).method.queue
+            channel.queue_bind(exchange=exchange, queue=coada)
+
+            invalidare_identitate(activ=True)
+            channel.basic_consume(queue=coada, on_message_callback=procesare_modificare_user, auto_ack=True)
+            channel.start_consuming()
+
+        except Exception as e:
+            print(f"Ascultatorul de modificari ale userilor s-a deconectat de la RabbitMQ {e}")
+
+        invalidare_identitate(activ=False)
+        time.sleep(5)
+
+def initializare_identitati(config):
+    """
+    Porneste o data pe proces firul care asculta modificarile userilor, cu IDENTITY_CACHE_TTL=0 cache-ul e oprit
+    """
+    with identitati_lock:
+        if stare_identitati['pid'] == os.getpid() or config.get('IDENTITY_CACHE_TTL', 60) <= 0:
+            return
+        stare_identitati['pid'] = os.getpid()
+
+    threading.Thread(target=ascultare_modificari_useri,
+                     args=(config.get('RABBITMQ_HOST', 'rabbitmq'), config.get('USER_EVENTS_EXCHANGE', 'user_events')),
+                     daemon=True).start()
+
+
+def get_token_from_header():
+    """
+    Extragem tokenul din hederul HTTP -> arata asa: Bearer token
+    """
+
+    header_autentificare = request.headers.get('Authorization')
+
+    if not header_autentificare:
+        return None
+    
+    header_s = header_autentificare.split()
+
+    if len(header_s) != 2 or header_s[0].lower() != 'bearer':
+        return None
+    
+    return header_s[1]
+
+def get_user_info_from_token(token):
+    """
+    Extrag informatiile userului din token sub forma de dictionar
+    """
+    if not token:
+        return None
+
+    # il verificam
+    t_ok = verify_token(token)
+
+    if not t_ok:
+        return None
+
+    return {
+        'external_id': t_ok.get('sub'),
+        'email': t_ok.get('email', ''),
+        'full_name': t_ok.get('name', ''),
+        'roles': t_ok.get('realm_access', {}).get('roles', [])
+    }
+
+
+def require_auth(f):
+    """
+    Decorator: este nevoie sa fie autentificat pt a apela anumite cereri( cum ar fi profilul)
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+
+        token = get_token_from_header()
+
+        if not token:
+            return jsonify({'Eroare': 'Nu exista token'}), 401
+        
+        user_info = get_user_info_from_token(token)
+
+        if not user_info:
+            return jsonify({'Eroare': 'Token invalid sau expirat'}), 401
+        
+        request.user = user_info # adaugam informatiile userului in request
+
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+def require_role(*roluri):
+    """
+    Decorator:se verifica rolul, pt BD inainte de a permite accesul la o ruta
+    important pentru ADMIN
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # extragem tokenul
+            token = get_token_from_header() 
+
+            if not token:
+                return jsonify({'Eroare': 'Nu exista token'}), 401
+
+            # extragem info user daca tokenul e valid
+            user_info = get_user_info_from_token(token)
+
+            if not user_info:
+                return jsonify({'Eroare': 'Token invalid sau expirat'}), 401
+
+            request.user = user_info # adaugam info user in request
+
+            # verificam rolul din BD (identitatea se rezolva o data si o refolosesc si in ruta)
+            identitate = get_identitate()
+
+            if not identitate:
+                return jsonify({'Eroare': 'Nu exista utilizatorul in BD'}), 404
+
+            roluri_cerute = []
+            for r in roluri:
+                roluri_cerute.append(r.upper())
+
+            rol_user = identitate.role.value.upper()
+            
+            if rol_user not in roluri_cerute:
+                return jsonify({'Eroare': 'Permisiuni insuficiente'}), 403
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
+if __name__ == '__main__':
+    """
+    Benchmark: costul verificarii unui token pe cerere, cu o cheie RSA generata local (fara Keycloak)
+    varianta veche (decodare fara verificare + cheia PEM parsata din nou + verificare RS256 la fiecare cerere)
+    fata de verify_token cu cheia parsata o data, la primul token (cache gol) si la tokenurile deja verificate
+    python -m clinic_core.auth
+    """
+    import timeit
+    from flask import Flask
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    cheie_privata = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem_public = cheie_privata.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+    token = jwt.encode({'sub': 'benchmark', 'exp': int(time.time()) + 3600, 'realm_access': {'roles': ['PATIENT']}},
+                       cheie_privata, algorithm='RS256', headers={'kid': 'benchmark'})
+
+    # cheia deja "descarcata", fara firul de reimprospatare (stare_chei marcata pentru procesul curent)
+    chei_publice = {'benchmark': serialization.load_pem_public_key(pem_public.encode())}
+    stare_chei['pid'] = os.getpid()
+    app = Flask(__name__)
+
+    def varianta_veche():
+        jwt.decode(token, options={'verify_signature': False})
+        cheie = serialization.load_pem_public_key(pem_public.encode())
+        return jwt.decode(token, cheie, algorithms=['RS256'], options={'verify_aud': False})
+
+    def fara_cache():
+        tokenuri_verificate.clear()
+        return verify_token(token)
+
+    n = 2000
+    with app.app_context():
+        assert varianta_veche() == fara_cache() == verify_token(token)
+        for nume, functie in (('varianta veche', varianta_veche), ('verify_token, token nou', fara_cache),
+                              ('verify_token, token din cache', lambda: verify_token(token))):
+            durata = timeit.timeit(functie, number=n) / n
+            print(f"{nume}: {durata * 1e6:.1f} us / cerere")
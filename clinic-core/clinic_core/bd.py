@@ -0,0 +1,120 @@
+import time
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from clinic_core.models import db
+
+# revizia Alembic (clinic_core/migrations/versions) la care trebuie sa fie BD-ul ca serviciile sa porneasca
+REVIZIE_SCHEMA = '0004'
+
+# profilurile de pool pe tipul procesului, ca suma conexiunilor din toate replicile sa ramana sub
+# max_connections din Postgres (formula de dimensionare e in README)
+#   web       - un proces gunicorn / Flask, o cerere pe rand pe fiecare fir
+#   worker    - consumatorii RabbitMQ (appointment-worker, notification-worker)
+#   scheduler - buclele periodice (reminder, sweeper, outbox relay), o singura conexiune ajunge
+PROFILURI_POOL = {
+    'web':       {'pool_size': 2, 'max_overflow': 2, 'pool_timeout': 10, 'statement_timeout': 15000},
+    'worker':    {'pool_size': 1, 'max_overflow': 1, 'pool_timeout': 30, 'statement_timeout': 30000},
+    'scheduler': {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 30, 'statement_timeout': 60000},
+}
+
+def setare(config, cheie, implicit, tip=int):
+    """
+    Valoarea din config (venita din env) daca e completata, altfel cea din profil
+    """
+    valoare = config.get(cheie)
+    if valoare is None or valoare == '':
+        return implicit
+    if tip is bool:
+        return str(valoare).lower() in ('1', 'true', 'yes')
+    return tip(valoare)
+
+def optiuni_engine(config, serviciu, profil='web'):
+    """
+    Setarile engine-ului SQLAlchemy pentru profilul procesului, suprascrise de DB_* din config:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS (0 = fara limita) si DB_APPLICATION_NAME (implicit serviciu:profil,
+    ca in pg_stat_activity sa se vada cine tine conexiunile)
+    Cu DB_PGBOUNCER=1 nu se mai trimit parametri de sesiune la conectare (PgBouncer in modul
+    transaction ii refuza / i-ar lasa pe conexiunea altui client), statement_timeout se pune cu
+    SET LOCAL la inceputul fiecarei tranzactii (vezi initializare_bd), iar pentru psycopg 3
+    se opresc prepared statements pe server
+    """
+    optiuni = {
+        # conexiunile mai vechi de atat se redeschid (PgBouncer / firewall-urile inchid conexiunile inactive)
+        'pool_recycle': setare(config, 'DB_POOL_RECYCLE', 1800),
+        # testeaza conexiunea luata din pool, ca o conexiune inchisa de Postgres intre timp
+        # sa nu ajunga la prima interogare a unei cereri
+        'pool_pre_ping': setare(config, 'DB_POOL_PRE_PING', True, bool),
+    }
+    uri = config.get('SQLALCHEMY_DATABASE_URI', '')
+    if not uri.startswith('postgresql'):
+        return optiuni
+
+    baza = PROFILURI_POOL[profil]
+    optiuni['pool_size'] = setare(config, 'DB_POOL_SIZE', baza['pool_size'])
+    optiuni['max_overflow'] = setare(config, 'DB_MAX_OVERFLOW', baza['max_overflow'])
+    optiuni['pool_timeout'] = setare(config, 'DB_POOL_TIMEOUT', baza['pool_timeout'])
+
+    connect_args = {'application_name': setare(config, 'DB_APPLICATION_NAME', f"{serviciu}:{profil}", str)}
+    pgbouncer = setare(config, 'DB_PGBOUNCER', False, bool)
+    ms = timeout_interogare(config, profil)
+    if not pgbouncer and ms > 0:
+        connect_args['options'] = f"-c statement_timeout={ms}"
+    if pgbouncer and uri.startswith('postgresql+psycopg:'):
+        connect_args['prepare_threshold'] = None
+
+    optiuni['connect_args'] = connect_args
+    return optiuni
+
+def timeout_interogare(config, profil):
+    # statement_timeout in ms pentru profil, 0 = fara limita
+    return setare(config, 'DB_STATEMENT_TIMEOUT_MS', PROFILURI_POOL[profil]['statement_timeout'])
+
+def timeout_pe_tranzactie(ms):
+    def setare_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+    return setare_timeout
+
+def initializare_bd(app, serviciu, profil='web'):
+    """
+    Leaga SQLAlchemy la aplicatie cu profilul de pool al procesului (daca serviciul nu si-a pus
+    direct SQLALCHEMY_ENGINE_OPTIONS in config)
+    """
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', optiuni_engine(app.config, serviciu, profil))
+    db.init_app(app)
+
+    ms = timeout_interogare(app.config, profil)
+    if setare(app.config, 'DB_PGBOUNCER', False, bool) and ms > 0:
+        with app.app_context():
+            event.listen(db.engine, 'begin', timeout_pe_tranzactie(ms))
+
+def asteptare_bd(app, serviciu):
+    """
+    Verificarea de pornire: BD-ul raspunde si schema e cel putin la REVIZIE_SCHEMA
+    Schema o aplica doar jobul de migrare (python -m clinic_core.migrare), serviciile nu fac DDL,
+    doar asteapta (o interogare pe secunda, maxim DB_READY_TIMEOUT secunde) sa termine migrarea
+    Reviziile sunt numere cu 4 cifre, deci se pot compara ca text: o replica veche porneste si
+    dupa ce o versiune noua a adaugat migrari
+    """
+    timeout = setare(app.config, 'DB_READY_TIMEOUT', 60)
+    limita = time.monotonic() + timeout
+
+    with app.app_context():
+        while True:
+            try:
+                with db.engine.connect() as conn:
+                    revizie = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+                if revizie is not None and revizie >= REVIZIE_SCHEMA:
+                    print(f"{serviciu}: BD pregatit (schema la revizia {revizie})")
+                    return
+                motiv = f"schema la revizia {revizie}, astept {REVIZIE_SCHEMA}"
+
+            except (OperationalError, ProgrammingError) as e:
+                # BD-ul nu accepta inca conexiuni sau tabela alembic_version nu exista inca
+                motiv = e.__class__.__name__
+
+            if time.monotonic() >= limita:
+                raise RuntimeError(f"{serviciu}: BD nu e pregatit dupa {timeout} secunde ({motiv})")
+
+            print(f"{serviciu}: BD nu e pregatit ({motiv}), reincerc")
+            time.sleep(1)
@@ -0,0 +1,46 @@
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ascultator_interogari = False
+
+def numarare_interogare(conn, cursor, statement, parameters, context, executemany):
+    # interogarile facute in afara unei cereri (workeri, fire din fundal) nu se numara
+    if has_request_context() and 'inceput_cerere' in g:
+        g.nr_interogari = g.get('nr_interogari', 0) + 1
+
+def initializare_instrumentare(app):
+    """
+    Masoara fiecare cerere: durata si cate interogari SQL a facut
+    Cererile mai lente de SLOW_REQUEST_MS (0 = oprit) se scriu in log, ca sa se vada rutele care
+    fac prea multe interogari sau asteapta prea mult dupa BD
+    """
+    global ascultator_interogari
+
+    prag = app.config.get('SLOW_REQUEST_MS', 1000)
+    if prag <= 0:
+        return
+
+    # un singur ascultator pe proces, pentru toate engine-urile
+    if not ascultator_interogari:
+        event.listen(Engine, 'before_cursor_execute', numarare_interogare)
+        ascultator_interogari = True
+
+    @app.before_request
+    def pornire_cronometru():
+        g.inceput_cerere = time.perf_counter()
+        g.nr_interogari = 0
+
+    @app.after_request
+    def oprire_cronometru(response):
+        if 'inceput_cerere' not in g:
+            return response
+
+        durata = (time.perf_counter() - g.inceput_cerere) * 1000
+        # nr de interogari si in raspuns, ca testele sa poata verifica ca o ruta nu face cate o interogare pe rand
+        response.headers['X-Nr-Interogari'] = str(g.nr_interogari)
+        if durata >= prag:
+            app.logger.warning(f"Cerere lenta {request.method} {request.path} -> {response.status_code}: "
+                               f"{durata:.0f} ms, {g.nr_interogari} interogari SQL")
+        return response
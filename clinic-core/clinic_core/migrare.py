@@ -0,0 +1,52 @@
+"""
+Jobul de migrare: aplica lantul Alembic din clinic_core/migrations pana la ultima revizie
+Ruleaza o singura data, inainte de servicii (serviciul `migrate` din docker-compose), cu DATABASE_URL din env:
+    python -m clinic_core.migrare
+Serviciile nu mai fac DDL la pornire, doar asteapta ca BD-ul sa fie la REVIZIE_SCHEMA (clinic_core.bd)
+"""
+import os
+import time
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, pool
+from sqlalchemy.exc import OperationalError
+from clinic_core.bd import REVIZIE_SCHEMA
+
+def configurare_alembic(url):
+    config = Config()
+    config.set_main_option('script_location', 'clinic_core:migrations')
+    # ConfigParser interpreteaza %, parola din URL poate sa il contina
+    config.set_main_option('sqlalchemy.url', url.replace('%', '%%'))
+    return config
+
+def asteptare_postgres(url, max_retries=30):
+    """
+    La prima pornire Postgres poate sa nu accepte inca conexiuni, jobul e singurul care asteapta pe el
+    """
+    engine = create_engine(url, poolclass=pool.NullPool)
+    for attempt in range(max_retries):
+        try:
+            with engine.connect():
+                return
+        except OperationalError as e:
+            if attempt == max_retries - 1:
+                raise e
+            print(f"migrare: BD nu este gata... -> Incercarea {attempt + 1}/{max_retries}")
+            time.sleep(2)
+
+def main():
+    url = os.getenv('DATABASE_URL', 'postgresql://scd:scd@db:5432/clinica')
+    config = configurare_alembic(url)
+
+    # serviciile asteapta REVIZIE_SCHEMA, daca s-a adaugat o migrare noua trebuie actualizata si constanta
+    head = ScriptDirectory.from_config(config).get_current_head()
+    if head != REVIZIE_SCHEMA:
+        raise SystemExit(f"migrare: ultima revizie e {head}, dar clinic_core.bd.REVIZIE_SCHEMA = {REVIZIE_SCHEMA}")
+
+    asteptare_postgres(url)
+    command.upgrade(config, 'head')
+    print(f"migrare: schema BD-ului e la revizia {head}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import os
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+from clinic_core.models import db
+
+config = context.config
+if config.config_file_name:
+    fileConfig(config.config_file_name)
+
+# modelele raman referinta pentru `alembic revision --autogenerate`
+target_metadata = db.metadata
+
+# lock pe BD ca doua joburi de migrare pornite in acelasi timp (de ex. swarm care reporneste task-ul)
+# sa nu aplice aceeasi revizie de doua ori
+CHEIE_LOCK_MIGRARE = 4242001
+
+def url_bd():
+    return config.get_main_option('sqlalchemy.url') or os.getenv('DATABASE_URL', 'postgresql://scd:scd@db:5432/clinica')
+
+def run_migrations_offline():
+    """
+    alembic upgrade head --sql: scrie SQL-ul migrarilor fara sa se conecteze la BD
+    """
+    context.configure(url=url_bd(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    engine = create_engine(url_bd(), poolclass=pool.NullPool)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:cheie)"), {'cheie': CHEIE_LOCK_MIGRARE})
+        connection.commit()
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:cheie)"), {'cheie': CHEIE_LOCK_MIGRARE})
+            connection.commit()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
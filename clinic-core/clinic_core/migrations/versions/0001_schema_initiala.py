@@ -1,5 +1,24 @@
+"""schema initiala: tabelele, constrangerea de excludere, indecsii de baza si datele initiale
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Continutul fostului db/1-init-bd.sql, scris cu IF NOT EXISTS / ON CONFLICT ca upgrade-ul sa mearga
+si pe un BD creat inainte de Alembic (atunci doar se inregistreaza revizia)
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SCHEMA = """
 -- extensie pentru UUID Keycloak
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- extensie pentru constrangerea de excludere pe programari (= pe doctor_id intr-un index GiST)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 -- utilizatori
 CREATE TABLE IF NOT EXISTS users (
@@ -63,7 +82,12 @@ CREATE TABLE IF NOT EXISTS appointments (
     status VARCHAR(50) DEFAULT 'PENDING' NOT NULL,
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- intervalul programarii [start_time, end_time), calculat de BD
+    time_range TSRANGE GENERATED ALWAYS AS (tsrange(start_time, end_time)) STORED,
+    -- un doctor nu poate avea doua programari active (PENDING/CONFIRMED) care se suprapun
+    CONSTRAINT appointments_fara_suprapunere EXCLUDE USING gist (doctor_id WITH =, time_range WITH &&)
+        WHERE (status IN ('PENDING', 'CONFIRMED'))
 );
 
 -- evenimente programari
@@ -88,10 +112,24 @@ CREATE TABLE IF NOT EXISTS notifications (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- outbox: mesajele pentru RabbitMQ scrise in aceeasi tranzactie cu programarea (le publica outbox_relay.py)
+CREATE TABLE IF NOT EXISTS outbox (
+    id SERIAL PRIMARY KEY,
+    exchange VARCHAR(100) DEFAULT '' NOT NULL,
+    routing_key VARCHAR(255) NOT NULL,
+    payload JSONB NOT NULL,
+    attempts INTEGER DEFAULT 0 NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    published_at TIMESTAMP
+);
+
 -- indecsi pt a gasi mai repede informatia pe coloanele pe care o sa le folosesc cel mai des
 CREATE INDEX IF NOT EXISTS idx_users_external_id ON users(external_id);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_outbox_nepublicate ON outbox(id) WHERE published_at IS NULL;
+"""
 
+DATE_INITIALE = """
 -- date initiale pt specializarile doctorilor
 INSERT INTO specializations (name, description) VALUES
 ('Cardiologie', 'Specializarea care se ocupa cu diagnosticarea, tratamentul bolilor cardiovasculare'),
@@ -109,4 +147,17 @@ INSERT INTO cabinets (name, floor, location) VALUES
 ('Cabinet 201', 2, 'Etaj 2, Aripa Dreapta'),
 ('Cabinet 202', 2, 'Etaj 2, Aripa Dreapta'),
 ('Cabinet 301', 3, 'Etaj 3, Primul din fata scarilor')
-ON CONFLICT DO NOTHING;
\ No newline at end of file
+ON CONFLICT DO NOTHING;
+"""
+
+
+def upgrade():
+    op.execute(SCHEMA)
+    op.execute(DATE_INITIALE)
+
+
+def downgrade():
+    op.execute("""
+    DROP TABLE IF EXISTS outbox, notifications, appointment_events, appointments, schedules,
+        doctors, cabinets, specializations, users CASCADE;
+    """)
@@ -0,0 +1,70 @@
+"""indecsii pe filtrele folosite de rute, worker, reminder si sweeper
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Fostul db/2-indecsi.sql, plus indecsii declarati cu index=True in modele (start_time, is_processed)
+care pana acum apareau doar cand user-service facea create_all
+Indecsii se creeaza CONCURRENTLY, in afara tranzactiei migrarii, ca sa nu blocheze scrierile
+cand migrarea ruleaza pe un BD cu date
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDECSI = [
+    # programarile unui doctor pe status si interval (sloturi libere, GET /availability, lista de programari)
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_doctor_status_start
+        ON appointments(doctor_id, status, start_time)""",
+    # doar programarile active ale doctorului: verificarea suprapunerilor din worker
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_doctor_active
+        ON appointments(doctor_id, start_time) INCLUDE (end_time)
+        WHERE status IN ('PENDING', 'CONFIRMED')""",
+    # programarile unui pacient: /appointments/my/history si filtrele pe status
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_patient_status_start
+        ON appointments(patient_id, status, start_time)""",
+    # doar programarile active ale pacientului: /appointments/my
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_patient_active
+        ON appointments(patient_id, start_time)
+        WHERE status IN ('PENDING', 'CONFIRMED')""",
+    # programarile confirmate: fereastra de reminder (start_time) si sweeper-ul (end_time)
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_confirmed_start
+        ON appointments(start_time) WHERE status = 'CONFIRMED'""",
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointments_confirmed_end
+        ON appointments(end_time) WHERE status = 'CONFIRMED'""",
+    # reminder-ul verifica daca programarea are deja evenimentul REMINDER_DUE
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_appointment_events_appointment_type
+        ON appointment_events(appointment_id, event_type)""",
+    # notificarile unui user (cele mai noi primele) si ale unei programari
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_user_created
+        ON notifications(user_id, created_at)""",
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_appointment
+        ON notifications(appointment_id)""",
+    # programul de lucru al unui doctor intr-o zi a saptamanii
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_schedules_doctor_weekday
+        ON schedules(doctor_id, weekday)""",
+    # declarati in modele cu index=True (lista de programari ordonata dupa start_time, evenimentele neprocesate)
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointments_start_time ON appointments(start_time)""",
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointment_events_is_processed ON appointment_events(is_processed)""",
+]
+
+
+def nume_index(instructiune):
+    return instructiune.split('IF NOT EXISTS')[1].split()[0]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for instructiune in INDECSI:
+            op.execute(instructiune)
+        op.execute("ANALYZE appointments, appointment_events, notifications, schedules")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for instructiune in INDECSI:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nume_index(instructiune)}")
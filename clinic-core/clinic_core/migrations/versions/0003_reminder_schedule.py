@@ -0,0 +1,73 @@
+"""reminder_schedule: reminderele programate la confirmare, consumate de reminder.py la due_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Un rand pe programare confirmata, cu due_at = start_time - REMINDER_LEAD_MINUTES (ora locala, ca start_time)
+Triggerul anunta pe canalul reminder_schedule (NOTIFY) fiecare rand nou / mutat, ca scheduler-ul
+sa se trezeasca inainte de pauza planificata daca reminderul nou e mai devreme
+Programarile confirmate care inca nu au primit reminderul se trec in tabela la upgrade, cu acelasi
+REMINDER_LEAD_MINUTES ca appointment-service (citit din mediul jobului de migrare, implicit 60)
+"""
+import os
+import sqlalchemy as sa
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminder_schedule (
+    id SERIAL PRIMARY KEY,
+    appointment_id INTEGER UNIQUE NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
+    due_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_reminder_schedule_due_at ON reminder_schedule(due_at);
+
+CREATE OR REPLACE FUNCTION notificare_reminder_schedule() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('reminder_schedule', NEW.due_at::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reminder_schedule_notificare ON reminder_schedule;
+CREATE TRIGGER reminder_schedule_notificare
+    AFTER INSERT OR UPDATE OF due_at ON reminder_schedule
+    FOR EACH ROW EXECUTE FUNCTION notificare_reminder_schedule();
+"""
+
+# lead-ul din appointment-service (config.py), jobul de migrare trebuie sa primeasca aceeasi valoare
+REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 60))
+
+# programarile confirmate din viitor fara eveniment REMINDER_DUE, cu due_at = start_time - REMINDER_LEAD_MINUTES
+# LOCALTIMESTAMP e in fusul sesiunii (UTC), deci mai intra si cateva programari deja incepute,
+# pe care reminder.py le sare (trimite doar daca mai sunt cel putin REMINDER_MIN_LEAD_MINUTES pana la start)
+PROGRAMARI_EXISTENTE = """
+INSERT INTO reminder_schedule (appointment_id, due_at)
+SELECT a.id, a.start_time - make_interval(mins => :lead)
+FROM appointments a
+WHERE a.status = 'CONFIRMED'
+  AND a.start_time > LOCALTIMESTAMP
+  AND NOT EXISTS (
+      SELECT 1 FROM appointment_events e
+      WHERE e.appointment_id = a.id AND e.event_type = 'REMINDER_DUE')
+ON CONFLICT (appointment_id) DO NOTHING;
+"""
+
+
+def upgrade():
+    op.execute(SCHEMA)
+    op.execute(sa.text(PROGRAMARI_EXISTENTE).bindparams(lead=REMINDER_LEAD_MINUTES))
+
+
+def downgrade():
+    op.execute("""
+    DROP TABLE IF EXISTS reminder_schedule;
+    DROP FUNCTION IF EXISTS notificare_reminder_schedule();
+    """)
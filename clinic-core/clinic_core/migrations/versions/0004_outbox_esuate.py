@@ -0,0 +1,33 @@
+"""outbox.failed_at: mesajele pe care relay-ul a renuntat sa le mai publice
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Un mesaj care pica la publicare de OUTBOX_MAX_ATTEMPTS ori (de ex. exchange declarat cu alt tip) primeste
+failed_at si nu mai e luat de outbox_relay.py, ca sa nu blocheze loturile la fiecare rulare. Randul ramane
+in tabela (payload, attempts) ca sa poata fi verificat si republicat manual (failed_at = NULL)
+Indexul partial pe mesajele de publicat exclude si mesajele esuate
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    ALTER TABLE outbox ADD COLUMN IF NOT EXISTS failed_at TIMESTAMP;
+    DROP INDEX IF EXISTS idx_outbox_nepublicate;
+    CREATE INDEX IF NOT EXISTS idx_outbox_nepublicate ON outbox(id) WHERE published_at IS NULL AND failed_at IS NULL;
+    """)
+
+
+def downgrade():
+    op.execute("""
+    DROP INDEX IF EXISTS idx_outbox_nepublicate;
+    ALTER TABLE outbox DROP COLUMN IF EXISTS failed_at;
+    CREATE INDEX IF NOT EXISTS idx_outbox_nepublicate ON outbox(id) WHERE published_at IS NULL;
+    """)
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import TSRANGE, ExcludeConstraint
 from datetime import datetime
 from enum import Enum
 
@@ -148,6 +149,8 @@ class Schedule(db.Model):
     # verificam ca weekday sa fie intre 0 si 6
     __table_args__ = (
         db.CheckConstraint('weekday >= 0 AND weekday <= 6', name='valid_weekday'),
+        # programul doctorului intr-o zi (sloturi libere, adaugare program)
+        db.Index('idx_schedules_doctor_weekday', 'doctor_id', 'weekday'),
     )
 
     def to_dict(self):
@@ -174,6 +177,23 @@ class Appointment(db.Model):
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # intervalul [start_time, end_time) il calculeaza BD-ul, nu se scrie din aplicatie
+    time_range = db.Column(TSRANGE, db.Computed('tsrange(start_time, end_time)'))
+
+    # BD-ul refuza doua programari active (PENDING/CONFIRMED) suprapuse la acelasi doctor
+    # indecsii sunt cei din migrarea 0002 (clinic_core/migrations/versions/0002_indecsi.py) (filtrele rutelor, worker-ului, reminder-ului si sweeper-ului)
+    __table_args__ = (
+        ExcludeConstraint(('doctor_id', '='), ('time_range', '&&'), name='appointments_fara_suprapunere',
+            using='gist', where=db.text("status IN ('PENDING', 'CONFIRMED')")),
+        db.Index('idx_appointments_doctor_status_start', 'doctor_id', 'status', 'start_time'),
+        db.Index('idx_appointments_doctor_active', 'doctor_id', 'start_time', postgresql_include=['end_time'],
+            postgresql_where=db.text("status IN ('PENDING', 'CONFIRMED')")),
+        db.Index('idx_appointments_patient_status_start', 'patient_id', 'status', 'start_time'),
+        db.Index('idx_appointments_patient_active', 'patient_id', 'start_time',
+            postgresql_where=db.text("status IN ('PENDING', 'CONFIRMED')")),
+        db.Index('idx_appointments_confirmed_start', 'start_time', postgresql_where=db.text("status = 'CONFIRMED'")),
+        db.Index('idx_appointments_confirmed_end', 'end_time', postgresql_where=db.text("status = 'CONFIRMED'")),
+    )
 
     # daca sterg o programare, sterg si evenimentele asociate prin cascade
     events = db.relationship('AppointmentEvent', backref='appointment', lazy='dynamic', cascade='all, delete-orphan')
@@ -204,6 +224,11 @@ class AppointmentEvent(db.Model):
     is_processed = db.Column(db.Boolean, default=False, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # reminder-ul cauta evenimentul REMINDER_DUE al unei programari
+    __table_args__ = (
+        db.Index('idx_appointment_events_appointment_type', 'appointment_id', 'event_type'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -227,6 +252,12 @@ class Notification(db.Model):
     sent_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # notificarile unui user (cele mai noi primele) si ale unei programari
+    __table_args__ = (
+        db.Index('idx_notifications_user_created', 'user_id', 'created_at'),
+        db.Index('idx_notifications_appointment', 'appointment_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -237,4 +268,59 @@ class Notification(db.Model):
             'status': self.status.value,
             'sent_at': self.sent_at.isoformat() if self.sent_at else None,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class OutboxMessage(db.Model):
+    __tablename__ = 'outbox'
+
+    # mesajele pentru RabbitMQ se scriu aici in aceeasi tranzactie cu programarea/evenimentul
+    # si le publica outbox_relay.py, ca sa nu se piarda daca brokerul nu e disponibil
+    id = db.Column(db.Integer, primary_key=True)
+    exchange = db.Column(db.String(100), default='', nullable=False)  # '' = direct in coada routing_key
+    routing_key = db.Column(db.String(255), nullable=False)  # coada in care se publica
+    payload = db.Column(db.JSON, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    published_at = db.Column(db.DateTime)
+    # relay-ul a renuntat la mesaj dupa OUTBOX_MAX_ATTEMPTS publicari esuate (ramane aici pentru verificare)
+    failed_at = db.Column(db.DateTime)
+
+    # relay-ul cauta doar mesajele nepublicate si neesuate, asa ca indexul partial ramane mic
+    __table_args__ = (
+        db.Index('idx_outbox_nepublicate', 'id', postgresql_where=db.text('published_at IS NULL AND failed_at IS NULL')),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'routing_key': self.routing_key,
+            'payload': self.payload,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat(),
+            'published_at': self.published_at.isoformat() if self.published_at else None,
+            'failed_at': self.failed_at.isoformat() if self.failed_at else None
+        }
+
+class ReminderSchedule(db.Model):
+    __tablename__ = 'reminder_schedule'
+
+    # reminderele programate: un rand pe programare confirmata, pus de rute in aceeasi tranzactie cu
+    # confirmarea (sters / mutat la anulare si modificare), pe care il consuma reminder.py la due_at
+    # due_at e ora locala (ca start_time), = start_time - REMINDER_LEAD_MINUTES
+    id = db.Column(db.Integer, primary_key=True)
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointments.id', ondelete='CASCADE'), unique=True, nullable=False)
+    due_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # scheduler-ul ia mereu reminderele cu due_at cel mai mic
+    __table_args__ = (
+        db.Index('idx_reminder_schedule_due_at', 'due_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'appointment_id': self.appointment_id,
+            'due_at': self.due_at.isoformat(),
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+# formatul mesajelor din notifications_queue (appointment-service -> notification-service)
+# versiunea 1 = mesajele vechi, fara schema_version, in care notification-service citea doctorul / cabinetul din BD
+# versiunea 2 = mesajul are tot ce trebuie pentru email si PDF (numele doctorului, specializarea, cabinetul, locatia)
+VERSIUNE_NOTIFICARE = 2
+
+FORMAT_DATA = '%Y-%m-%d %H:%M:%S'
+
+STATUSURI_NOTIFICARE = ('PENDING', 'REJECTED', 'CONFIRMED', 'CANCELLED', 'UPDATED', 'REMINDER')
+
+# camp -> (tipurile acceptate, obligatoriu si in versiunea 1); None in tipuri = campul poate fi null
+CAMPURI_NOTIFICARE = {
+    'user_id': ((int,), True),
+    'appointment_id': ((int,), True),
+    'patient_name': ((str,), True),
+    'patient_email': ((str,), True),
+    'status': ((str,), True),
+    'type': ((str,), True),
+    'message': ((str,), True),
+    'start_time': ((str,), False),
+    'end_time': ((str,), False),
+    'doctor_id': ((int,), False),
+    'doctor_name': ((str, None), False),
+    'specialization': ((str, None), False),
+    'cabinet_id': ((int, None), False),
+    'cabinet': ((str, None), False),
+    'location': ((str, None), False),
+}
+
+class NotificareInvalida(ValueError):
+    pass
+
+def validare_notificare(data):
+    """
+    Verifica mesajul primit din notifications_queue si il intoarce; NotificareInvalida daca lipseste
+    un camp sau are alt tip. Mesajele fara schema_version (versiunea 1, ramase in coada / outbox de dinainte
+    de versiunea 2) au obligatorii doar campurile de baza, restul campurilor se verifica daca exista
+    """
+    if not isinstance(data, dict):
+        raise NotificareInvalida('Mesajul nu e un obiect JSON')
+
+    versiune = data.get('schema_version', 1)
+    if type(versiune) is not int or not 1 <= versiune <= VERSIUNE_NOTIFICARE:
+        raise NotificareInvalida(f"schema_version necunoscut: {versiune!r}")
+
+    for camp, (tipuri, obligatoriu) in CAMPURI_NOTIFICARE.items():
+        if camp not in data:
+            if obligatoriu or versiune >= 2:
+                raise NotificareInvalida(f"Lipseste campul {camp}")
+            continue
+
+        valoare = data[camp]
+        if valoare is None:
+            if None not in tipuri:
+                raise NotificareInvalida(f"Campul {camp} nu poate fi null")
+        elif type(valoare) not in tipuri:
+            raise NotificareInvalida(f"Campul {camp} are tipul {type(valoare).__name__}")
+
+    if data['status'] not in STATUSURI_NOTIFICARE:
+        raise NotificareInvalida(f"Status necunoscut: {data['status']}")
+
+    for camp in ('start_time', 'end_time'):
+        if camp in data:
+            try:
+                datetime.strptime(data[camp], FORMAT_DATA)
+            except ValueError:
+                raise NotificareInvalida(f"Campul {camp} nu e in formatul {FORMAT_DATA}")
+
+    return data
+
+def mesaj_notificare(user_id, appointment_id, patient_name, patient_email, status, message, start_time, end_time,
+                     doctor_id, doctor_name, specialization, cabinet_id=None, cabinet=None, location=None):
+    """
+    Mesajul (versiunea curenta) pentru notification-service, din datele pe care producatorul le are deja
+    start_time / end_time pot fi datetime; mesajul se valideaza inainte sa intre in outbox, ca o greseala
+    in producator sa se vada la producator, nu abia in worker-ul de notificari
+    """
+    if isinstance(start_time, datetime):
+        start_time = start_time.strftime(FORMAT_DATA)
+    if isinstance(end_time, datetime):
+        end_time = end_time.strftime(FORMAT_DATA)
+
+    return validare_notificare({
+        'schema_version': VERSIUNE_NOTIFICARE,
+        'user_id': user_id,
+        'appointment_id': appointment_id,
+        'patient_name': patient_name,
+        'patient_email': patient_email,
+        'status': status,
+        'type': 'EMAIL',
+        'message': message,
+        'start_time': start_time,
+        'end_time': end_time,
+        'doctor_id': doctor_id,
+        'doctor_name': doctor_name,
+        'specialization': specialization,
+        'cabinet_id': cabinet_id,
+        'cabinet': cabinet,
+        'location': location,
+    })
@@ -0,0 +1,176 @@
+import os
+import json
+import threading
+import pika
+
+class Publisher:
+    """
+    Producator RabbitMQ care pastreaza o singura conexiune si un singur canal deschise
+    pe toata durata procesului, in loc sa deschida o conexiune noua (TCP + AMQP) la fiecare mesaj
+    Canalul are publisher confirms activ, deci publica() se intoarce doar dupa ce brokerul
+    a preluat mesajul, iar daca conexiunea a cazut se reconecteaza si reincearca o data
+    Loturile (publica_lot) merg pe un al doilea canal, tranzactional, confirmat o data pe lot
+    Conexiunile pika nu sunt thread-safe, asa ca toate publicarile trec prin acelasi lock
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.lock = threading.Lock()
+        self.connection = None
+        self.channel = None
+        self.canal_lot = None
+        self.cozi_declarate = set()
+        self.exchange_declarate = set()
+        self.pid = None
+
+    def _conectare(self):
+        self.connection = pika.BlockingConnection(
+            pika.ConnectionParameters(host=self.host, heartbeat=60, blocked_connection_timeout=30)
+        )
+        self.channel = self.connection.channel()
+        self.channel.confirm_delivery()
+        self.canal_lot = None
+        self.cozi_declarate = set()
+        self.exchange_declarate = set()
+        self.pid = os.getpid()
+
+    def _inchidere(self):
+        try:
+            # dupa fork (gunicorn) conexiunea e a procesului parinte, nu o inchid de aici
+            if self.connection and self.connection.is_open and self.pid == os.getpid():
+                self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+        self.channel = None
+        self.canal_lot = None
+
+    def _pregatire(self):
+        if (self.connection is None or self.connection.is_closed or self.channel.is_closed
+                or self.pid != os.getpid()):
+            self._conectare()
+        else:
+            # procesez heartbeat-urile venite cat timp conexiunea a stat nefolosita
+            self.connection.process_data_events(time_limit=0)
+
+    def _trimitere(self, canal, coada, body, exchange, mandatory=True):
+        if exchange:
+            # exchange fanout: mesajul ajunge la toate cozile legate (ex. cate una pe fiecare replica),
+            # fara mandatory pentru ca e normal sa nu fie nicio coada legata in acel moment
+            if exchange not in self.exchange_declarate:
+                canal.exchange_declare(exchange=exchange, exchange_type='fanout', durable=True)
+                self.exchange_declarate.add(exchange)
+
+            canal.basic_publish(exchange=exchange, routing_key=coada, body=body)
+            return
+
+        # coada se declara o singura data pe conexiune, nu la fiecare mesaj
+        if coada not in self.cozi_declarate:
+            canal.queue_declare(queue=coada, durable=True)
+            self.cozi_declarate.add(coada)
+
+        canal.basic_publish(exchange='', routing_key=coada, body=body,
+            properties=pika.BasicProperties(delivery_mode=2), mandatory=mandatory)
+
+    def _publicare(self, coada, body, exchange):
+        self._pregatire()
+        self._trimitere(self.channel, coada, body, exchange)
+
+    def _publicare_lot(self, mesaje):
+        self._pregatire()
+        # canal separat in modul tranzactional: pe canalul cu confirms fiecare basic_publish asteapta
+        # confirmarea lui, aici tot lotul e confirmat de broker o singura data, la tx_commit
+        if self.canal_lot is None or self.canal_lot.is_closed:
+            self.canal_lot = self.connection.channel()
+            self.canal_lot.tx_select()
+
+        for coada, body, exchange in mesaje:
+            # coada e declarata inainte de publicare, deci mesajul are mereu unde sa ajunga
+            self._trimitere(self.canal_lot, coada, body, exchange, mandatory=False)
+        self.canal_lot.tx_commit()
+
+    def publica(self, coada, data, exchange=''):
+        """
+        Publica mesajul persistent in coada data, arunca exceptie daca nu a reusit nici dupa reconectare
+        Cu exchange dat, mesajul se publica pe exchange-ul fanout (coada devine routing key)
+        """
+        body = json.dumps(data)
+        with self.lock:
+            try:
+                self._publicare(coada, body, exchange)
+            except pika.exceptions.AMQPError:
+                # conexiunea a cazut (broker repornit, heartbeat expirat), incerc o data pe una noua
+                self._inchidere()
+                self._publicare(coada, body, exchange)
+
+    def publica_lot(self, mesaje):
+        """
+        Publica mesajele (coada, data, exchange) cu o singura confirmare de la broker pentru tot lotul
+        Se intoarce doar dupa ce brokerul a preluat toate mesajele; daca a cazut conexiunea inainte de
+        commit, brokerul nu pastreaza nimic din lot si se reincearca o data tot lotul pe o conexiune noua
+        """
+        corpuri = [(coada, json.dumps(data), exchange) for coada, data, exchange in mesaje]
+        if not corpuri:
+            return
+
+        with self.lock:
+            try:
+                self._publicare_lot(corpuri)
+            except pika.exceptions.AMQPError:
+                self._inchidere()
+                self._publicare_lot(corpuri)
+
+    def close(self):
+        with self.lock:
+            self._inchidere()
+
+
+# un singur producator pe proces pentru fiecare broker
+publisheri = {}
+publisheri_lock = threading.Lock()
+
+def get_publisher(host):
+    """
+    Intoarce producatorul procesului pentru brokerul dat, il creeaza la primul apel
+    """
+    with publisheri_lock:
+        if host not in publisheri:
+            publisheri[host] = Publisher(host)
+        return publisheri[host]
+
+
+if __name__ == '__main__':
+    """
+    Benchmark: latenta unei publicari cu o conexiune noua pe mesaj (varianta veche: conexiune, canal,
+    declarare coada, publicare, inchidere) fata de producatorul procesului (conexiune si canal pastrate,
+    publisher confirms), pe un broker local, de ex. docker run --rm -p 5672:5672 rabbitmq:3
+    python -m clinic_core.publisher [host] [nr_mesaje]
+    """
+    import sys
+    import timeit
+
+    host = sys.argv[1] if len(sys.argv) > 1 else 'localhost'
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    coada = 'benchmark_publisher'
+    mesaj = {'appointment_id': 1, 'status': 'CONFIRMED', 'message': 'benchmark'}
+
+    def conexiune_noua():
+        connection = pika.BlockingConnection(pika.ConnectionParameters(host=host))
+        channel = connection.channel()
+        channel.queue_declare(queue=coada, durable=True)
+        channel.basic_publish(exchange='', routing_key=coada, body=json.dumps(mesaj),
+            properties=pika.BasicProperties(delivery_mode=2))
+        connection.close()
+
+    publisher = get_publisher(host)
+    try:
+        # prima publicare deschide conexiunea, nu intra in masuratoare
+        publisher.publica(coada, mesaj)
+        for nume, functie, nr in (('conexiune noua / mesaj', conexiune_noua, max(n // 10, 1)),
+                                  ('publisher pe proces (cu confirms)', lambda: publisher.publica(coada, mesaj), n)):
+            durata = timeit.timeit(functie, number=nr) / nr
+            print(f"{nume}: {durata * 1000:.3f} ms / mesaj ({nr} mesaje)")
+    finally:
+        if publisher.channel is not None and publisher.channel.is_open:
+            publisher.channel.queue_delete(queue=coada)
+        publisher.close()
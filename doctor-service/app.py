@@ -1,42 +1,41 @@
-import time
 from flask import Flask, jsonify, current_app
-from sqlalchemy.exc import OperationalError
 from config import Config
-from bd_struc_flask import db
+from clinic_core.bd import initializare_bd, asteptare_bd
+from clinic_core.auth import initializare_chei, initializare_identitati
+from clinic_core.instrumentare import initializare_instrumentare
 from routes.doctors import doctors_bp, aux_bp
 from routes.schedules import schedules_bp
+from routes.availability import availability_bp
+from utils.cache_disponibilitate import initializare_cache
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.json.sort_keys = False 
     # initializare BD
-    db.init_app(app)
+    initializare_bd(app, 'doctor-service')
 
     # rutele
     app.register_blueprint(aux_bp)  # specializari, cabinete
     app.register_blueprint(doctors_bp)
     app.register_blueprint(schedules_bp)
-    
-    # la fel ca la user-service, asteptam pana se poate conecta la BD
-    with app.app_context():
-        max_retries = 10
-        for attempt in range(max_retries):
-            try:
-                # nu mai cream BD doar testam conexiunea
-                db.engine.connect()
-                print("doctor-service: Conexiune reusita la BD")
-                break
+    app.register_blueprint(availability_bp)
+
+    # cache-ul de sloturi libere si ascultatorul de invalidari din RabbitMQ
+    initializare_cache(app)
 
-            except OperationalError:
-                if attempt == max_retries - 1:
-                    print("doctor-service: Eroare fatala la conexiunea cu BD")
-                    exit(1)
-                print(f"BD nu este gata... (Incercarea {attempt+1})")
-                time.sleep(3)
+    # cheile Keycloak (JWKS) din copia locala + firul care le reimprospateaza, inainte de primele cereri
+    initializare_chei(app.config)
+    # ascultatorul pentru modificarile userilor (invalideaza cache-ul de identitati)
+    initializare_identitati(app.config)
+    # durata si nr de interogari pe cerere (cererile lente apar in log)
+    initializare_instrumentare(app)
+    
+    # la fel ca la user-service, asteptam pana BD-ul e la revizia de schema asteptata (fara DDL)
+    asteptare_bd(app, 'doctor-service')
 
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
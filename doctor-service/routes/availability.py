@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app
+from clinic_core.models import db, Doctor, Schedule, Appointment, AppointmentStatus
+from clinic_core.auth import require_auth
+from utils.sloturi import sloturi_zi, comprimare_sloturi
+
+# ruta pentru disponibilitatea mai multor doctori pe mai multe zile
+availability_bp = Blueprint('availability', __name__, url_prefix='/availability')
+
+@availability_bp.route('', methods=['GET'])
+@require_auth
+def get_availability():
+    """
+    Disponibilitatea pentru toti doctorii unei specializari (sau o lista de doctori) pe un interval de zile
+    GET /availability?specialization_id=...&from=YYYY-MM-DD&to=YYYY-MM-DD (optional &doctor_ids=1,2,3)
+    In loc de cate un apel available-slots pentru fiecare doctor si fiecare zi, iau tot programul de lucru
+    si toate programarile active din interval in doua interogari si calculez sloturile pentru
+    fiecare pereche (doctor, zi) intr-o singura trecere
+    Raspunsul e compact: pentru fiecare zi in care doctorul lucreaza, intervalele libere continue
+    [start, end, durata_slot_minute] (sloturile libere consecutive sunt unite)
+    """
+    spec_id = request.args.get('specialization_id', type=int)
+    doctor_ids = request.args.get('doctor_ids')
+
+    if not spec_id and not doctor_ids:
+        return jsonify({'Eroare': 'Trebuie specificat specialization_id sau doctor_ids'}), 400
+
+    if doctor_ids:
+        try:
+            doctor_ids = {int(i) for i in doctor_ids.split(',') if i.strip()}
+        except ValueError:
+            return jsonify({'Eroare': 'doctor_ids trebuie sa fie o lista de id-uri separate prin virgula'}), 400
+
+    # intervalul de zile
+    try:
+        data_start = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        data_final = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'Eroare': 'from si to sunt obligatorii si trebuie sa aiba formatul (YYYY-MM-DD)'}), 400
+
+    if data_start > data_final:
+        return jsonify({'Eroare': 'from trebuie sa fie inainte de to'}), 400
+
+    nr_zile = (data_final - data_start).days + 1
+    if nr_zile > current_app.config['AVAILABILITY_MAX_DAYS']:
+        return jsonify({'Eroare': f"Intervalul poate avea maxim {current_app.config['AVAILABILITY_MAX_DAYS']} zile"}), 400
+
+    # programul de lucru al tuturor doctorilor ceruti (o interogare)
+    filtru_program = Schedule.query.join(Doctor, Schedule.doctor_id == Doctor.id)
+    if spec_id:
+        filtru_program = filtru_program.filter(Doctor.specialization_id == spec_id)
+    if doctor_ids:
+        filtru_program = filtru_program.filter(Doctor.id.in_(doctor_ids))
+    program = filtru_program.order_by(Schedule.doctor_id, Schedule.start_time).all()
+
+    program_doctori = {}
+    for p in program:
+        program_doctori.setdefault(p.doctor_id, {}).setdefault(p.weekday, []).append(p)
+
+    if not program_doctori:
+        return jsonify({'from': data_start.isoformat(), 'to': data_final.isoformat(), 'doctors': []}), 200
+
+    # programarile CONFIRMED sau PENDING ale acestor doctori care intra in interval (a doua interogare)
+    inceput = datetime.combine(data_start, datetime.min.time())
+    sfarsit = datetime.combine(data_final, datetime.min.time()) + timedelta(days=1)
+
+    programari = db.session.query(Appointment.doctor_id, Appointment.start_time, Appointment.end_time).filter(
+        Appointment.doctor_id.in_(program_doctori.keys()),
+        Appointment.start_time < sfarsit,
+        Appointment.end_time > inceput,
+        # orice status in afara de CANCELLED/REJECTED, scris ca lista IN ca sa poata fi folosit
+        # indexul (doctor_id, status, start_time) si pentru intervalul de timp
+        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED])
+    ).all()
+
+    # impart programarile pe (doctor, zi), o programare peste miezul noptii intra in ambele zile
+    ocupate = {}
+    for doctor_id, start_time, end_time in programari:
+        zi = start_time.date()
+        while zi <= end_time.date():
+            ocupate.setdefault((doctor_id, zi), []).append((start_time, end_time))
+            zi += timedelta(days=1)
+
+    rezultat = []
+    for doctor_id, program_saptamana in program_doctori.items():
+        zile = {}
+        total_sloturi = 0
+        for i in range(nr_zile):
+            zi = data_start + timedelta(days=i)
+            program_zi = program_saptamana.get(zi.weekday())
+            # zilele in care doctorul nu lucreaza nu apar in raspuns
+            if not program_zi:
+                continue
+
+            sloturi = sloturi_zi(zi, program_zi, ocupate.get((doctor_id, zi), []))
+            total_sloturi += len(sloturi)
+            zile[zi.isoformat()] = comprimare_sloturi(sloturi)
+
+        rezultat.append({'doctor_id': doctor_id, 'total_slots': total_sloturi, 'days': zile})
+
+    return jsonify({'from': data_start.isoformat(), 'to': data_final.isoformat(), 'doctors': rezultat}), 200
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
-from bd_struc_flask import db, Doctor, User, Specialization, Cabinet, UserRole
-from utils.auth import require_auth, require_role
+from clinic_core.models import db, Doctor, User, Specialization, Cabinet, UserRole
+from clinic_core.auth import require_auth, require_role, producator_modificare_user
 import os
 import requests
 from datetime import datetime, timedelta
@@ -362,6 +362,7 @@ def create_doctor():
 
         db.session.add(new_doc)
         db.session.commit()
+        producator_modificare_user(user.external_id)
 
         return jsonify({'message': 'Doctor creat cu succes', 'doctor': new_doc.to_dict()}), 201
 
@@ -416,6 +417,8 @@ def delete_doctor(id):
         # Sterg profilul doctor
         db.session.delete(doc)
         db.session.commit()
+        if user:
+            producator_modificare_user(user.external_id)
 
         return jsonify({
             'message': 'Profilul doctorului sters cu succes',
@@ -1,11 +1,27 @@
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app
-from bd_struc_flask import db, Doctor, Schedule, Appointment, AppointmentStatus, User, UserRole
-from utils.auth import require_auth, require_role, get_user_info_from_token, get_token_from_header
+from clinic_core.models import db, Doctor, Schedule, Appointment, AppointmentStatus, User, UserRole
+from clinic_core.auth import require_auth, require_role, get_identitate
+from utils.sloturi import sloturi_zi
+from utils.cache_disponibilitate import cache, pornire_ascultator
+from clinic_core.publisher import get_publisher
 
 # ruta pentru programul doctorilor
 schedules_bp = Blueprint('schedules', __name__, url_prefix='/doctors')
 
+def producator_invalidare(doctor_id):
+    """
+    Programul de lucru al doctorului s-a schimbat, deci toate zilele lui din cache-ul de disponibilitate
+    sunt invalide: le sterg imediat in procesul curent si anunt si celelalte replici prin exchange-ul fanout
+    Daca RabbitMQ nu e disponibil, celelalte replici se bazeaza pe TTL-ul cache-ului
+    """
+    cache.invalidare(doctor_id)
+    try:
+        get_publisher(current_app.config['RABBITMQ_HOST']).publica('', {'doctor_id': doctor_id},
+            exchange=current_app.config['AVAILABILITY_EXCHANGE'])
+    except Exception as e:
+        current_app.logger.error(f"Eroare la publicarea invalidarii pentru doctorul {doctor_id}: {e}")
+
 @schedules_bp.route('/<int:doctor_id>/schedule', methods=['GET'])
 @require_auth
 def get_schedule(doctor_id):
@@ -27,12 +43,8 @@ def add_schedule_slot(doctor_id):
     data = request.get_json()
 
     # ------- verific daca are permisiunile necesare sa faca operatiunea---------
-    token = get_token_from_header()
-    user_info = get_user_info_from_token(token)
-    external_id = user_info.get('external_id')
-
-    # i-au userul din BD
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (rol + profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user:
         return jsonify({'Eroare': 'Utilizator necunoscut'}), 404
 
@@ -43,8 +55,7 @@ def add_schedule_slot(doctor_id):
 
     is_doctor = False
     if user.role == UserRole.DOCTOR:
-        doctor = Doctor.query.filter_by(user_id=user.id).first()
-        if doctor and doctor.id == doctor_id:
+        if user.doctor_id == doctor_id:
             is_doctor = True
 
     # daca nu e nici una eroare
@@ -98,7 +109,8 @@ def add_schedule_slot(doctor_id):
 
         db.session.add(new_sch)
         db.session.commit()
-        current_app.logger.info(f"Program adaugat pentru doctor {doctor_id} de catre user-ul {user.id}")
+        producator_invalidare(doctor_id)
+        current_app.logger.info(f"Program adaugat pentru doctor {doctor_id} de catre user-ul {user.user_id}")
         return jsonify(new_sch.to_dict()), 201
 
     except Exception as e:
@@ -114,12 +126,8 @@ def delete_schedule_slot(doctor_id, schedule_id):
     """
 
     # ------- verific daca are permisiunile necesare sa faca operatiunea---------
-    token = get_token_from_header()
-    user_info = get_user_info_from_token(token)
-    external_id = user_info.get('external_id')
-
-    # i-au userul din BD
-    user = User.query.filter_by(external_id=external_id).first()
+    # userul din BD (rol + profil de doctor), rezolvat o singura data pe cerere
+    user = get_identitate()
     if not user:
         return jsonify({'Eroare': 'Utilizator necunoscut'}), 404
     
@@ -129,8 +137,7 @@ def delete_schedule_slot(doctor_id, schedule_id):
 
     is_doctor = False
     if user.role == UserRole.DOCTOR:
-        doctor = Doctor.query.filter_by(user_id=user.id).first()
-        if doctor and doctor.id == doctor_id:
+        if user.doctor_id == doctor_id:
             is_doctor = True
 
     # daca nu e nici una eroare
@@ -145,8 +152,9 @@ def delete_schedule_slot(doctor_id, schedule_id):
     try:
         db.session.delete(slot)
         db.session.commit()
+        producator_invalidare(doctor_id)
 
-        # current_app.logger.info(f"Programul {schedule_id} a fost sters de catre user-ul {user.id}")
+        # current_app.logger.info(f"Programul {schedule_id} a fost sters de catre user-ul {user.user_id}")
         return jsonify({'message': 'Interval sters cu succes'}), 200
 
     except Exception as e:
@@ -175,57 +183,58 @@ def get_available_slots(doctor_id):
     except ValueError:
         return jsonify({'Eroare': 'Format invalid'}), 400
 
-    #ziua
-    weekday = data_ceruta.weekday()
+    # intai caut in cache, se recalculeaza doar daca s-a schimbat ceva pentru doctor in ziua asta
+    # versiunea se ia inainte de interogari, ca un rezultat vechi sa nu intre in cache dupa o invalidare
+    pornire_ascultator()
+    versiune = cache.versiune(doctor_id)
+    intrare = cache.get(doctor_id, data_ceruta)
+    if intrare is None:
+        intrare = calcul_sloturi_libere(doctor_id, data_ceruta)
+        cache.set(doctor_id, data_ceruta, intrare, versiune)
 
-    # programele de lucru ale doctorului pentru ziua respectiva
-    program = Schedule.query.filter_by(doctor_id=doctor_id, weekday=weekday).all()
+    lucreaza, sloturi = intrare
     # comanda realizata cu succes chiar daca nu are program in ziua respectiva
-    if not program:
+    if not lucreaza:
         return jsonify({
             'doctor_id': doctor_id,
             'date': date_str,
             'message': 'Doctorul nu lucreaza in aceasta zi',
             'slots': []}), 200
 
+    intervale_disponibile = []
+    for slot_start, slot_end in sloturi:
+        intervale_disponibile.append({'start_time': slot_start.strftime('%H:%M'), 
+                                      'end_time': slot_end.strftime('%H:%M')})
+
+    return jsonify({'doctor_id': doctor_id, 'date': date_str, 'total_slots': len(intervale_disponibile),'slots': intervale_disponibile}), 200
+
+def calcul_sloturi_libere(doctor_id, data_ceruta):
+    """
+    Calculeaza din BD sloturile libere ale doctorului intr-o zi
+    Intoarce (lucreaza, sloturi), lucreaza e False daca doctorul nu are program in ziua respectiva
+    """
+    #ziua
+    weekday = data_ceruta.weekday()
+
+    # programele de lucru ale doctorului pentru ziua respectiva
+    program = Schedule.query.filter_by(doctor_id=doctor_id, weekday=weekday).all()
+    if not program:
+        return False, []
+
     # programarile existente CONFIRMED sau PENDING pentru ziua respectiva
     start_of_day = datetime.combine(data_ceruta, datetime.min.time())
-    end_of_day = datetime.combine(data_ceruta, datetime.max.time())
-    
-    appointments = Appointment.query.filter(
+    end_of_day = start_of_day + timedelta(days=1)
+
+    # iau doar capetele intervalelor, nu obiectele intregi, si orice programare care intra in zi
+    intervale_ocupate = db.session.query(Appointment.start_time, Appointment.end_time).filter(
         Appointment.doctor_id == doctor_id,
-        Appointment.start_time >= start_of_day,
-        Appointment.start_time <= end_of_day,
-        Appointment.status.notin_([AppointmentStatus.CANCELLED, AppointmentStatus.REJECTED])
+        Appointment.start_time < end_of_day,
+        Appointment.end_time > start_of_day,
+        # orice status in afara de CANCELLED/REJECTED, scris ca lista IN ca sa poata fi folosit
+        # indexul (doctor_id, status, start_time) si pentru intervalul de timp
+        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED])
     ).all()
 
-    intervale_ocupate = []
-    for app in appointments:
-        intervale_ocupate.append((app.start_time, app.end_time))
-
-    # generarea sloturilor disponibile
-    intervale_disponibile = []
-
-    for p in program:
-        durata = timedelta(minutes=p.slot_duration_minutes)
-        timpul_curent = datetime.combine(data_ceruta, p.start_time)
-        sf_program = datetime.combine(data_ceruta, p.end_time)
-
-        while timpul_curent + durata <= sf_program:
-            slot_start = timpul_curent
-            slot_end = timpul_curent + durata
-
-            # verificam daca slotul se suprapune cu vreunul ocupat
-            ocupat = False
-            for ocupat_start, ocupat_end in intervale_ocupate:
-                # StartSlotCurr < endSlotOcupat si EndSlotCurr > StartSlotOcupat => OCUPAT
-                if slot_start < ocupat_end and slot_end > ocupat_start:
-                    ocupat = True
-                    break
-
-            if not ocupat:
-                intervale_disponibile.append({'start_time': slot_start.strftime('%H:%M'), 
-                                              'end_time': slot_end.strftime('%H:%M')})
-            timpul_curent += durata
-
-    return jsonify({'doctor_id': doctor_id, 'date': date_str, 'total_slots': len(intervale_disponibile),'slots': intervale_disponibile}), 200
\ No newline at end of file
+    # generarea sloturilor disponibile, intervalele ocupate se sorteaza o data si se parcurg
+    # in paralel cu sloturile (utils/sloturi.py) in loc sa verific fiecare slot cu fiecare programare
+    return True, sloturi_zi(data_ceruta, program, intervale_ocupate)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Teste unitare pentru calculul sloturilor libere (utils/sloturi.py), fara BD si fara restul stack-ului
+cd doctor-service && python -m unittest test_sloturi -v
+"""
+import random
+import unittest
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+from utils.sloturi import unire_intervale, sloturi_libere, sloturi_zi, comprimare_sloturi
+
+ZI = date(2030, 1, 7)
+
+
+def ora(h, m=0):
+    return datetime.combine(ZI, time(h, m))
+
+
+def minute(n):
+    return timedelta(minutes=n)
+
+
+def sloturi_naiv(inceput, sfarsit, durata, intervale_ocupate):
+    # varianta veche, fiecare slot verificat cu fiecare programare
+    libere = []
+    slot_start = inceput
+    while slot_start + durata <= sfarsit:
+        slot_end = slot_start + durata
+        if not any(slot_start < o_end and slot_end > o_start for o_start, o_end in intervale_ocupate):
+            libere.append((slot_start, slot_end))
+        slot_start = slot_end
+    return libere
+
+
+def decomprimare(intervale):
+    # inversul lui comprimare_sloturi pentru ziua de test
+    sloturi = []
+    for start, end, durata in intervale:
+        slot_start = datetime.combine(ZI, datetime.strptime(start, '%H:%M').time())
+        slot_end = datetime.combine(ZI, datetime.strptime(end, '%H:%M').time())
+        while slot_start < slot_end:
+            sloturi.append((slot_start, slot_start + minute(durata)))
+            slot_start += minute(durata)
+    return sloturi
+
+
+class TestUnireIntervale(unittest.TestCase):
+
+    def test_lista_goala(self):
+        self.assertEqual(unire_intervale([]), [])
+
+    def test_suprapuse(self):
+        self.assertEqual(unire_intervale([(ora(9), ora(10)), (ora(9, 30), ora(11))]), [(ora(9), ora(11))])
+
+    def test_adiacente(self):
+        # intervalele care se ating devin unul singur
+        self.assertEqual(unire_intervale([(ora(9), ora(9, 30)), (ora(9, 30), ora(10))]), [(ora(9), ora(10))])
+
+    def test_inclus_si_nesortate(self):
+        intervale = [(ora(14), ora(15)), (ora(9), ora(12)), (ora(10), ora(11)), (ora(12, 30), ora(13))]
+        self.assertEqual(unire_intervale(intervale),
+                         [(ora(9), ora(12)), (ora(12, 30), ora(13)), (ora(14), ora(15))])
+
+    def test_disjuncte_raman_la_fel(self):
+        intervale = [(ora(9), ora(9, 15)), (ora(10), ora(10, 15))]
+        self.assertEqual(unire_intervale(intervale), intervale)
+
+
+class TestSloturiLibere(unittest.TestCase):
+
+    def test_fara_ocupate(self):
+        self.assertEqual(sloturi_libere(ora(9), ora(10), minute(20), []),
+                         [(ora(9), ora(9, 20)), (ora(9, 20), ora(9, 40)), (ora(9, 40), ora(10))])
+
+    def test_durata_care_nu_imparte_programul(self):
+        # ultimul rest (9:50 - 10:00) e mai scurt decat un slot si nu se ofera
+        self.assertEqual(sloturi_libere(ora(9), ora(10), minute(25), []),
+                         [(ora(9), ora(9, 25)), (ora(9, 25), ora(9, 50))])
+
+    def test_durata_mai_mare_decat_programul(self):
+        self.assertEqual(sloturi_libere(ora(9), ora(9, 20), minute(30), []), [])
+
+    def test_ocupat_inainte_de_program(self):
+        ocupate = unire_intervale([(ora(8), ora(9, 30))])
+        self.assertEqual(sloturi_libere(ora(9), ora(11), minute(30), ocupate),
+                         [(ora(9, 30), ora(10)), (ora(10), ora(10, 30)), (ora(10, 30), ora(11))])
+
+    def test_ocupat_dupa_program(self):
+        ocupate = unire_intervale([(ora(10, 30), ora(12))])
+        self.assertEqual(sloturi_libere(ora(9), ora(11), minute(30), ocupate),
+                         [(ora(9), ora(9, 30)), (ora(9, 30), ora(10)), (ora(10), ora(10, 30))])
+
+    def test_ocupat_tot_programul(self):
+        ocupate = unire_intervale([(ora(8), ora(12))])
+        self.assertEqual(sloturi_libere(ora(9), ora(11), minute(30), ocupate), [])
+
+    def test_ocupate_in_afara_programului(self):
+        # intervale terminate inainte de program sau incepute dupa el nu blocheaza nimic
+        ocupate = unire_intervale([(ora(7), ora(8)), (ora(8), ora(9)), (ora(11), ora(12))])
+        self.assertEqual(sloturi_libere(ora(9), ora(10), minute(30), ocupate),
+                         [(ora(9), ora(9, 30)), (ora(9, 30), ora(10))])
+
+    def test_ocupate_adiacente(self):
+        ocupate = unire_intervale([(ora(9, 30), ora(9, 45)), (ora(9, 45), ora(10))])
+        self.assertEqual(sloturi_libere(ora(9), ora(11), minute(30), ocupate),
+                         [(ora(9), ora(9, 30)), (ora(10), ora(10, 30)), (ora(10, 30), ora(11))])
+
+    def test_ocupate_suprapuse(self):
+        ocupate = unire_intervale([(ora(9, 10), ora(9, 50)), (ora(9, 40), ora(10, 5))])
+        self.assertEqual(sloturi_libere(ora(9), ora(11), minute(30), ocupate),
+                         [(ora(10, 30), ora(11))])
+
+    def test_slot_care_atinge_programarea_e_liber(self):
+        # slotul se termina exact cand incepe programarea, iar urmatorul incepe exact cand ea se termina
+        ocupate = unire_intervale([(ora(9, 30), ora(10))])
+        self.assertEqual(sloturi_libere(ora(9), ora(10, 30), minute(30), ocupate),
+                         [(ora(9), ora(9, 30)), (ora(10), ora(10, 30))])
+
+    def test_la_fel_ca_varianta_naiva(self):
+        aleator = random.Random(7)
+        for _ in range(200):
+            inceput = ora(aleator.randrange(6, 12), aleator.choice((0, 15, 30)))
+            sfarsit = inceput + minute(aleator.randrange(30, 10 * 60))
+            durata = minute(aleator.choice((5, 10, 15, 20, 25, 30, 45)))
+            intervale = []
+            for _ in range(aleator.randrange(0, 30)):
+                start = ora(5) + minute(aleator.randrange(0, 16 * 60))
+                intervale.append((start, start + minute(aleator.choice((5, 10, 15, 30, 60)))))
+
+            self.assertEqual(sloturi_libere(inceput, sfarsit, durata, unire_intervale(intervale)),
+                             sloturi_naiv(inceput, sfarsit, durata, intervale))
+
+
+class TestSloturiZi(unittest.TestCase):
+
+    def test_mai_multe_intervale_de_program(self):
+        program = [SimpleNamespace(start_time=time(9), end_time=time(10), slot_duration_minutes=30),
+                   SimpleNamespace(start_time=time(14), end_time=time(15), slot_duration_minutes=40)]
+        # programarea 9:45 - 14:10 acopera sfarsitul primului interval si inceputul celui de-al doilea
+        ocupate = [(ora(13, 0), ora(14, 10)), (ora(9, 45), ora(13, 30))]
+        self.assertEqual(sloturi_zi(ZI, program, ocupate), [(ora(9), ora(9, 30))])
+
+    def test_fara_ocupate(self):
+        program = [SimpleNamespace(start_time=time(9), end_time=time(10), slot_duration_minutes=25)]
+        self.assertEqual(sloturi_zi(ZI, program, []), [(ora(9), ora(9, 25)), (ora(9, 25), ora(9, 50))])
+
+    def test_fara_program(self):
+        self.assertEqual(sloturi_zi(ZI, [], [(ora(9), ora(10))]), [])
+
+
+class TestComprimareSloturi(unittest.TestCase):
+
+    def test_lista_goala(self):
+        self.assertEqual(comprimare_sloturi([]), [])
+
+    def test_sloturi_consecutive_devin_un_interval(self):
+        sloturi = sloturi_libere(ora(9), ora(12), minute(30), unire_intervale([(ora(10), ora(10, 30))]))
+        self.assertEqual(comprimare_sloturi(sloturi), [['09:00', '10:00', 30], ['10:30', '12:00', 30]])
+
+    def test_durate_diferite_nu_se_unesc(self):
+        sloturi = [(ora(9), ora(9, 30)), (ora(9, 30), ora(10)), (ora(10), ora(10, 20))]
+        self.assertEqual(comprimare_sloturi(sloturi), [['09:00', '10:00', 30], ['10:00', '10:20', 20]])
+
+    def test_dus_intors(self):
+        program = [SimpleNamespace(start_time=time(8), end_time=time(12), slot_duration_minutes=15),
+                   SimpleNamespace(start_time=time(12), end_time=time(13), slot_duration_minutes=20),
+                   SimpleNamespace(start_time=time(14), end_time=time(18, 10), slot_duration_minutes=25)]
+        aleator = random.Random(3)
+        for _ in range(50):
+            ocupate = []
+            for _ in range(aleator.randrange(0, 12)):
+                start = ora(8) + minute(5 * aleator.randrange(0, 120))
+                ocupate.append((start, start + minute(aleator.choice((10, 15, 30, 45)))))
+
+            sloturi = sloturi_zi(ZI, program, ocupate)
+            self.assertEqual(decomprimare(comprimare_sloturi(sloturi)), sloturi)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import date
+import pika
+
+
+class CacheDisponibilitate:
+    """
+    Cache in memoria procesului pentru sloturile libere pe (doctor, zi), completat la prima citire
+    Intrarile se invalideaza prin mesajele venite pe exchange-ul de disponibilitate (programari noi,
+    anulate, mutate, program de lucru schimbat), iar TTL-ul ramane doar ca plasa de siguranta
+    Fiecare doctor are o versiune care creste la orice invalidare: un rezultat calculat din BD inainte
+    de o invalidare nu mai intra in cache, ca sa nu pun inapoi date vechi
+    Cat timp ascultatorul nu e conectat la RabbitMQ cache-ul nu e folosit (as putea pierde invalidari)
+    """
+
+    def __init__(self, ttl=300, max_intrari=5000):
+        self.ttl = ttl
+        self.max_intrari = max_intrari
+        self.lock = threading.Lock()
+        self.intrari = OrderedDict()
+        self.versiuni = {}
+        self.versiune_globala = 0
+        self.activ = False
+
+    def versiune(self, doctor_id):
+        with self.lock:
+            return (self.versiune_globala, self.versiuni.get(doctor_id, 0))
+
+    def get(self, doctor_id, zi):
+        """
+        Intoarce valoarea salvata pentru (doctor, zi) sau None daca nu exista / a expirat
+        """
+        with self.lock:
+            if not self.activ:
+                return None
+
+            intrare = self.intrari.get((doctor_id, zi))
+            if intrare is None:
+                return None
+
+            expira_la, valoare = intrare
+            if expira_la < time.monotonic():
+                del self.intrari[(doctor_id, zi)]
+                return None
+
+            self.intrari.move_to_end((doctor_id, zi))
+            return valoare
+
+    def set(self, doctor_id, zi, valoare, versiune):
+        """
+        Salveaza valoarea doar daca doctorul nu a fost invalidat de cand s-a luat versiunea
+        """
+        with self.lock:
+            if not self.activ or versiune != (self.versiune_globala, self.versiuni.get(doctor_id, 0)):
+                return
+
+            self.intrari[(doctor_id, zi)] = (time.monotonic() + self.ttl, valoare)
+            self.intrari.move_to_end((doctor_id, zi))
+            # cand se umple scot intrarile folosite cel mai demult
+            while len(self.intrari) > self.max_intrari:
+                self.intrari.popitem(last=False)
+
+    def invalidare(self, doctor_id, zile=None):
+        """
+        Sterge zilele date ale doctorului din cache, sau toate zilele lui daca zile e None
+        """
+        with self.lock:
+            self.versiuni[doctor_id] = self.versiuni.get(doctor_id, 0) + 1
+            if zile is None:
+                for cheie in [cheie for cheie in self.intrari if cheie[0] == doctor_id]:
+                    del self.intrari[cheie]
+            else:
+                for zi in zile:
+                    self.intrari.pop((doctor_id, zi), None)
+
+    def golire(self, activ):
+        with self.lock:
+            self.versiune_globala += 1
+            self.intrari.clear()
+            self.activ = activ
+
+
+# un singur cache pe proces
+cache = CacheDisponibilitate()
+
+def procesare_invalidare(ch, method, properties, body):
+    """
+    Mesaj de pe exchange: {'doctor_id': .., 'dates': ['YYYY-MM-DD', ..]}, fara dates se invalideaza
+    toate zilele doctorului (de ex. cand i s-a schimbat programul de lucru)
+    """
+    try:
+        data = json.loads(body)
+        zile = None
+        if 'dates' in data:
+            zile = [date.fromisoformat(zi) for zi in data['dates']]
+        cache.invalidare(data['doctor_id'], zile)
+    except Exception as e:
+        print(f"Eroare la invalidarea cache-ului de disponibilitate {e}")
+        cache.golire(cache.activ)
+
+def ascultare_invalidari(host, exchange):
+    """
+    Fiecare proces isi leaga propria coada exclusiva la exchange-ul fanout, asa ca toate replicile
+    doctor-service primesc toate invalidarile, la orice deconectare cache-ul se goleste si se opreste
+    pana la reconectare
+    """
+    while True:
+        try:
+            connection = pika.BlockingConnection(pika.ConnectionParameters(host=host, heartbeat=60))
+            channel = connection.channel()
+            channel.exchange_declare(exchange=exchange, exchange_type='fanout', durable=True)
+            coada = channel.queue_declare(queue='', exclusive=True).method.queue
+            channel.queue_bind(exchange=exchange, queue=coada)
+
+            cache.golire(True)
+            print("doctor-service: cache-ul de disponibilitate asculta invalidarile")
+            channel.basic_consume(queue=coada, on_message_callback=procesare_invalidare, auto_ack=True)
+            channel.start_consuming()
+
+        except Exception as e:
+            print(f"Ascultatorul de invalidari s-a deconectat de la RabbitMQ {e}")
+
+        cache.golire(False)
+        time.sleep(5)
+
+# setarile ascultatorului din config si pid-ul procesului in care ruleaza firul (dupa fork-ul facut de
+# gunicorn procesul copil mosteneste starea, dar nu si firul, asa ca fiecare proces isi porneste ascultatorul)
+setari_ascultator = {}
+stare_ascultator = {'pid': None}
+ascultator_lock = threading.Lock()
+
+def initializare_cache(app):
+    """
+    Configureaza cache-ul din config si porneste firul care asculta invalidarile
+    Cu AVAILABILITY_CACHE_TTL=0 cache-ul ramane oprit
+    """
+    cache.ttl = app.config['AVAILABILITY_CACHE_TTL']
+    cache.max_intrari = app.config['AVAILABILITY_CACHE_MAX']
+    setari_ascultator.update({
+        'host': app.config['RABBITMQ_HOST'],
+        'exchange': app.config['AVAILABILITY_EXCHANGE'],
+    })
+    pornire_ascultator()
+
+def pornire_ascultator():
+    """
+    O data pe proces (pid-ul se verifica pentru procesele create prin fork de gunicorn), se apeleaza si
+    inainte de folosirea cache-ului: un proces copil goleste ce a mostenit de la parinte (fara ascultator
+    nu ar vedea invalidarile) si isi porneste propriul fir
+    """
+    if stare_ascultator['pid'] == os.getpid() or cache.ttl <= 0 or not setari_ascultator:
+        return
+
+    with ascultator_lock:
+        if stare_ascultator['pid'] == os.getpid():
+            return
+        stare_ascultator['pid'] = os.getpid()
+
+    cache.golire(False)
+    threading.Thread(target=ascultare_invalidari,
+                     args=(setari_ascultator['host'], setari_ascultator['exchange']),
+                     daemon=True).start()
@@ -0,0 +1,117 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+
+def unire_intervale(intervale):
+    """
+    Sortez intervalele ocupate (start, end) si le unesc pe cele care se suprapun sau se ating
+    Intorc lista de intervale disjuncte, in ordine crescatoare
+    """
+    unite = []
+    for start, end in sorted(intervale):
+        if unite and start <= unite[-1][1]:
+            if end > unite[-1][1]:
+                unite[-1][1] = end
+        else:
+            unite.append([start, end])
+    return [(start, end) for start, end in unite]
+
+
+def sloturi_libere(inceput, sfarsit, durata, ocupate):
+    """
+    Genereaza sloturile de lungime durata dintre inceput si sfarsit (un interval din programul de lucru)
+    care nu se suprapun cu niciun interval din ocupate (deja unite si sortate cu unire_intervale)
+    Sloturile si intervalele ocupate sunt parcurse o singura data in paralel (merge walk),
+    pozitia de start in lista de ocupate o gasesc prin cautare binara
+    Intorc lista de (slot_start, slot_end)
+    """
+    sfarsituri = [end for _, end in ocupate]
+    # primul interval ocupat care se termina dupa inceputul programului
+    i = bisect_right(sfarsituri, inceput)
+
+    libere = []
+    slot_start = inceput
+    while slot_start + durata <= sfarsit:
+        slot_end = slot_start + durata
+
+        # sar peste intervalele ocupate care s-au terminat inainte de slotul curent
+        while i < len(ocupate) and ocupate[i][1] <= slot_start:
+            i += 1
+
+        # StartSlotCurr < endSlotOcupat si EndSlotCurr > StartSlotOcupat => OCUPAT
+        if i == len(ocupate) or ocupate[i][0] >= slot_end:
+            libere.append((slot_start, slot_end))
+
+        slot_start = slot_end
+    return libere
+
+
+def sloturi_zi(data_ceruta, program, intervale_ocupate):
+    """
+    Sloturile libere dintr-o zi pentru toate intervalele din programul de lucru al doctorului
+    (obiecte Schedule), intervalele ocupate se sorteaza si se unesc o singura data pe zi
+    """
+    ocupate = unire_intervale(intervale_ocupate)
+
+    libere = []
+    for p in program:
+        libere.extend(sloturi_libere(
+            datetime.combine(data_ceruta, p.start_time),
+            datetime.combine(data_ceruta, p.end_time),
+            timedelta(minutes=p.slot_duration_minutes),
+            ocupate))
+    return libere
+
+
+
+def comprimare_sloturi(sloturi):
+    """
+    Comprim sloturile libere (in ordine) in intervale continue (run-length): sloturile consecutive
+    cu aceeasi durata devin un singur [start, end, durata_minute], cu orele in format HH:MM
+    """
+    intervale = []
+    for slot_start, slot_end in sloturi:
+        durata = int((slot_end - slot_start).total_seconds() // 60)
+        if intervale and intervale[-1][1] == slot_start and intervale[-1][2] == durata:
+            intervale[-1][1] = slot_end
+        else:
+            intervale.append([slot_start, slot_end, durata])
+    return [[start.strftime('%H:%M'), end.strftime('%H:%M'), durata] for start, end, durata in intervale]
+
+if __name__ == '__main__':
+    """
+    Benchmark: un doctor cu sloturi de 5 minute si sute de programari pe zi
+    compar rezultatul si timpul cu varianta veche (fiecare slot verificat cu fiecare programare)
+    python utils/sloturi.py
+    """
+    import random
+    import timeit
+
+    def sloturi_naiv(inceput, sfarsit, durata, intervale_ocupate):
+        libere = []
+        slot_start = inceput
+        while slot_start + durata <= sfarsit:
+            slot_end = slot_start + durata
+            if not any(slot_start < o_end and slot_end > o_start for o_start, o_end in intervale_ocupate):
+                libere.append((slot_start, slot_end))
+            slot_start = slot_end
+        return libere
+
+    random.seed(1)
+    inceput = datetime(2030, 1, 7, 0, 0)
+    sfarsit = inceput + timedelta(hours=24)
+    durata = timedelta(minutes=5)
+
+    for nr_programari in (100, 300, 600):
+        intervale_ocupate = []
+        for _ in range(nr_programari):
+            start = inceput + timedelta(minutes=random.randrange(0, 24 * 60 - 30))
+            intervale_ocupate.append((start, start + timedelta(minutes=random.choice((5, 10, 15, 30)))))
+
+        assert sloturi_naiv(inceput, sfarsit, durata, intervale_ocupate) == \
+            sloturi_libere(inceput, sfarsit, durata, unire_intervale(intervale_ocupate))
+
+        naiv = timeit.timeit(lambda: sloturi_naiv(inceput, sfarsit, durata, intervale_ocupate), number=20) / 20
+        nou = timeit.timeit(lambda: sloturi_libere(inceput, sfarsit, durata, unire_intervale(intervale_ocupate)),
+                            number=20) / 20
+        print(f"{nr_programari} programari, 288 sloturi: naiv {naiv * 1000:.2f} ms, merge walk {nou * 1000:.2f} ms")
@@ -1,34 +1,43 @@
-import time
 from flask import Flask
-from sqlalchemy.exc import OperationalError
 from config import Config
-from bd_struc_flask import db
-from routes.notifications import notifications_bp
+from clinic_core.bd import initializare_bd, asteptare_bd
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, rute=True, profil_bd='web'):
+    """
+    worker-ul de mailuri foloseste doar BD-ul, asa ca isi creeaza aplicatia cu rute=False
+    (fara rute, fara auth si fara firele pentru JWKS / identitati) si cu pool-ul profilului 'worker'
+    """
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.json.sort_keys = False
 
-    db.init_app(app)
-    app.register_blueprint(notifications_bp)
-
-    with app.app_context():
-        max_retries = 10
-        for attempt in range(max_retries):
-            try:
-                db.engine.connect()
-                print("S-a realizat conexiunea la BD")
-                break
-
-            except OperationalError:
-                if attempt == max_retries - 1: 
-                    exit(1)
-                print(f"Eroare BD nu e up inca")
-                time.sleep(3)
+    # in modul concurrent fiecare fir al worker-ului face INSERT-ul lui in notifications, deci pool-ul are cate
+    # o conexiune pe fir (cu pool-ul profilului, 1 + 1, firele ar astepta DB_POOL_TIMEOUT dupa conexiuni)
+    if profil_bd == 'worker' and app.config['WORKER_MODE'] == 'concurrent' and not app.config['DB_POOL_SIZE']:
+        app.config['DB_POOL_SIZE'] = app.config['WORKER_THREADS']
+        if not app.config['DB_MAX_OVERFLOW']:
+            app.config['DB_MAX_OVERFLOW'] = 0
+
+    initializare_bd(app, 'notification-service', profil_bd)
+
+    if rute:
+        from clinic_core.auth import initializare_chei, initializare_identitati
+        from clinic_core.instrumentare import initializare_instrumentare
+        from routes.notifications import notifications_bp
+
+        app.register_blueprint(notifications_bp)
+
+        # cheile Keycloak (JWKS) din copia locala + firul care le reimprospateaza, inainte de primele cereri
+        initializare_chei(app.config)
+        # ascultatorul pentru modificarile userilor (invalideaza cache-ul de identitati)
+        initializare_identitati(app.config)
+        # durata si nr de interogari pe cerere (cererile lente apar in log)
+        initializare_instrumentare(app)
+
+    asteptare_bd(app, 'notification-service')
     
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,82 @@
+import os
+import sys
+import io
+import json
+import time
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+# scriptul trimite emailuri catre un server SMTP local si salveaza notificarile in BD (sterse la final),
+# deci ruleaza doar daca i se spune explicit ca DATABASE_URL e un BD de test
+if os.getenv('BENCHMARK_BD_TEST') != '1':
+    print("benchmark_worker.py scrie in tabela notifications, se ruleaza doar pe un BD de test cu BENCHMARK_BD_TEST=1")
+    sys.exit(1)
+
+FIRE = (1, 2, 4, 8)
+
+# worker-ul isi dimensioneaza pool-ul de BD si de SMTP la pornire (create_app / config.py), deci setarile
+# se pun inainte de import, pentru cel mai mare nr de fire masurat
+os.environ.update(WORKER_MODE='concurrent', WORKER_THREADS=str(max(FIRE)), SMTP_HOST='127.0.0.1', SMTP_PORT='8025',
+                  SMTP_POOL_SIZE=str(max(FIRE)))
+
+from aiosmtpd.controller import Controller
+from clinic_core.models import db, Appointment, Notification
+from worker import app, procesare_notificare
+
+def benchmark(nr_mesaje, latenta_smtp):
+    """
+    Mesaje pe secunda procesate de worker (procesare_notificare: validare, email, INSERT in notifications)
+    cu WORKER_THREADS = 1 / 2 / 4 / 8, ca in modul concurrent, cu un server SMTP local (aiosmtpd, pip install
+    aiosmtpd) care raspunde dupa latenta_smtp secunde, ca un server SMTP real (Mailhog raspunde aproape imediat)
+    Mesajele sunt remindere (fara PDF / MinIO) pentru o programare existenta; se ruleaza cu worker-ul oprit,
+    notificarile de test se sterg la final
+    """
+    marcaj = 'benchmark-worker'
+
+    class Numarator:
+        primite = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            await asyncio.sleep(latenta_smtp)
+            Numarator.primite += 1
+            return '250 OK'
+
+    with app.app_context():
+        programare = db.session.query(Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.start_time,
+            Appointment.end_time).order_by(Appointment.id).first()
+        if not programare:
+            raise RuntimeError("Benchmark-ul are nevoie de cel putin o programare in BD")
+        mesaj = json.dumps({
+            'schema_version': 2, 'user_id': programare.patient_id, 'appointment_id': programare.id,
+            'patient_name': 'Pacient Benchmark', 'patient_email': 'pacient.benchmark@clinica.com',
+            'status': 'REMINDER', 'type': 'REMINDER', 'message': marcaj,
+            'start_time': programare.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': programare.end_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'doctor_id': programare.doctor_id, 'doctor_name': None, 'specialization': None,
+            'cabinet_id': None, 'cabinet': None, 'location': None})
+
+    controller = Controller(Numarator(), hostname='127.0.0.1', port=8025)
+    controller.start()
+    try:
+        for fire in FIRE:
+            Numarator.primite = 0
+            inceput = time.perf_counter()
+            # fara mesajele "Procesez mailul" / "Email trimis" ale worker-ului in timpul masuratorii
+            with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=fire) as executor:
+                list(executor.map(lambda _: procesare_notificare(mesaj), range(nr_mesaje)))
+            durata = time.perf_counter() - inceput
+            print(f"WORKER_THREADS={fire}: {Numarator.primite} emailuri in {durata:.2f} s "
+                  f"({nr_mesaje / durata:.0f} mesaje/s)")
+    finally:
+        controller.stop()
+        with app.app_context():
+            Notification.query.filter(Notification.message == marcaj).delete()
+            db.session.commit()
+
+if __name__ == '__main__':
+    """
+    BENCHMARK_BD_TEST=1 python benchmark_worker.py 400 0.05
+    (nr de mesaje pentru fiecare nr de fire, latenta serverului SMTP in secunde)
+    """
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 400, float(sys.argv[2]) if len(sys.argv) > 2 else 0.05)
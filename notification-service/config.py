@@ -4,18 +4,72 @@ class Config:
     # BD
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'postgresql://scd:scd@db:5432/clinica')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # cererile web mai lente de atat (ms) apar in log cu durata si nr de interogari SQL (0 = oprit)
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 1000))
+
+    # pool-ul de conexiuni la BD (clinic_core/bd.py): fiecare tip de proces are un profil (web / worker /
+    # scheduler), variabilele de mai jos il suprascriu cand sunt setate; dimensionarea e explicata in README
+    DB_POOL_SIZE = os.getenv('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = os.getenv('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT')
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE')
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING')
+    DB_STATEMENT_TIMEOUT_MS = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    DB_APPLICATION_NAME = os.getenv('DB_APPLICATION_NAME')
+    # 1 cand conexiunile trec prin PgBouncer in modul transaction
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0')
+    # cat asteapta (secunde) la pornire ca jobul de migrare sa aduca schema la revizia ceruta
+    DB_READY_TIMEOUT = int(os.getenv('DB_READY_TIMEOUT', 60))
 
     # Keycloak
     KEYCLOAK_URL = os.getenv('KEYCLOAK_URL', 'http://keycloak:8080')
     KEYCLOAK_REALM = os.getenv('KEYCLOAK_REALM', 'medical-clinica')
+    # cheile de semnare din JWKS: reimprospatare in fundal (secunde), pauza minima intre doua cereri
+    # pentru un kid necunoscut si copia locala folosita la pornire
+    KEYCLOAK_JWKS_REFRESH = int(os.getenv('KEYCLOAK_JWKS_REFRESH', 300))
+    KEYCLOAK_JWKS_MIN_REFRESH = int(os.getenv('KEYCLOAK_JWKS_MIN_REFRESH', 30))
+    KEYCLOAK_JWKS_SNAPSHOT = os.getenv('KEYCLOAK_JWKS_SNAPSHOT', '/tmp/keycloak_jwks.json')
+
+    # cache-ul de identitati (user_id, rol, doctor_id) din clinic_core/auth.py: TTL in secunde (0 = oprit), nr maxim
+    # de intrari si exchange-ul fanout pe care user-service anunta modificarile userilor
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 60))
+    IDENTITY_CACHE_MAX = int(os.getenv('IDENTITY_CACHE_MAX', 10000))
+    USER_EVENTS_EXCHANGE = os.getenv('USER_EVENTS_EXCHANGE', 'user_events')
+    RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
+    # modul worker-ului: 'single' (cate un mesaj pe rand, pe firul conexiunii) sau 'concurrent' (WORKER_THREADS
+    # fire care genereaza PDF-ul, urca in MinIO si trimit emailul in paralel, vezi worker.procesare_in_fir)
+    WORKER_MODE = os.getenv('WORKER_MODE', 'single')
+    # nr maxim de notificari procesate odata (= sesiuni SMTP deschise odata, de pus sub limita serverului SMTP)
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', 4))
+    # cate mesaje primeste worker-ul de la RabbitMQ inainte sa le confirme (in modul concurrent, minim WORKER_THREADS)
+    WORKER_PREFETCH = int(os.getenv('WORKER_PREFETCH', 8))
 
     # SMTP
     SMTP_HOST = os.getenv('SMTP_HOST', 'mailhog')
     SMTP_PORT = int(os.getenv('SMTP_PORT', 1025))
     SMTP_FROM = os.getenv('SMTP_FROM', 'noreply@clinica.com') 
+    # conexiunile SMTP pastrate deschise pe proces (utils/email_handler.py): cel mult SMTP_POOL_SIZE odata,
+    # de pus cel putin cat WORKER_THREADS; autentificarea si STARTTLS doar daca serverul le cere (Mailhog nu)
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 4))
+    SMTP_USER = os.getenv('SMTP_USER')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+    SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '0').lower() in ('1', 'true', 'yes')
+    SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', 30))
 
     # MinIO
     MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio:9000')
     MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
     MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
-    MINIO_BUCKET = 'confirmations'
\ No newline at end of file
+    MINIO_BUCKET = 'confirmations'
+    # clientul MinIO e unul pe proces (utils/minIO_proc.py): conexiuni HTTP pastrate deschise, timeout de citire (s),
+    # reincercarile upload-ului (pauza porneste de la MINIO_RETRY_BACKOFF secunde si se dubleaza) si firele pe care
+    # ruleaza upload-urile cat timp worker-ul construieste emailul
+    MINIO_POOL_SIZE = int(os.getenv('MINIO_POOL_SIZE', 8))
+    MINIO_TIMEOUT = int(os.getenv('MINIO_TIMEOUT', 30))
+    MINIO_UPLOAD_RETRIES = int(os.getenv('MINIO_UPLOAD_RETRIES', 3))
+    MINIO_RETRY_BACKOFF = float(os.getenv('MINIO_RETRY_BACKOFF', 0.5))
+    MINIO_UPLOAD_THREADS = int(os.getenv('MINIO_UPLOAD_THREADS', 4))
+    # PDF-urile de confirmare (utils/pdf_generator.py): cat timp (s) se pastreaza datele de afisare ale unui
+    # doctor / cabinet fara sa se citeasca din nou din BD si cate intrari se tin cel mult
+    PDF_CACHE_TTL = int(os.getenv('PDF_CACHE_TTL', 300))
+    PDF_CACHE_MAX = int(os.getenv('PDF_CACHE_MAX', 1000))
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
-from bd_struc_flask import db, Notification, NotificationType, NotificationStatus, User, Appointment
-from utils.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token
+from clinic_core.models import db, Notification, NotificationType, NotificationStatus, User, Appointment
+from clinic_core.auth import require_auth, require_role, get_token_from_header, get_user_info_from_token
 from utils.email_handler import send_email_smtp
 from datetime import datetime
 
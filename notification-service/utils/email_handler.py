@@ -1,12 +1,146 @@
+import os
+import time
+import queue
+import socket
 import smtplib
+import threading
 from email.message import EmailMessage
 from flask import current_app
 
-def send_email_smtp(to_email, subiect, body, attachment_data=None, attachment_name="document.pdf"):
+# erorile dupa care conexiunea nu mai e buna (serverul a inchis-o, timeout, retea)
+# nu tot OSError: SMTPException e subclasa de OSError, iar un mesaj refuzat de server (SMTPRecipientsRefused,
+# SMTPDataError, SMTPSenderRefused) nu inseamna ca a cazut conexiunea si nu trebuie trimis din nou
+ERORI_CONEXIUNE = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError,
+                   socket.timeout)
+
+class PoolSMTP:
+    """
+    Conexiuni SMTP pastrate deschise intre emailuri, in loc de o conexiune noua (TCP + EHLO + STARTTLS + login)
+    la fiecare mesaj. Cel mult `marime` conexiuni folosite odata: un fir care nu gaseste una libera asteapta
+    Inainte de refolosire conexiunea e verificata cu NOOP, iar daca a cazut intre timp (serverul inchide
+    conexiunile inactive) se deschide alta; pe o conexiune se pot trimite mai multe mesaje la rand (trimitere)
+    """
+
+    def __init__(self, host, port, marime, user=None, parola=None, starttls=False, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.parola = parola
+        self.starttls = starttls
+        self.timeout = timeout
+        self.libere = queue.LifoQueue()
+        self.locuri = threading.BoundedSemaphore(marime)
+        self.pid = os.getpid()
+
+    def _conectare(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.parola)
+        return server
+
+    def _inchidere(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _luare(self):
+        # o conexiune libera (ultima folosita, cea mai probabil inca deschisa) sau una noua
+        while True:
+            try:
+                server = self.libere.get_nowait()
+            except queue.Empty:
+                return self._conectare()
+
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except ERORI_CONEXIUNE:
+                # conexiunea a cazut cat a stat in pool, se ia urmatoarea / se deschide alta
+                pass
+            except OSError as e:
+                # alta eroare pe conexiune (de ex. SSL): nu o mai refolosesc, mesajul inca nu a plecat
+                print(f"Conexiune SMTP din pool inchisa dupa NOOP: {e}")
+            self._inchidere(server)
+
+    def trimitere(self, mesaje):
+        """
+        Trimite mesajele pe aceeasi conexiune, in ordine; intoarce pentru fiecare True / False
+        Daca a cazut conexiunea, se reconecteaza si reincearca o data mesajul; un mesaj refuzat de server
+        (destinatar invalid etc.) e doar marcat False, conexiunea ramane buna pentru urmatoarele
+        La orice alta eroare (de ex. SSL) conexiunea se inchide si mesajul e marcat False, fara sa fie trimis
+        din nou (nu se stie daca serverul l-a primit deja)
+        """
+        rezultate = []
+        self.locuri.acquire()
+        server = None
+        try:
+            for mesaj in mesaje:
+                for incercare in range(2):
+                    try:
+                        if server is None:
+                            server = self._luare()
+                        server.send_message(mesaj)
+                        rezultate.append(True)
+                        break
+                    except ERORI_CONEXIUNE as e:
+                        if server is not None:
+                            self._inchidere(server)
+                            server = None
+                        if incercare == 1:
+                            print(f"Eroare la trimiterea emailului catre {mesaj['To']}: {e}")
+                            rezultate.append(False)
+                    except smtplib.SMTPException as e:
+                        print(f"Eroare la trimiterea emailului catre {mesaj['To']}: {e}")
+                        rezultate.append(False)
+                        break
+                    except OSError as e:
+                        if server is not None:
+                            self._inchidere(server)
+                            server = None
+                        print(f"Eroare la trimiterea emailului catre {mesaj['To']}: {e}")
+                        rezultate.append(False)
+                        break
+        finally:
+            if server is not None:
+                self.libere.put(server)
+            self.locuri.release()
+
+        return rezultate
+
+    def inchidere(self):
+        while True:
+            try:
+                self._inchidere(self.libere.get_nowait())
+            except queue.Empty:
+                return
+
+
+# un singur pool pe proces pentru fiecare server SMTP
+pooluri = {}
+pooluri_lock = threading.Lock()
+
+def get_pool_smtp(config):
     """
-    Trimite email folosind serverul SMTP configurat (Mailhog)
+    Pool-ul procesului pentru serverul SMTP din config, creat la primul apel
+    (si din nou dupa fork, conexiunile procesului parinte nu se folosesc in copil)
     """
+    cheie = (config['SMTP_HOST'], config['SMTP_PORT'])
+    with pooluri_lock:
+        pool = pooluri.get(cheie)
+        if pool is None or pool.pid != os.getpid():
+            pool = PoolSMTP(config['SMTP_HOST'], config['SMTP_PORT'], config['SMTP_POOL_SIZE'],
+                user=config.get('SMTP_USER'), parola=config.get('SMTP_PASSWORD'),
+                starttls=config.get('SMTP_STARTTLS', False), timeout=config.get('SMTP_TIMEOUT', 30))
+            pooluri[cheie] = pool
+        return pool
 
+def construire_email(to_email, subiect, body, attachment_data=None, attachment_name="document.pdf"):
     mesaj = EmailMessage()
     mesaj.set_content(body)
     mesaj['Subject'] = subiect
@@ -21,13 +155,95 @@ def send_email_smtp(to_email, subiect, body, attachment_data=None, attachment_na
             subtype='pdf',
             filename=attachment_name
         )
+    return mesaj
 
+def trimitere_email(mesaj):
+    """
+    Trimite un email deja construit (construire_email) pe o conexiune din pool-ul procesului
+    """
     try:
-        with smtplib.SMTP(current_app.config['SMTP_HOST'], current_app.config['SMTP_PORT']) as server:
-            server.send_message(mesaj)
-        print(f"Email trimis cu succes catre {to_email}")
-        return True
-
+        succes = get_pool_smtp(current_app.config).trimitere([mesaj])[0]
     except Exception as e:
         print(f"Eroare la trimiterea emailului: {e}")
-        return False
\ No newline at end of file
+        return False
+
+    if succes:
+        print(f"Email trimis cu succes catre {mesaj['To']}")
+    return succes
+
+def send_email_smtp(to_email, subiect, body, attachment_data=None, attachment_name="document.pdf"):
+    """
+    Trimite email folosind serverul SMTP configurat (Mailhog), pe o conexiune din pool-ul procesului
+    """
+    return trimitere_email(construire_email(to_email, subiect, body, attachment_data, attachment_name))
+
+def send_emails_smtp(emailuri):
+    """
+    Trimite mai multe emailuri (dictionare cu argumentele lui send_email_smtp) pe aceeasi conexiune
+    Intoarce lista de True / False, in ordinea emailurilor
+    """
+    mesaje = [construire_email(**email) for email in emailuri]
+
+    try:
+        return get_pool_smtp(current_app.config).trimitere(mesaje)
+    except Exception as e:
+        print(f"Eroare la trimiterea emailurilor: {e}")
+        return [False] * len(mesaje)
+
+
+if __name__ == '__main__':
+    """
+    Benchmark: N emailuri catre un server SMTP local (aiosmtpd, pip install aiosmtpd), trimise de 4 fire
+    compar o conexiune noua la fiecare email (varianta veche) cu pool-ul si cu trimiterea pe loturi
+    python utils/email_handler.py
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from aiosmtpd.controller import Controller
+    from flask import Flask
+
+    class Numarator:
+        primite = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            Numarator.primite += 1
+            return '250 OK'
+
+    controller = Controller(Numarator(), hostname='127.0.0.1', port=8025)
+    controller.start()
+
+    app = Flask(__name__)
+    app.config.update(SMTP_HOST='127.0.0.1', SMTP_PORT=8025, SMTP_FROM='noreply@clinica.com', SMTP_POOL_SIZE=4)
+
+    def email(i):
+        return {'to_email': f"pacient{i}@clinica.com", 'subiect': 'Benchmark', 'body': 'Reminder programare'}
+
+    def conexiune_noua(i):
+        with app.app_context():
+            with smtplib.SMTP(app.config['SMTP_HOST'], app.config['SMTP_PORT']) as server:
+                server.send_message(construire_email(**email(i)))
+
+    def cu_pool(i):
+        with app.app_context():
+            send_email_smtp(**email(i))
+
+    def pe_loturi(i):
+        with app.app_context():
+            send_emails_smtp([email(i * 10 + j) for j in range(10)])
+
+    import io
+    import contextlib
+    nr = 1000
+
+    try:
+        for nume, functie, sarcini in (('conexiune noua / email', conexiune_noua, nr),
+                                       ('pool', cu_pool, nr),
+                                       ('pool, loturi de 10', pe_loturi, nr // 10)):
+            Numarator.primite = 0
+            inceput = time.perf_counter()
+            # fara mesajele "Email trimis" din send_email_smtp in timpul masuratorii
+            with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(functie, range(sarcini)))
+            durata = time.perf_counter() - inceput
+            print(f"{nume}: {Numarator.primite} emailuri in {durata:.2f} s ({Numarator.primite / durata:.0f} emailuri/s)")
+    finally:
+        controller.stop()
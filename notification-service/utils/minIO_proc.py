@@ -1,20 +1,66 @@
 from minio import Minio
-from minio.commonconfig import GOVERNANCE
+from minio.error import S3Error, ServerError
 from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
 import io
+import os
 import json
+import time
+import threading
+import urllib3
 
-def minio_client():
-    return Minio(
-        current_app.config['MINIO_ENDPOINT'],
-        access_key=current_app.config['MINIO_ACCESS_KEY'],
-        secret_key=current_app.config['MINIO_SECRET_KEY'],
-        secure=False
-    )
+# clientul, bucket-ul pregatit si executorul pentru upload-uri, cate unul pe proces
+clienti = {}
+buckete_pregatite = set()
+executor_upload = None
+minio_lock = threading.Lock()
+pid_proces = os.getpid()
 
-def upload_file_to_minio(file_data, filename, content_type='application/pdf'):
-    client = minio_client()
-    bucket = current_app.config['MINIO_BUCKET']
+def resetare_dupa_fork():
+    # dupa fork (gunicorn) conexiunile si firele sunt ale procesului parinte
+    global executor_upload, pid_proces
+    if pid_proces != os.getpid():
+        clienti.clear()
+        buckete_pregatite.clear()
+        executor_upload = None
+        pid_proces = os.getpid()
+
+def minio_client(config=None):
+    """
+    Clientul MinIO al procesului, cu un pool urllib3 comun (MINIO_POOL_SIZE conexiuni HTTP pastrate
+    deschise) in loc de un client si o conexiune noua la fiecare upload
+    """
+    config = config or current_app.config
+    cheie = (config['MINIO_ENDPOINT'], config['MINIO_ACCESS_KEY'])
+
+    with minio_lock:
+        resetare_dupa_fork()
+        if cheie not in clienti:
+            http_client = urllib3.PoolManager(
+                maxsize=config['MINIO_POOL_SIZE'],
+                timeout=urllib3.Timeout(connect=5, read=config['MINIO_TIMEOUT']),
+                # reincercarile pentru erorile de retea / 5xx le face upload_file_to_minio, cu pauza intre ele
+                retries=False)
+            clienti[cheie] = Minio(
+                config['MINIO_ENDPOINT'],
+                access_key=config['MINIO_ACCESS_KEY'],
+                secret_key=config['MINIO_SECRET_KEY'],
+                secure=False,
+                http_client=http_client
+            )
+        return clienti[cheie]
+
+def pregatire_bucket(config=None):
+    """
+    Creeaza bucket-ul daca nu exista si ii pune politica de citire publica, o singura data pe proces
+    (la pornirea worker-ului sau la primul upload), nu la fiecare PDF
+    """
+    config = config or current_app.config
+    bucket = config['MINIO_BUCKET']
+    if bucket in buckete_pregatite:
+        return
+
+    client = minio_client(config)
 
     # verific daca bucket-ul exista si il cream daca nu exista
     if not client.bucket_exists(bucket):
@@ -35,12 +81,68 @@ def upload_file_to_minio(file_data, filename, content_type='application/pdf'):
 
     client.set_bucket_policy(bucket, json.dumps(politica))
 
-    # convertim bytes in stream
-    data_stream = io.BytesIO(file_data)
-    
-    # incarcam fisierul in MinIO
-    client.put_object(bucket, filename, data_stream, len(file_data), content_type=content_type)
+    with minio_lock:
+        buckete_pregatite.add(bucket)
+
+def url_public(filename, config=None):
+    # link public catre fisierul pdf, se stie dinainte de upload
+    config = config or current_app.config
+    return f"http://localhost:9000/{config['MINIO_BUCKET']}/{filename}"
+
+# raspunsurile S3 dupa care upload-ul se poate reincerca
+ERORI_TEMPORARE = ('InternalError', 'SlowDown', 'ServiceUnavailable', 'RequestTimeout')
+
+def upload_file_to_minio(file_data, filename, content_type='application/pdf', config=None):
+    """
+    Urca fisierul in bucket si intoarce link-ul public
+    Erorile de retea si raspunsurile 5xx / ERORI_TEMPORARE se reincearca de MINIO_UPLOAD_RETRIES ori,
+    cu pauza dubla de la o incercare la alta (MINIO_RETRY_BACKOFF secunde prima data)
+    """
+    config = config or current_app.config
+    bucket = config['MINIO_BUCKET']
+    incercari = config['MINIO_UPLOAD_RETRIES']
+    pauza = config['MINIO_RETRY_BACKOFF']
+
+    for incercare in range(incercari + 1):
+        try:
+            pregatire_bucket(config)
+            # incarcam fisierul in MinIO, din bytes facuti stream
+            minio_client(config).put_object(bucket, filename, io.BytesIO(file_data), len(file_data),
+                                            content_type=content_type)
+            return url_public(filename, config)
+
+        except S3Error as e:
+            if e.code == 'NoSuchBucket':
+                # bucket-ul a fost sters intre timp, il pregatesc din nou la urmatoarea incercare
+                with minio_lock:
+                    buckete_pregatite.discard(bucket)
+            elif e.code not in ERORI_TEMPORARE:
+                raise
+            eroare = e
+
+        except (ServerError, urllib3.exceptions.HTTPError, OSError) as e:
+            eroare = e
+
+        if incercare < incercari:
+            print(f"Upload MinIO {filename} esuat ({eroare}), reincerc in {pauza} s")
+            time.sleep(pauza)
+            pauza *= 2
+
+    raise eroare
+
+def upload_in_fundal(file_data, filename, content_type='application/pdf'):
+    """
+    Porneste upload-ul pe executorul dedicat (MINIO_UPLOAD_THREADS fire) si intoarce un Future cu link-ul,
+    ca apelantul sa pregateasca intre timp emailul
+    """
+    global executor_upload
+    config = current_app.config
+
+    with minio_lock:
+        resetare_dupa_fork()
+        if executor_upload is None:
+            executor_upload = ThreadPoolExecutor(max_workers=config['MINIO_UPLOAD_THREADS'],
+                                                 thread_name_prefix='upload-minio')
+        executor = executor_upload
 
-    # link public catre fisierul pdf
-    url = f"http://localhost:9000/{bucket}/{filename}"
-    return url
\ No newline at end of file
+    return executor.submit(upload_file_to_minio, file_data, filename, content_type, config)
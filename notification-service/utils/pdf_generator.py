@@ -1,43 +1,135 @@
+import re
+import time
+import zlib
+import string
+import threading
+from collections import OrderedDict, namedtuple
 from fpdf import FPDF
-from bd_struc_flask import db, Appointment, Cabinet, Doctor, User
+from flask import current_app
+from clinic_core.models import db, Cabinet, Doctor, User, Specialization
 from datetime import datetime
 
-def generate_confirmation_pdf(data):
-    pdf = FPDF()
+# datele de afisare ale doctorilor si cabinetelor, pe proces: ('doctor' | 'cabinet', id) -> (expira_la, date)
+# se schimba rar, asa ca PDF-urile nu mai citesc BD-ul decat la prima folosire / dupa PDF_CACHE_TTL secunde
+DateDoctor = namedtuple('DateDoctor', ['nume', 'specializare'])
+DateCabinet = namedtuple('DateCabinet', ['nume', 'locatie'])
+date_afisare = OrderedDict()
+date_afisare_lock = threading.Lock()
+
+# sabloanele PDF (layout-ul static randat o data cu FPDF), cate unul pentru fiecare combinatie
+# (are doctor, are cabinet), pentru ca liniile optionale muta tot ce e sub ele
+sabloane = {}
+sabloane_lock = threading.Lock()
+
+def escape_pdf(text):
+    # ca FPDF._escape: caracterele speciale din sirurile PDF
+    return text.replace('\\', '\\\\').replace(')', '\\)').replace('(', '\\(').replace('\r', '\\r')
+
+def unescape_pdf(text):
+    # inversul lui escape_pdf, pentru sirurile citite dintr-un PDF
+    speciale = {'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'f': '\f'}
+    return re.sub(r'\\(.)', lambda m: speciale.get(m.group(1), m.group(1)), text)
+
+def citire_pdf(document):
+    """
+    Citeste inapoi un PDF (doar cat scrie FPDF: obiecte directe, fluxuri FlateDecode, text cu Tj) si verifica
+    structura: antetul, startxref, ca fiecare intrare din xref arata spre obiectul ei si lungimea fluxurilor
+    Intoarce (nr de pagini, textul paginilor), ValueError daca documentul e stricat
+    """
+    if not document.startswith(b'%PDF-'):
+        raise ValueError("Lipseste antetul %PDF")
+    final = re.search(rb'startxref\n(\d+)\n%%EOF\n?$', document)
+    if not final:
+        raise ValueError("Lipseste startxref / %%EOF")
+
+    inceput_xref = int(final.group(1))
+    antet_xref = re.compile(rb'xref\n0 (\d+)\n').match(document, inceput_xref)
+    if not antet_xref:
+        raise ValueError("startxref nu arata spre tabelul xref")
+    nr_obiecte = int(antet_xref.group(1))
+    intrari = re.compile(rb'(\d{10}) (\d{5}) ([nf]) \n').findall(document, antet_xref.end())[:nr_obiecte]
+    if len(intrari) != nr_obiecte:
+        raise ValueError("Tabelul xref e incomplet")
+
+    obiecte = {}
+    for nr, (pozitie, _, tip) in enumerate(intrari):
+        if tip != b'n':
+            continue
+        pozitie = int(pozitie)
+        if not document.startswith(f"{nr} 0 obj\n".encode(), pozitie):
+            raise ValueError(f"Intrarea din xref pentru obiectul {nr} nu arata spre el")
+        obiecte[nr] = document[pozitie:document.index(b'endobj', pozitie)]
+
+    def flux(nr):
+        obiect = obiecte.get(nr)
+        dictionar = re.search(rb'<<(/Filter /FlateDecode )?/Length (\d+)>>\nstream\n', obiect or b'')
+        if not dictionar:
+            raise ValueError(f"Obiectul {nr} nu e un flux")
+        continut = obiect[dictionar.end():dictionar.end() + int(dictionar.group(2))]
+        if not obiect.startswith(b'\nendstream', dictionar.end() + len(continut)):
+            raise ValueError(f"/Length gresit pentru obiectul {nr}")
+        try:
+            return zlib.decompress(continut) if dictionar.group(1) else continut
+        except zlib.error as e:
+            raise ValueError(f"Fluxul obiectului {nr} nu se poate decomprima: {e}")
+
+    pagini = [obiect for obiect in obiecte.values() if re.search(rb'/Type /Page\n', obiect)]
+    numarate = re.search(rb'/Type /Pages\n.*?/Count (\d+)', b''.join(obiecte.values()), re.S)
+    if not numarate or int(numarate.group(1)) != len(pagini):
+        raise ValueError("/Count din /Pages nu corespunde cu paginile")
+
+    texte = []
+    for pagina in pagini:
+        referinta = re.search(rb'/Contents (\d+) 0 R', pagina)
+        if not referinta:
+            raise ValueError("Pagina nu are /Contents")
+        continut = flux(int(referinta.group(1))).decode('latin-1')
+        texte.extend(unescape_pdf(t) for t in re.findall(r'\(((?:\\.|[^\\)])*)\) Tj', continut))
+    return len(pagini), '\n'.join(texte)
+
+def desenare_confirmare(pdf, cu_doctor, cu_cabinet, valori=None, centrate=None):
+    """
+    Layout-ul PDF-ului de confirmare: cu valori se deseneaza documentul complet, fara valori raman {camp}
+    in text (pentru sablon), iar in centrate se tine minte ce trebuie ca x-ul celulelor centrate
+    sa se poata calcula la stampare
+    """
+    def text(sir):
+        return sir.format(**valori) if valori is not None else sir
+
+    def celula_centrata(camp, latime, inaltime, sir):
+        if centrate is not None:
+            centrate[camp] = (pdf.x, latime, pdf.current_font['cw'], pdf.font_size, sir)
+        pdf.cell(latime, inaltime, txt=text(sir), ln=1, align='C')
+
     pdf.add_page()
     pdf.set_font("Arial", size=12)
 
-
     pdf.set_font("Arial", 'B', 16)
-    pdf.cell(200, 10, txt=f"CONFIRMARE PROGRAMARE SLOT - ID.{data.get('appointment_id', 'N/A')}", ln=1, align='C')
+    celula_centrata('appointment_id', 200, 10, "CONFIRMARE PROGRAMARE SLOT - ID.{appointment_id}")
     pdf.ln(10)
 
     # detalii programare
     pdf.set_font("Arial", size=12)
-    pdf.cell(200, 8, txt=f"Nume pacient: {data.get('patient_name', 'N/A')}", ln=1)
-    pdf.cell(200, 8, txt=f"Email pacient: {data.get('patient_email', 'N/A')}", ln=1)
+    pdf.cell(200, 8, txt=text("Nume pacient: {patient_name}"), ln=1)
+    pdf.cell(200, 8, txt=text("Email pacient: {patient_email}"), ln=1)
     pdf.ln(5)
 
-    info_doctor = Doctor.query.get(data.get('doctor_id'))
-    info_user_doctor = User.query.get(info_doctor.user_id) if info_doctor else None
-    info_specializare = info_doctor.specialization if info_doctor else None
-    if info_doctor:
-        pdf.cell(200, 8, txt=f"Doctor: Dr. {info_user_doctor.full_name} ({info_specializare.name})", ln=1)
+    if cu_doctor:
+        pdf.cell(200, 8, txt=text("Doctor: {doctor}"), ln=1)
 
-    info_cabinet = Cabinet.query.get(data.get('cabinet_id'))
-    if info_cabinet:
-        pdf.cell(200, 8, txt=f"Cabinet: {info_cabinet.name}, Locatie: {info_cabinet.location}", ln=1)
+    if cu_cabinet:
+        pdf.cell(200, 8, txt=text("Cabinet: {cabinet}, Locatie: {locatie}"), ln=1)
         pdf.ln(5)
 
     #  setare culoare
     pdf.set_text_color(0, 102, 204)  # albastru
-    pdf.cell(200, 10, txt=f"Data si ora la care incepe programarea: {data.get('start_time', 'N/A')}", ln=1)
-    pdf.cell(200, 10, txt=f"Data si ora la care se termina programarea: {data.get('end_time', 'N/A')}", ln=1)
+    pdf.cell(200, 10, txt=text("Data si ora la care incepe programarea: {start_time}"), ln=1)
+    pdf.cell(200, 10, txt=text("Data si ora la care se termina programarea: {end_time}"), ln=1)
     pdf.set_text_color(0, 0, 0)
 
     # status
     pdf.set_font("Arial", 'B', 12)
-    pdf.cell(200, 10, txt=f"Status: {data.get('status', 'CONFIRMAT')}", ln=1)
+    pdf.cell(200, 10, txt=text("Status: {status}"), ln=1)
 
     # info
     pdf.ln(20)
@@ -48,7 +140,269 @@ def generate_confirmation_pdf(data):
     # footer - data la care s-a generat PDF-ul
     pdf.set_y(265)
     pdf.set_font("Arial", size=8)
-    pdf.cell(200, 10, txt=f"Document generat la data de: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}", align='C')
+    celula_centrata('generat_la', 200, 10, "Document generat la data de: {generat_la}")
+
+class SablonConfirmare:
+    """
+    PDF-ul de confirmare randat o singura data cu FPDF, cu {camp} in locul valorilor, din care se pastreaza
+    continutul paginii (textul cu operatorii PDF) si restul documentului (fonturi, catalog, xref)
+    La fiecare confirmare (stampare) se completeaza doar campurile in continutul paginii, se comprima si
+    se recalculeaza xref-ul, fara sa mai treaca prin FPDF (cell, fonturi, asamblarea documentului)
+    Sablonul depinde de cum scrie FPDF documentul, asa ca la creare se stampeaza o data cu valori de proba
+    si PDF-ul se citeste inapoi (citire_pdf); daca nu iese la fel, constructorul ridica ValueError
+    """
+
+    def __init__(self, cu_doctor, cu_cabinet):
+        pdf = FPDF()
+        self.centrate = {}
+        desenare_confirmare(pdf, cu_doctor, cu_cabinet, centrate=self.centrate)
+        self.k = pdf.k
+
+        continut = pdf.pages[1]
+        for camp, (x, latime, cw, marime, text) in self.centrate.items():
+            # latimea textului fix din jurul campului se calculeaza o data, la stampare se adauga doar valoarea
+            self.centrate[camp] = (x, latime, cw, marime, sum(cw.get(c, 0) for c in text.replace(f"{{{camp}}}", '')))
+            # x-ul calculat de FPDF pentru {camp} se inlocuieste cu {x_camp}, calculat la stampare
+            continut = re.sub(r'BT [\d.]+ ([\d.]+) Td \(([^)]*\{' + camp + r'\}[^)]*)\) Tj ET',
+                              lambda m: f"BT {{x_{camp}}} {m.group(1)} Td ({m.group(2)}) Tj ET", continut)
+        self.continut = continut
+
+        document = pdf.output(dest='S').encode('latin-1')
+        # obiectele documentului (nr -> pozitie) si obiectul cu continutul paginii
+        self.pozitii = {int(m.group(1)): m.start() for m in re.finditer(rb'(?m)^(\d+) 0 obj$', document)}
+        flux = re.search(rb'(?m)^(\d+) 0 obj\n<<(/Filter /FlateDecode )?/Length (\d+)>>\nstream\n', document)
+        self.nr_continut = int(flux.group(1))
+        sfarsit_flux = document.index(b'\nendstream\nendobj\n', flux.end()) + len(b'\nendstream\nendobj\n')
+        inceput_xref = document.rindex(b'\nxref\n') + 1
+
+        self.inceput = document[:flux.start()]
+        self.rest = document[sfarsit_flux:inceput_xref]
+        self.dupa_continut = sfarsit_flux
+        self.trailer = document[document.index(b'trailer\n', inceput_xref):document.rindex(b'startxref\n')]
+        data_creare = re.search(rb'/CreationDate \(D:(\d{14})\)', self.rest)
+        self.pozitie_data = (data_creare.start(1), data_creare.end(1))
+
+        # intrarile din xref: pentru obiectele de dinaintea continutului (nu se muta) gata scrise, pentru
+        # celelalte pozitia din sablon, la care se adauga la stampare diferenta de lungime
+        self.xref_antet = f"xref\n0 {len(self.pozitii) + 1}\n0000000000 65535 f \n".encode()
+        self.xref_intrari = []
+        for nr in range(1, len(self.pozitii) + 1):
+            pozitie = self.pozitii[nr]
+            self.xref_intrari.append(pozitie if pozitie >= self.dupa_continut else f"{pozitie:010d} 00000 n \n".encode())
+
+        self.verificare()
+
+    def verificare(self):
+        campuri = {camp for _, camp, _, _ in string.Formatter().parse(self.continut) if camp and not camp.startswith('x_')}
+        proba = {camp: f"proba {camp} (\\)" for camp in campuri}
+        nr_pagini, text = citire_pdf(self.stampare(proba))
+        if nr_pagini != 1 or any(valoare not in text for valoare in proba.values()):
+            raise ValueError("PDF-ul stampat pe sablon nu contine campurile completate")
+
+    def stampare(self, valori):
+        """
+        Documentul PDF (bytes) cu valorile date (text) in locul campurilor
+        """
+        campuri = {camp: escape_pdf(valoare) for camp, valoare in valori.items()}
+        for camp, (x, latime, cw, marime, latime_fixa) in self.centrate.items():
+            # ca in FPDF.cell cu align='C': (latimea celulei - latimea textului) / 2
+            latime_text = (latime_fixa + sum(cw.get(c, 0) for c in valori[camp])) * marime / 1000.0
+            campuri[f"x_{camp}"] = f"{(x + (latime - latime_text) / 2.0) * self.k:.2f}"
+
+        # nivelul 1: continutul are ~1 KB, nivelul implicit il face cu cativa zeci de bytes mai mic dar dureaza mai mult
+        flux = zlib.compress(self.continut.format(**campuri).encode('latin-1'), 1)
+        obiect = (f"{self.nr_continut} 0 obj\n<</Filter /FlateDecode /Length {len(flux)}>>\nstream\n".encode('latin-1')
+                  + flux + b"\nendstream\nendobj\n")
+
+        # obiectele de dupa continut se muta cu diferenta de lungime
+        diferenta = len(self.inceput) + len(obiect) - self.dupa_continut
+        xref = [self.xref_antet] + [f"{intrare + diferenta:010d} 00000 n \n".encode() if type(intrare) is int else intrare
+                                    for intrare in self.xref_intrari]
+
+        # data crearii din /Info are lungime fixa, se inlocuieste pe loc
+        inceput_data, sfarsit_data = self.pozitie_data
+        rest = self.rest[:inceput_data] + datetime.now().strftime('%Y%m%d%H%M%S').encode() + self.rest[sfarsit_data:]
+
+        inceput_xref = len(self.inceput) + len(obiect) + len(rest)
+        return b"".join([self.inceput, obiect, rest] + xref + [self.trailer, f"startxref\n{inceput_xref}\n%%EOF\n".encode()])
+
+def get_sablon(cu_doctor, cu_cabinet):
+    """
+    Sablonul pentru combinatia data, creat la prima folosire; None daca sablonul nu trece verificarea
+    (de ex. alta versiune de FPDF decat cea din requirements.txt), atunci PDF-urile se deseneaza cu FPDF
+    """
+    cheie = (cu_doctor, cu_cabinet)
+    if cheie not in sabloane:
+        with sabloane_lock:
+            if cheie not in sabloane:
+                try:
+                    sabloane[cheie] = SablonConfirmare(cu_doctor, cu_cabinet)
+                except Exception as e:
+                    print(f"Sablonul PDF de confirmare nu se poate folosi ({e}), PDF-urile se genereaza cu FPDF")
+                    sabloane[cheie] = None
+    return sabloane[cheie]
+
+# marcheaza in din_cache o intrare care lipseste / a expirat (un doctor / cabinet inexistent e tinut in cache ca None)
+LIPSA = object()
+
+def din_cache(cheie):
+    with date_afisare_lock:
+        intrare = date_afisare.get(cheie)
+        if intrare is not None and intrare[0] > time.monotonic():
+            return intrare[1]
+    return LIPSA
+
+def salvare_in_cache(valori):
+    ttl = current_app.config.get('PDF_CACHE_TTL', 300)
+    with date_afisare_lock:
+        for cheie, date in valori.items():
+            date_afisare[cheie] = (time.monotonic() + ttl, date)
+            date_afisare.move_to_end(cheie)
+        while len(date_afisare) > current_app.config.get('PDF_CACHE_MAX', 1000):
+            date_afisare.popitem(last=False)
+
+def incarcare_date_afisare(doctor_ids, cabinet_ids):
+    """
+    Datele de afisare pentru doctorii si cabinetele care nu sunt in cache, cu cate o interogare
+    pentru toti doctorii (nume + specializare) si toate cabinetele lipsa
+    """
+    doctori_lipsa = {id for id in doctor_ids if id is not None and din_cache(('doctor', id)) is LIPSA}
+    cabinete_lipsa = {id for id in cabinet_ids if id is not None and din_cache(('cabinet', id)) is LIPSA}
+    gasite = {('doctor', id): None for id in doctori_lipsa}
+    gasite.update({('cabinet', id): None for id in cabinete_lipsa})
+
+    if doctori_lipsa:
+        for id, nume, specializare in db.session.query(Doctor.id, User.full_name, Specialization.name).join(
+                User, Doctor.user_id == User.id).outerjoin(Specialization, Doctor.specialization_id == Specialization.id
+                ).filter(Doctor.id.in_(doctori_lipsa)):
+            gasite[('doctor', id)] = DateDoctor(nume, specializare)
+
+    if cabinete_lipsa:
+        for id, nume, locatie in db.session.query(Cabinet.id, Cabinet.name, Cabinet.location).filter(
+                Cabinet.id.in_(cabinete_lipsa)):
+            gasite[('cabinet', id)] = DateCabinet(nume, locatie)
+
+    if gasite:
+        salvare_in_cache(gasite)
+
+def stampare_confirmare(data, doctor, cabinet):
+    """
+    PDF-ul de confirmare pentru mesajul data, cu datele de afisare deja rezolvate (fara BD)
+    """
+    valori = {
+        'appointment_id': str(data.get('appointment_id', 'N/A')),
+        'patient_name': str(data.get('patient_name', 'N/A')),
+        'patient_email': str(data.get('patient_email', 'N/A')),
+        'start_time': str(data.get('start_time', 'N/A')),
+        'end_time': str(data.get('end_time', 'N/A')),
+        'status': str(data.get('status', 'CONFIRMAT')),
+        'generat_la': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
+    }
+    if doctor:
+        valori['doctor'] = f"Dr. {doctor.nume} ({doctor.specializare})" if doctor.specializare else f"Dr. {doctor.nume}"
+    if cabinet:
+        valori['cabinet'] = str(cabinet.nume)
+        valori['locatie'] = str(cabinet.locatie)
+
+    sablon = get_sablon(doctor is not None, cabinet is not None)
+    if sablon is not None:
+        return sablon.stampare(valori)
+
+    pdf = FPDF()
+    desenare_confirmare(pdf, doctor is not None, cabinet is not None, valori=valori)
+    return pdf.output(dest='S').encode('latin-1')
+
+def date_din_mesaj(data):
+    """
+    Doctorul si cabinetul din mesajul de notificare (schema_version >= 2 le are pe toate, vezi
+    clinic_core.notificari), sau LIPSA pentru mesajele vechi, care trebuie completate din cache / BD
+    """
+    if 'doctor_name' not in data:
+        return LIPSA, LIPSA
+
+    doctor = DateDoctor(data['doctor_name'], data.get('specialization')) if data['doctor_name'] else None
+    cabinet = DateCabinet(data['cabinet'], data.get('location')) if data.get('cabinet') else None
+    return doctor, cabinet
+
+def generate_confirmation_pdfs(lista_data):
+    """
+    PDF-urile de confirmare pentru mai multe mesaje odata: doctorul si cabinetul vin din mesaj, iar pentru
+    mesajele vechi (fara ele) datele lipsa din cache se citesc cu o singura interogare pentru tot lotul,
+    restul e doar stampare pe sablon
+    """
+    din_mesaj = [date_din_mesaj(data) for data in lista_data]
+    vechi = [data for data, (doctor, _) in zip(lista_data, din_mesaj) if doctor is LIPSA]
+    if vechi:
+        incarcare_date_afisare([data.get('doctor_id') for data in vechi], [data.get('cabinet_id') for data in vechi])
+
+    pdfuri = []
+    for data, (doctor, cabinet) in zip(lista_data, din_mesaj):
+        if doctor is LIPSA:
+            doctor = din_cache(('doctor', data.get('doctor_id')))
+            cabinet = din_cache(('cabinet', data.get('cabinet_id')))
+        pdfuri.append(stampare_confirmare(data, None if doctor is LIPSA else doctor, None if cabinet is LIPSA else cabinet))
+    return pdfuri
+
+def generate_confirmation_pdf(data):
+    return generate_confirmation_pdfs([data])[0]
+
+
+if __name__ == '__main__':
+    """
+    Benchmark: timpul pe PDF cu FPDF de la zero (varianta veche, fara interogarile din BD) fata de stamparea
+    pe sablon; verific si ca pagina stampata e identica cu cea desenata de FPDF cu aceleasi valori
+    python utils/pdf_generator.py
+    """
+    import timeit
+
+    def pdf_naiv(data, doctor, cabinet):
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.set_font("Arial", 'B', 16)
+        pdf.cell(200, 10, txt=f"CONFIRMARE PROGRAMARE SLOT - ID.{data.get('appointment_id', 'N/A')}", ln=1, align='C')
+        pdf.ln(10)
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 8, txt=f"Nume pacient: {data.get('patient_name', 'N/A')}", ln=1)
+        pdf.cell(200, 8, txt=f"Email pacient: {data.get('patient_email', 'N/A')}", ln=1)
+        pdf.ln(5)
+        pdf.cell(200, 8, txt=f"Doctor: Dr. {doctor.nume} ({doctor.specializare})", ln=1)
+        pdf.cell(200, 8, txt=f"Cabinet: {cabinet.nume}, Locatie: {cabinet.locatie}", ln=1)
+        pdf.ln(5)
+        pdf.set_text_color(0, 102, 204)
+        pdf.cell(200, 10, txt=f"Data si ora la care incepe programarea: {data.get('start_time', 'N/A')}", ln=1)
+        pdf.cell(200, 10, txt=f"Data si ora la care se termina programarea: {data.get('end_time', 'N/A')}", ln=1)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(200, 10, txt=f"Status: {data.get('status', 'CONFIRMAT')}", ln=1)
+        pdf.ln(20)
+        pdf.set_font("Arial", 'I', 10)
+        pdf.cell(200, 10, txt="Va rugam sa prezentati acest document la asistenta odata ce ajungeti la cabinet pentru a anunta medicul.\n ", ln=1, align='C')
+        pdf.cell(200, 10, txt="Multumim ca ati ales clinica noastra!", ln=1, align='C')
+        pdf.set_y(265)
+        pdf.set_font("Arial", size=8)
+        pdf.cell(200, 10, txt=f"Document generat la data de: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}", align='C')
+        return pdf
+
+    data = {'appointment_id': 1234, 'patient_name': 'Ion (Popescu)', 'patient_email': 'ion.popescu@clinica.com',
+            'start_time': '2030-01-07 10:00:00', 'end_time': '2030-01-07 10:30:00', 'status': 'CONFIRMED'}
+    doctor = DateDoctor('Maria Ionescu', 'Cardiologie')
+    cabinet = DateCabinet('Cabinet 101', 'Etaj 1, Aripa Stanga')
+
+    # aceeasi pagina: continutul desenat de FPDF si cel stampat (fara data generarii, care difera la secunda)
+    naiv = pdf_naiv(data, doctor, cabinet)
+    stampat = stampare_confirmare(data, doctor, cabinet)
+    flux = re.search(rb'stream\n(.*?)\nendstream', stampat, re.S).group(1)
+    fara_data = lambda continut: re.sub(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d UTC', '', continut)
+    assert fara_data(zlib.decompress(flux).decode('latin-1')) == fara_data(naiv.pages[1])
+    # si documentul stampat citit inapoi: o pagina, cu toate valorile in text
+    nr_pagini, text = citire_pdf(stampat)
+    assert nr_pagini == 1
+    for valoare in list(data.values()) + [doctor.nume, doctor.specializare, cabinet.nume, cabinet.locatie]:
+        assert str(valoare) in text, valoare
 
-    # Returneaza continutul ca bytes string
-    return pdf.output(dest='S').encode('latin-1')
\ No newline at end of file
+    n = 500
+    t_naiv = timeit.timeit(lambda: pdf_naiv(data, doctor, cabinet).output(dest='S').encode('latin-1'), number=n) / n
+    t_sablon = timeit.timeit(lambda: stampare_confirmare(data, doctor, cabinet), number=n) / n
+    print(f"FPDF de la zero: {t_naiv * 1000:.3f} ms / PDF, sablon: {t_sablon * 1000:.3f} ms / PDF "
+          f"({t_naiv / t_sablon:.1f}x)")
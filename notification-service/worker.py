@@ -3,25 +3,52 @@ import json
 import time
 import os
 import secrets
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from app import create_app
-from utils.email_handler import send_email_smtp
+from clinic_core.notificari import validare_notificare, NotificareInvalida
+from utils.email_handler import construire_email, trimitere_email
 from utils.pdf_generator import generate_confirmation_pdf
-from utils.minIO_proc import upload_file_to_minio
+from utils.minIO_proc import upload_in_fundal, url_public, pregatire_bucket
 
 # config conectare RabbitMQ
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
 QUEUE_NAME = 'notifications_queue'
 
-app = create_app()
+app = create_app(rute=False, profil_bd='worker')
 
-def procesare_cerere(ch, method, properties, body):
+def email_deja_trimis(data):
+    """
+    Pentru un mesaj retrimis de RabbitMQ (worker-ul a cazut / a esuat inainte de ack): exista deja in notifications
+    emailul trimis pentru aceeasi programare si acelasi mesaj (la CONFIRMED mesajul salvat are in plus link-ul PDF-ului)
+    """
+    from clinic_core.models import db, Notification, NotificationStatus
+
+    return db.session.query(Notification.id).filter(
+        Notification.appointment_id == data['appointment_id'],
+        Notification.user_id == data['user_id'],
+        Notification.status == NotificationStatus.SENT,
+        Notification.message.startswith(data['message'], autoescape=True)).first() is not None
+
+def procesare_notificare(body, redelivered=False):
     """
-    Procesez mesajele venite de producator 
+    Procesez un mesaj venit de producator: PDF + MinIO (doar la CONFIRMED), emailul si randul din notifications
+    Mesajul are tot ce trebuie pentru email si PDF (clinic_core.notificari), asa ca accesul la BD e INSERT-ul
+    din notifications (plus o verificare pentru mesajele retrimise, ca emailul sa nu plece de doua ori);
+    un mesaj invalid se confirma si se ignora, retrimis ar pica la fel
     """
     with app.app_context():
-        data = json.loads(body)
-        
+        try:
+            data = validare_notificare(json.loads(body))
+        except (ValueError, NotificareInvalida) as e:
+            print(f"Mesaj de notificare invalid, ignorat: {e}")
+            return
+
+        if redelivered and email_deja_trimis(data):
+            print(f"Emailul pentru programarea {data['appointment_id']} a fost deja trimis, mesajul retrimis e ignorat")
+            return
+
         print(f"Procesez mailul pentru {data['patient_email']}")
         email = data.get('patient_email')
         mesaj = data.get('message', '')
@@ -35,6 +62,7 @@ def procesare_cerere(ch, method, properties, body):
         url_minio = None
     
         # GENERARE PDF SI UPLOAD IN MINIO (DOAR DACA PROGRAMAREA E CONFIRMATA)
+        upload = None
         if status == 'CONFIRMED':
             try:
                 print("Generare PDF")
@@ -43,26 +71,41 @@ def procesare_cerere(ch, method, properties, body):
                 token = secrets.token_urlsafe(16)
                 pdf_name = f"programare_{data.get('appointment_id')}_{token}.pdf"
                 
+                # upload-ul ruleaza pe executorul MinIO cat timp se construieste emailul
                 print("Upload MinIO")
-                url_minio = upload_file_to_minio(pdf_bytes, pdf_name)
-                
-                if url_minio:
-                    print(f"PDF incarcat: {url_minio}")
-                    mesaj += f"Puteti descarca confirmarea PDF de aici: {url_minio}"
-                else:
-                    print("Eroare url nu exista dupa upload")
+                upload = upload_in_fundal(pdf_bytes, pdf_name)
             except Exception as e:
                 print(f"Eroare la generare/upload PDF: {e}")
 
+        # link-ul public se stie dinainte, asa ca emailul (cu PDF-ul atasat) se construieste in paralel cu upload-ul
+        mesaj_email = mesaj
+        if upload:
+            mesaj_email += f"Puteti descarca confirmarea PDF de aici: {url_public(pdf_name)}"
+
+        email_construit = None
+        if email:
+            email_construit = construire_email(email, subiect, mesaj_email, attachment_data=pdf_bytes, attachment_name=pdf_name)
+
+        if upload:
+            try:
+                url_minio = upload.result()
+                print(f"PDF incarcat: {url_minio}")
+                mesaj = mesaj_email
+            except Exception as e:
+                print(f"Eroare la generare/upload PDF: {e}")
+                # fara link in email daca PDF-ul nu a ajuns in MinIO (ramane doar atasamentul)
+                if email:
+                    email_construit = construire_email(email, subiect, mesaj, attachment_data=pdf_bytes, attachment_name=pdf_name)
+
         if email:
             # se trimite emailul
-            succes = send_email_smtp(email, subiect, mesaj, attachment_data=pdf_bytes, attachment_name=pdf_name)
+            succes = trimitere_email(email_construit)
             if succes:
                 print(f"Email trimis catre {email}")
             else:
                 print(f"Eroare la trimiterea email-ului")
 
-        from bd_struc_flask import db, Notification, NotificationType, NotificationStatus
+        from clinic_core.models import db, Notification, NotificationType, NotificationStatus
 
         # salvez notificarile automate(emailurile) care sunt trimise, si in BD ca sa pot sa 
         # le vad in istoric dupa
@@ -74,11 +117,52 @@ def procesare_cerere(ch, method, properties, body):
             status=NotificationStatus.SENT if succes else NotificationStatus.FAILED,
             sent_at=datetime.utcnow() if succes else None
         )
-        db.session.add(notificare)
-        db.session.commit()
+        try:
+            db.session.add(notificare)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if not succes:
+                raise
+            # emailul a plecat deja: daca mesajul s-ar pune inapoi in coada, emailul s-ar trimite a doua oara
+            print(f"Email trimis catre {email}, dar notificarea nu s-a salvat in BD: {e}")
 
-        # confirmam procesarea email si stergem cererea din coada
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+def procesare_cerere(ch, method, properties, body):
+    """
+    Modul single: procesez mesajul direct pe firul conexiunii, cate unul pe rand
+    """
+    procesare_notificare(body, method.redelivered)
+
+    # confirmam procesarea email si stergem cererea din coada
+    ch.basic_ack(delivery_tag=method.delivery_tag)
+
+def confirmare(ch, delivery_tag, succes, requeue):
+    # ruleaza pe firul conexiunii (add_callback_threadsafe), singurul care are voie sa foloseasca canalul
+    if not ch.is_open:
+        # canalul s-a inchis intre timp, RabbitMQ retrimite oricum mesajele neconfirmate
+        return
+    if succes:
+        ch.basic_ack(delivery_tag=delivery_tag)
+    else:
+        ch.basic_nack(delivery_tag=delivery_tag, requeue=requeue)
+
+def procesare_in_fir(connection, ch, method, body):
+    """
+    Modul concurrent: procesarea ruleaza pe un fir din pool, iar ack-ul se trimite inapoi pe firul
+    conexiunii, care intre timp a continuat sa primeasca mesaje si sa raspunda la heartbeat-uri
+    Un mesaj care a esuat se mai pune o data in coada; daca esueaza si a doua oara se renunta la el
+    Dupa ce emailul a plecat mesajul se confirma oricum, iar un mesaj retrimis nu mai trimite emailul daca
+    il gaseste deja in notifications (vezi email_deja_trimis)
+    """
+    succes = True
+    try:
+        procesare_notificare(body, method.redelivered)
+    except Exception as e:
+        print(f"Eroare procesare notificare (redelivered={method.redelivered}): {e}")
+        succes = False
+
+    connection.add_callback_threadsafe(
+        functools.partial(confirmare, ch, method.delivery_tag, succes, not method.redelivered))
 
 def start_worker():
     """
@@ -86,6 +170,7 @@ def start_worker():
     Declar o coada persistenta in bd lui RabbitMQ si astept mesajele de la producator
     ca sa fie procesate, cate unu pe rand, pt asta se activeaza bucla infinita care asteapta
     si apeleaza functia de procesare pt fiecare mesaj cand il primeste
+    Cu WORKER_MODE=concurrent mesajele se proceseaza in paralel pe WORKER_THREADS fire (procesare_in_fir)
     """
     connection = None
     while not connection:
@@ -95,9 +180,35 @@ def start_worker():
             print("RabbitMQ nu este gata. Asteapta, se mai incarca inca odata")
             time.sleep(5)
 
+    # bucket-ul pentru PDF-uri se pregateste o data, la pornire (daca MinIO nu e gata, la primul upload)
+    try:
+        with app.app_context():
+            pregatire_bucket()
+    except Exception as e:
+        print(f"MinIO nu e gata ({e}), bucket-ul se pregateste la primul upload")
+
     channel = connection.channel()
     channel.queue_declare(queue=QUEUE_NAME, durable=True)
 
+    if app.config['WORKER_MODE'] == 'concurrent':
+        # pool-ul limiteaza cate emailuri / upload-uri ruleaza odata (si deci sesiunile SMTP deschise),
+        # prefetch-ul trebuie sa fie cel putin cat pool-ul ca sa aiba toate firele de lucru
+        # fiecare fir are conexiunea lui la BD pentru INSERT-ul din notifications (pool-ul are WORKER_THREADS
+        # conexiuni, vezi create_app)
+        fire = app.config['WORKER_THREADS']
+        executor = ThreadPoolExecutor(max_workers=fire, thread_name_prefix='notificari')
+        channel.basic_qos(prefetch_count=max(app.config['WORKER_PREFETCH'], fire))
+        channel.basic_consume(queue=QUEUE_NAME, on_message_callback=lambda ch, method, properties, body:
+            executor.submit(procesare_in_fir, connection, ch, method, body))
+
+        print(f'Consumator activ (mod concurrent, {fire} fire), se astapta mail-urile sa fie procesate')
+        try:
+            channel.start_consuming()
+        finally:
+            # mesajele neconfirmate raman in coada si le primeste alt worker / urmatoarea pornire
+            executor.shutdown(wait=False, cancel_futures=True)
+        return
+
     channel.basic_qos(prefetch_count=1)
     channel.basic_consume(queue=QUEUE_NAME, on_message_callback=procesare_cerere)
 
@@ -8,6 +8,100 @@ from typing import Dict, Tuple
 colors = {'GREEN': '\033[92m', 'RED': '\033[91m', 'YELLOW': '\033[93m',
             'BLUE': '\033[94m', 'BLUE_GREEN': '\033[96m', 'RESET': '\033[0m', 'BOLD': '\033[1m'}
 
+# date de test pentru verificarea indecsilor (Pasul 11): totul intr-o tranzactie anulata la final, ca sa nu
+# ramana in BD. 500 de doctori, 2000 de pacienti, 100k programari pe 200 de zile, evenimente, notificari, program
+SQL_INDECSI = r"""
+BEGIN;
+INSERT INTO users (external_id, email, full_name, role)
+SELECT 'idx-' || i, 'idx' || i || '@test.com', 'Index ' || i, CASE WHEN i <= 500 THEN 'DOCTOR' ELSE 'PATIENT' END
+FROM generate_series(1, 2500) i;
+INSERT INTO doctors (user_id, specialization_id, bio)
+SELECT id, (SELECT min(id) FROM specializations), 'idx-test' FROM users WHERE external_id LIKE 'idx-%' AND role = 'DOCTOR';
+CREATE TEMP TABLE idx_doctori ON COMMIT DROP AS
+    SELECT id, row_number() OVER (ORDER BY id) - 1 AS nr FROM doctors WHERE bio = 'idx-test';
+CREATE TEMP TABLE idx_pacienti ON COMMIT DROP AS
+    SELECT id, row_number() OVER (ORDER BY id) - 1 AS nr FROM users WHERE external_id LIKE 'idx-%' AND role = 'PATIENT';
+
+INSERT INTO appointments (patient_id, doctor_id, start_time, end_time, status)
+SELECT p.id, d.id, s.start_time, s.start_time + interval '30 minutes',
+    CASE WHEN s.start_time < localtimestamp
+        THEN (CASE i % 10 WHEN 0 THEN 'CANCELLED' WHEN 1 THEN 'REJECTED' ELSE 'COMPLETED' END)
+        ELSE (CASE WHEN i % 10 < 2 THEN 'CANCELLED' WHEN i % 10 < 5 THEN 'PENDING' ELSE 'CONFIRMED' END) END
+FROM generate_series(0, 99999) i
+JOIN idx_doctori d ON d.nr = i % 500
+JOIN idx_pacienti p ON p.nr = i % 2000
+CROSS JOIN LATERAL (SELECT date_trunc('day', localtimestamp) + (i / 500 - 160) * interval '1 day'
+    + interval '9 hours' AS start_time) s;
+
+INSERT INTO appointment_events (appointment_id, event_type, is_processed)
+SELECT a.id, 'CREATED', true FROM appointments a JOIN idx_doctori d ON d.id = a.doctor_id;
+INSERT INTO appointment_events (appointment_id, event_type, is_processed)
+SELECT a.id, 'REMINDER_DUE', true FROM appointments a JOIN idx_doctori d ON d.id = a.doctor_id WHERE a.status = 'COMPLETED';
+INSERT INTO notifications (user_id, appointment_id, message, status, created_at)
+SELECT a.patient_id, a.id, 'idx-test', 'SENT', a.start_time - interval '1 day'
+FROM appointments a JOIN idx_doctori d ON d.id = a.doctor_id;
+INSERT INTO schedules (doctor_id, weekday, start_time, end_time)
+SELECT d.id, w, t.inceput, t.sfarsit FROM idx_doctori d, generate_series(0, 6) w,
+    (VALUES (time '09:00', time '13:00'), (time '14:00', time '18:00')) t(inceput, sfarsit);
+INSERT INTO reminder_schedule (appointment_id, due_at)
+SELECT a.id, a.start_time - interval '60 minutes' FROM appointments a JOIN idx_doctori d ON d.id = a.doctor_id
+WHERE a.status = 'CONFIRMED';
+
+ANALYZE users, doctors, appointments, appointment_events, notifications, schedules, reminder_schedule;
+
+SELECT id AS doctor_id FROM idx_doctori WHERE nr = 7 \gset
+SELECT id AS patient_id FROM idx_pacienti WHERE nr = 11 \gset
+SELECT min(id) AS appointment_id FROM appointments WHERE doctor_id = :doctor_id \gset
+
+\echo ### suprapuneri (worker)
+EXPLAIN (COSTS OFF) SELECT start_time, end_time FROM appointments WHERE doctor_id = :doctor_id
+    AND status IN ('PENDING', 'CONFIRMED') AND start_time < localtimestamp + interval '3 days'
+    AND end_time > localtimestamp + interval '2 days';
+\echo ### sloturi libere (doctor, zi)
+EXPLAIN (COSTS OFF) SELECT start_time, end_time FROM appointments WHERE doctor_id = :doctor_id
+    AND start_time < localtimestamp + interval '3 days' AND end_time > localtimestamp + interval '2 days'
+    AND status IN ('PENDING', 'CONFIRMED', 'COMPLETED');
+\echo ### availability (mai multi doctori)
+EXPLAIN (COSTS OFF) SELECT doctor_id, start_time, end_time FROM appointments
+    WHERE doctor_id IN (:doctor_id, :doctor_id + 1, :doctor_id + 2)
+    AND start_time < localtimestamp + interval '7 days' AND end_time > localtimestamp
+    AND status IN ('PENDING', 'CONFIRMED', 'COMPLETED');
+\echo ### /appointments/my
+EXPLAIN (COSTS OFF) SELECT * FROM appointments WHERE patient_id = :patient_id
+    AND (status = 'PENDING' OR (status = 'CONFIRMED' AND end_time >= localtimestamp)) ORDER BY start_time;
+\echo ### /appointments/my/history
+EXPLAIN (COSTS OFF) SELECT * FROM appointments WHERE patient_id = :patient_id
+    AND (status = 'COMPLETED' OR (status = 'CONFIRMED' AND end_time < localtimestamp)
+        OR status = 'CANCELLED' OR status = 'REJECTED') ORDER BY start_time DESC;
+\echo ### reminder (scadente)
+EXPLAIN (COSTS OFF) SELECT id FROM reminder_schedule WHERE due_at <= localtimestamp
+    ORDER BY due_at LIMIT 100 FOR UPDATE SKIP LOCKED;
+\echo ### sweeper
+EXPLAIN (COSTS OFF) SELECT id FROM appointments WHERE status = 'CONFIRMED' AND end_time < localtimestamp
+    ORDER BY end_time LIMIT 500 FOR UPDATE SKIP LOCKED;
+\echo ### notificari user
+EXPLAIN (COSTS OFF) SELECT * FROM notifications WHERE user_id = :patient_id ORDER BY created_at DESC;
+\echo ### notificari programare
+EXPLAIN (COSTS OFF) SELECT * FROM notifications WHERE appointment_id = :appointment_id;
+\echo ### program doctor
+EXPLAIN (COSTS OFF) SELECT * FROM schedules WHERE doctor_id = :doctor_id AND weekday = 2;
+ROLLBACK;
+"""
+
+# pentru fiecare interogare, indecsii care pot fi folositi (migrarile clinic_core/migrations/versions/0002_indecsi.py si 0003)
+INDECSI_ASTEPTATI = {
+    'suprapuneri (worker)': ['idx_appointments_doctor_active', 'idx_appointments_doctor_status_start'],
+    'sloturi libere (doctor, zi)': ['idx_appointments_doctor_status_start'],
+    'availability (mai multi doctori)': ['idx_appointments_doctor_status_start'],
+    '/appointments/my': ['idx_appointments_patient_active', 'idx_appointments_patient_status_start'],
+    '/appointments/my/history': ['idx_appointments_patient_status_start'],
+    'reminder (scadente)': ['idx_reminder_schedule_due_at'],
+    'sweeper': ['idx_appointments_confirmed_end'],
+    'notificari user': ['idx_notifications_user_created'],
+    'notificari programare': ['idx_notifications_appointment'],
+    'program doctor': ['idx_schedules_doctor_weekday'],
+}
+
 class TestApp:
     def __init__(self):
         #pastrez local tokenurile, si rezultatele testelor in dictionare
@@ -89,10 +183,10 @@ class TestApp:
 
         comenzi = [
             ("docker swarm init && sleep 2", "Initializare docker-swarm"),
-            ("docker build -t medical-user-service:latest ./user-service && sleep 5", "construire User-Service"),
-            ("docker build -t medical-doctor-service:latest ./doctor-service && sleep 5", "construire Doctor-Service"),
-            ("docker build -t medical-appointment-service:latest ./appointment-service && sleep 5", "construire Appointment-Service"),
-            ("docker build -t medical-notification-service:latest ./notification-service && sleep 5", "construire Notification-Service"),
+            ("docker build -t medical-user-service:latest -f user-service/Dockerfile . && sleep 5", "construire User-Service"),
+            ("docker build -t medical-doctor-service:latest -f doctor-service/Dockerfile . && sleep 5", "construire Doctor-Service"),
+            ("docker build -t medical-appointment-service:latest -f appointment-service/Dockerfile . && sleep 5", "construire Appointment-Service"),
+            ("docker build -t medical-notification-service:latest -f notification-service/Dockerfile . && sleep 5", "construire Notification-Service"),
         ]
 
         for cmd, descriere in comenzi:
@@ -210,7 +304,7 @@ class TestApp:
             return 401, {"EROARE": "Nu exista token pentru rolul asta"}
 
         # IMPART URL-UL IN FUNCTIE SERVICIU CA SA STIU UNDE SA TRIMIT CEREREA
-        if endpoint.startswith('/doctors') or endpoint.startswith('/specializations') or endpoint.startswith('/cabinets'):
+        if endpoint.startswith('/doctors') or endpoint.startswith('/specializations') or endpoint.startswith('/cabinets') or endpoint.startswith('/availability'):
             url = f"{self.doctor_service_url}{endpoint}"
 
         if endpoint.startswith('/users'):
@@ -880,6 +974,17 @@ class TestApp:
         else:
             self.print_TesteRez("EROARE TEST", f"(patient_nou) GET /doctors/2/available-slots?date=2025-12-15\n Status: {status}", f"Raspuns: {raspuns}\n")
 
+        # --------------------- AFISARE DISPONIBILITATE PE O SAPTAMANA PENTRU TOTI DOCTORII UNEI SPECIALIZARI ------------------------
+
+        print(f"\n{colors['BOLD']}       AFISARE DISPONIBILITATE PE O SAPTAMANA PENTRU O SPECIALIZARE {colors['RESET']}\n")
+        print("-> Intervalele libere continue [start, end, durata_slot] pentru fiecare doctor si zi in care lucreaza\n")
+
+        status, raspuns = self.request('patient_nou', 'GET', '/availability?specialization_id=1&from=2025-12-15&to=2025-12-21')
+        if status == 200 and any(d['doctor_id'] == 2 and '2025-12-15' in d['days'] for d in raspuns.get('doctors', [])):
+            self.print_TesteRez("CORECT TEST", f"(patient_nou) GET /availability?specialization_id=1&from=2025-12-15&to=2025-12-21\n Status: {status}", f"Raspuns: {raspuns}\n")
+        else:
+            self.print_TesteRez("EROARE TEST", f"(patient_nou) GET /availability?specialization_id=1&from=2025-12-15&to=2025-12-21\n Status: {status}", f"Raspuns: {raspuns}\n")
+
         # --------------------------- AFISARE TOATE PROGRAMARILE FACUTE DUPA CERERI ----------------------
 
         print(f"\n{colors['BOLD']}       AFISARE DIN NOU TOATE PROGRAMARILE FACUTE DUPA CERERI  {colors['RESET']}\n")
@@ -890,6 +995,23 @@ class TestApp:
         else:
             self.print_TesteRez("EROARE TEST", f"(doctor) GET /appointments\n Status: {status}", f"Raspuns: {raspuns}\n")
         
+        # --------------------------- AFISARE PROGRAMARI PAGINAT (LIMIT + CURSOR) ----------------------
+
+        print(f"\n{colors['BOLD']}       AFISARE PROGRAMARI PAGINAT, CATE 2 PE PAGINA  {colors['RESET']}\n")
+        print(f"{colors['BOLD']}-> A doua pagina se cere cu next_cursor de pe prima pagina{colors['RESET']}\n")
+
+        status, raspuns = self.request('doctor', 'GET', '/appointments?limit=2')
+        if status == 200 and len(raspuns.get('appointments', [])) == 2 and raspuns.get('next_cursor'):
+            self.print_TesteRez("CORECT TEST", f"(doctor) GET /appointments?limit=2\n Status: {status}", f"Raspuns: {raspuns}\n")
+
+            status, raspuns = self.request('doctor', 'GET', f"/appointments?limit=2&cursor={raspuns['next_cursor']}")
+            if status == 200 and len(raspuns.get('appointments', [])) == 1 and raspuns.get('next_cursor') is None:
+                self.print_TesteRez("CORECT TEST", f"(doctor) GET /appointments?limit=2&cursor=...\n Status: {status}", f"Raspuns: {raspuns}\n")
+            else:
+                self.print_TesteRez("EROARE TEST", f"(doctor) GET /appointments?limit=2&cursor=...\n Status: {status}", f"Raspuns: {raspuns}\n")
+        else:
+            self.print_TesteRez("EROARE TEST", f"(doctor) GET /appointments?limit=2\n Status: {status}", f"Raspuns: {raspuns}\n")
+
         # ------------------------- AFISARE PROGRAMARILE ACTIVE ALE PACIENTULUI ----------------------
 
         print(f"\n{colors['BOLD']}       AFISARE PROGRAMARILE ACTIVE ALE PACIENTULUI(CELE CARE SE AFLA IN PENDING/CONFIRMED)  {colors['RESET']}\n")
@@ -1195,6 +1317,124 @@ class TestApp:
             self.print_TesteRez("EROARE TEST", f"(doctor) PUT /appointments/5/confirm\n Status: {status}", f"Raspuns: {raspuns}\n")
         
 
+    def test_indecsi(self):
+        """
+        Pasul 11: Verific cu EXPLAIN ca interogarile folosite des (worker, sloturi, /my, reminder, sweeper,
+        notificari, program) merg pe indecsii din migrarea 0002, pe un set mare de date pus in BD
+        intr-o tranzactie care se anuleaza la final
+        """
+        self.print_Sectiuni("Verificare indecsi (EXPLAIN)")
+
+        returncode, stdout, stderr = self.run_Shell("docker ps -q -f name=medical_app_db")
+        container = stdout.split()[0] if stdout.split() else None
+        if returncode != 0 or not container:
+            self.print_TesteRez("EROARE TEST", "Nu gasesc containerul BD-ului", stderr[:200])
+            return
+
+        try:
+            rez = subprocess.run(["docker", "exec", "-i", container, "psql", "-U", "scd", "-d", "clinica",
+                                  "-v", "ON_ERROR_STOP=1", "-q", "-A", "-t"],
+                                 input=SQL_INDECSI, capture_output=True, text=True, timeout=300)
+        except Exception as e:
+            self.print_TesteRez("EROARE TEST", "Nu s-a putut rula EXPLAIN in BD", str(e))
+            return
+
+        if rez.returncode != 0:
+            self.print_TesteRez("EROARE TEST", "Nu s-a putut rula EXPLAIN in BD", rez.stderr[:500])
+            return
+
+        # iesirea e impartita pe interogari dupa liniile "### <nume>"
+        planuri = {}
+        for bucata in rez.stdout.split("### ")[1:]:
+            nume, _, plan = bucata.partition("\n")
+            planuri[nume.strip()] = plan.strip()
+
+        for nume, indecsi in INDECSI_ASTEPTATI.items():
+            plan = planuri.get(nume, "")
+            if "Index" in plan and any(index in plan for index in indecsi):
+                self.print_TesteRez("CORECT TEST", f"EXPLAIN {nume} foloseste indexul", f"Plan:\n{plan}\n")
+            else:
+                self.print_TesteRez("EROARE TEST", f"EXPLAIN {nume} nu foloseste {' / '.join(indecsi)}", f"Plan:\n{plan}\n")
+
+    def test_nr_interogari_listare(self):
+        """
+        Pasul 12: Listarea programarilor face acelasi numar de interogari SQL indiferent cate programari afiseaza
+        (doctorii, pacientii si cabinetele se iau toate odata, nu cate una pe programare). Numarul il pune
+        appointment-service in headerul X-Nr-Interogari (clinic_core/instrumentare.py)
+        Interogarea pentru cabinete se face doar daca pagina are programari cu cabinet, asa ca pagina mare
+        poate avea cel mult o interogare in plus fata de cea cu o singura programare (depinde de date, nu de nr)
+        """
+        self.print_Sectiuni("Numar interogari SQL la listarea programarilor")
+
+        headers = {"Authorization": f"Bearer {self.tokens.get('admin', '')}"}
+        interogari = {}
+        try:
+            # prima cerere doar incalzeste cache-urile (identitatea adminului), nu se numara
+            requests.get(f"{self.appointment_service_url}/appointments?limit=1", headers=headers, timeout=10)
+
+            for limit in (1, 100):
+                raspuns = requests.get(f"{self.appointment_service_url}/appointments?limit={limit}", headers=headers, timeout=10)
+                nr_programari = len(raspuns.json().get('appointments', [])) if raspuns.status_code == 200 else 0
+                nr_interogari = raspuns.headers.get('X-Nr-Interogari')
+                interogari[limit] = (nr_programari, int(nr_interogari) if nr_interogari is not None else None)
+        except Exception as e:
+            self.print_TesteRez("EROARE TEST", "GET /appointments?limit=... nu a raspuns", str(e)[:200])
+            return
+
+        (programari_1, nr_1), (programari_n, nr_n) = interogari[1], interogari[100]
+        detalii = f"limit=1: {programari_1} programari, {nr_1} interogari; limit=100: {programari_n} programari, {nr_n} interogari\n"
+        if nr_1 is not None and nr_n is not None and programari_n > programari_1 and nr_n <= nr_1 + 1:
+            self.print_TesteRez("CORECT TEST", "(admin) GET /appointments: nr de interogari nu depinde de nr de programari", detalii)
+        else:
+            self.print_TesteRez("EROARE TEST", "(admin) GET /appointments: nr de interogari creste cu nr de programari", detalii)
+
+    def test_dubla_rezervare(self):
+        """
+        Pasul 13: Multe cereri concurente pentru acelasi doctor si acelasi slot, procesate de toate replicile
+        appointment-worker: cel mult o programare ramane activa, restul sunt REJECTED (constrangerea de
+        excludere din BD / rezolvarea conflictelor din lot), deci worker-ul poate rula cu mai multe replici
+        """
+        self.print_Sectiuni("Cereri concurente pe acelasi slot (fara dubla rezervare)")
+
+        # luni, in programul de lucru 12:00-19:00 pus la doctorul 2 in test_reminder_email
+        slot = {"doctor_id": 2, "start_time": "2026-01-26 14:00:00", "end_time": "2026-01-26 14:05:00"}
+        roluri = [rol for rol in ('patient', 'patient_nou', 'patient_nou2') if rol in self.tokens]
+        cereri_pe_rol = 10
+
+        statusuri = []
+        statusuri_lock = threading.Lock()
+
+        def cerere(rol):
+            status, _ = self.request(rol, 'POST', '/appointments', slot)
+            with statusuri_lock:
+                statusuri.append(status)
+
+        fire = [threading.Thread(target=cerere, args=(rol,)) for rol in roluri for _ in range(cereri_pe_rol)]
+        for fir in fire:
+            fir.start()
+        for fir in fire:
+            fir.join()
+
+        acceptate = statusuri.count(202)
+        print(f"{len(fire)} cereri trimise deodata, {acceptate} puse in coada\n")
+
+        # astept sa fie procesate toate cererile de worker-e
+        programari = []
+        for _ in range(15):
+            time.sleep(1)
+            status, raspuns = self.request('admin', 'GET', '/appointments?doctor_id=2&date_from=2026-01-26&date_to=2026-01-26')
+            if status == 200:
+                programari = [p for p in raspuns if p['start_time'] == slot['start_time']]
+                if len(programari) >= acceptate:
+                    break
+
+        active = [p for p in programari if p['status'] != 'REJECTED']
+        detalii = f"Programari pe slot: {len(programari)}, active (ne-REJECTED): {len(active)}\n"
+        if acceptate and len(programari) == acceptate and len(active) <= 1:
+            self.print_TesteRez("CORECT TEST", f"{len(fire)} x POST /appointments pe acelasi slot: cel mult o programare activa", detalii)
+        else:
+            self.print_TesteRez("EROARE TEST", f"{len(fire)} x POST /appointments pe acelasi slot: dubla rezervare sau cereri pierdute", detalii)
+
     def rezultate(self):
         """
         Printeaza rezultatele finale ale testelor
@@ -1235,6 +1475,9 @@ class TestApp:
             self.test_events()
             self.test_finalizare_programari()
             self.test_reminder_email()
+            self.test_indecsi()
+            self.test_nr_interogari_listare()
+            self.test_dubla_rezervare()
         except Exception as e:
             print(f"\n{colors['RED']}Eroare: {str(e)}{colors['RESET']}")
         finally:
@@ -1,8 +1,8 @@
-import time
 from flask import Flask
-from sqlalchemy.exc import OperationalError
 from config import Config
-from bd_struc_flask import db
+from clinic_core.bd import initializare_bd, asteptare_bd
+from clinic_core.auth import initializare_chei, initializare_identitati
+from clinic_core.instrumentare import initializare_instrumentare
 from routes.users import users_bp
 
 def create_app(config_class=Config):
@@ -14,33 +14,24 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     app.json.sort_keys = False # nu sortez cheile (json) in raspusurile primite de la server
 
-    # initialez BD-ul, leg SQLAlchemy la Flask
-    db.init_app(app)
+    # initialez BD-ul, leg SQLAlchemy la Flask (cu setarile comune de engine din clinic_core)
+    initializare_bd(app, 'user-service')
 
     # adaug rutele aplicatiei
     app.register_blueprint(users_bp)
 
+    # cheile Keycloak (JWKS) din copia locala + firul care le reimprospateaza, inainte de primele cereri
+    initializare_chei(app.config)
+    # ascultatorul pentru modificarile userilor (invalideaza cache-ul de identitati)
+    initializare_identitati(app.config)
+    # durata si nr de interogari pe cerere (cererile lente apar in log)
+    initializare_instrumentare(app)
 
-    # deoarece nu se conecteaza din prima la BD pt ca nu e gata(initializat), conexiunea esueaza
-    # asa ca incerc sa ma conectez de mai multe ori pana cand reusesc (max incercari 10)
-    with app.app_context():
-        max_retries = 10
-        for attempt in range(max_retries):
-            try:
-                # daca s a facut conexiunea creez tabelele
-                db.create_all()
-                print("Conexiunea la baza de date realizata cu succes!")
-                break
-
-            except OperationalError as e:
-                if attempt == max_retries - 1:
-                    print(f"Eroare nu s-a putut conecta la baza de date dupa {max_retries} incercari.")
-                    raise e
-
-                print(f"Baza de date nu este gata... -> Incercarea {attempt + 1}/{max_retries}")
-                time.sleep(3)
+    # schema o creeaza jobul de migrare (python -m clinic_core.migrare), aici doar astept
+    # ca BD-ul sa raspunda si sa fie la revizia asteptata
+    asteptare_bd(app, 'user-service')
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -11,12 +11,40 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # cererile web mai lente de atat (ms) apar in log cu durata si nr de interogari SQL (0 = oprit)
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 1000))
+
+    # pool-ul de conexiuni la BD (clinic_core/bd.py): fiecare tip de proces are un profil (web / worker /
+    # scheduler), variabilele de mai jos il suprascriu cand sunt setate; dimensionarea e explicata in README
+    DB_POOL_SIZE = os.getenv('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = os.getenv('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT')
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE')
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING')
+    DB_STATEMENT_TIMEOUT_MS = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    DB_APPLICATION_NAME = os.getenv('DB_APPLICATION_NAME')
+    # 1 cand conexiunile trec prin PgBouncer in modul transaction
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0')
+    # cat asteapta (secunde) la pornire ca jobul de migrare sa aduca schema la revizia ceruta
+    DB_READY_TIMEOUT = int(os.getenv('DB_READY_TIMEOUT', 60))
 
     # setari Keycloak 
     KEYCLOAK_URL = os.getenv('KEYCLOAK_URL', 'http://keycloak:8080')
     KEYCLOAK_REALM = os.getenv('KEYCLOAK_REALM', 'master')
     KEYCLOAK_CLIENT_ID = os.getenv('KEYCLOAK_CLIENT_ID', 'admin-cli')
     KEYCLOAK_CLIENT_SECRET = os.getenv('KEYCLOAK_CLIENT_SECRET', '')
+    # cheile de semnare din JWKS: reimprospatare in fundal (secunde), pauza minima intre doua cereri
+    # pentru un kid necunoscut si copia locala folosita la pornire
+    KEYCLOAK_JWKS_REFRESH = int(os.getenv('KEYCLOAK_JWKS_REFRESH', 300))
+    KEYCLOAK_JWKS_MIN_REFRESH = int(os.getenv('KEYCLOAK_JWKS_MIN_REFRESH', 30))
+    KEYCLOAK_JWKS_SNAPSHOT = os.getenv('KEYCLOAK_JWKS_SNAPSHOT', '/tmp/keycloak_jwks.json')
+
+    # cache-ul de identitati (user_id, rol, doctor_id) din clinic_core/auth.py: TTL in secunde (0 = oprit), nr maxim
+    # de intrari si exchange-ul fanout pe care user-service anunta modificarile userilor
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 60))
+    IDENTITY_CACHE_MAX = int(os.getenv('IDENTITY_CACHE_MAX', 10000))
+    USER_EVENTS_EXCHANGE = os.getenv('USER_EVENTS_EXCHANGE', 'user_events')
+    RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
 
     # JWT - algoritmul de criptare pt token-urile userilor + durata de viata a lui
     JWT_ALGORITHM = 'RS256'
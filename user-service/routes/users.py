@@ -1,7 +1,7 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
-from bd_struc_flask import db, User, UserRole
-from utils.auth import require_auth, require_role, get_user_info_from_token, get_token_from_header
+from clinic_core.models import db, User, UserRole
+from clinic_core.auth import require_auth, require_role, get_user_info_from_token, get_token_from_header, producator_modificare_user
 import requests
 import os
 
@@ -328,6 +328,7 @@ def update_current_user():
 
         # salvam modificarile in BD
         db.session.commit()
+        producator_modificare_user(external_id)
         return jsonify(user.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -403,6 +404,7 @@ def sync_keycloak():
 
     try:
         db.session.commit()
+        producator_modificare_user(external_id)
         return jsonify({'message': 'Sincronizare reusita a userului', 'user': user.to_dict()}), 200
 
     except Exception as e:
@@ -505,6 +507,7 @@ def update_user(user_id):
             update_keycloak_user(user.external_id, keycloak_data)
 
         db.session.commit()
+        producator_modificare_user(user.external_id)
         return jsonify(user.to_dict()), 200
 
     except Exception as e:
@@ -537,6 +540,7 @@ def update_user_role(user_id):
         update_keycloak_role(user.external_id, data['role'].upper())
 
         db.session.commit()
+        producator_modificare_user(user.external_id)
         return jsonify(user.to_dict()), 200
 
     except KeyError:
@@ -564,6 +568,7 @@ def delete_user(user_id):
         # sterg in BD
         db.session.delete(user)
         db.session.commit()
+        producator_modificare_user(external_id)
 
         # sterg si din Keycloak
         delete_keycloak_user(external_id)